@@ -1,22 +1,40 @@
 """FastAPI application for train commute optimizer."""
 
+import threading
 import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse
 
 import config
-from commute_optimizer import CommuteOptimizer, MeetingPoint
+from commute_optimizer import (
+    CommuteOptimizer,
+    GroupMeetingPoint,
+    MeetingPoint,
+    check_isochrone_bands,
+)
 from database_manager import TrainDatabaseManager
+from path_search import ShortestPathPool
+from station_table import StationRecord
 from web.models import (
     StationInfo,
     StationSearchResponse,
+    NearbyStation,
+    NearbyStationsResponse,
+    StationsInBoundsResponse,
     AnalyzeRequest,
     AnalyzeResponse,
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
+    BatchAnalyzeResult,
+    GroupAnalyzeRequest,
+    GroupAnalyzeResponse,
+    GroupCandidateStation,
+    IsochroneResponse,
     CandidateStation,
     RouteInfo,
     RouteSegment,
@@ -24,6 +42,8 @@ from web.models import (
     RailwaysResponse,
     HealthResponse,
     WorkStationInfo,
+    PathCacheStats,
+    NetworkReloadResponse,
 )
 
 # Initialize FastAPI app
@@ -48,31 +68,64 @@ app.add_middleware(
 # Initialize optimizer
 optimizer = CommuteOptimizer(config.DEFAULT_DB_PATH)
 
+# Serializes rebuilds; requests never take it once a network is published
+_rebuild_lock = threading.Lock()
+
+# Worker processes for batch analysis, started on first use and kept across
+# requests (a rebuilt graph replaces them)
+batch_pool = ShortestPathPool(config.BATCH_MAX_WORKERS)
+
+
+def current_optimizer() -> CommuteOptimizer:
+    """
+    Get an optimizer pinned to the current network snapshot.
+    
+    Each request works on its own view, so a background rebuild swapping in
+    a new snapshot never changes the graph or station tables under it.
+    """
+    if optimizer.network is None:
+        with _rebuild_lock:
+            if optimizer.network is None:
+                optimizer.build_network()
+    return optimizer.pinned()
+
+
+# Placeholder details for stations missing from the station table
+_UNKNOWN_STATION = StationRecord("Unknown", None, None, 0.0, 0.0)
+
+
+def station_details(station_id: str, optimizer: CommuteOptimizer) -> StationRecord:
+    """Look up a station's details, with placeholders if it is not in the network."""
+    return optimizer.station_info.record(station_id) or _UNKNOWN_STATION
+
+
+def rebuild_network() -> None:
+    """Rebuild the network and publish it, unless a rebuild is already running."""
+    if not _rebuild_lock.acquire(blocking=False):
+        return
+    try:
+        optimizer.build_network()
+    finally:
+        _rebuild_lock.release()
+
 
 def format_route_segment(
     segment: Any, 
     optimizer: CommuteOptimizer
 ) -> RouteSegment:
     """Format a route segment for API response."""
-    from_info = optimizer.station_info.get(segment.from_station, {})
-    to_info = optimizer.station_info.get(segment.to_station, {})
-    railway_info = optimizer.railway_info.get(segment.railway, {})
+    from_info = station_details(segment.from_station, optimizer)
+    to_info = station_details(segment.to_station, optimizer)
     
     return RouteSegment(
         from_station=segment.from_station,
-        from_station_name=from_info.get("title", "Unknown"),
-        from_coordinates=[
-            from_info.get("latitude", 0.0),
-            from_info.get("longitude", 0.0)
-        ],
+        from_station_name=from_info.title,
+        from_coordinates=[from_info.latitude, from_info.longitude],
         to_station=segment.to_station,
-        to_station_name=to_info.get("title", "Unknown"),
-        to_coordinates=[
-            to_info.get("latitude", 0.0),
-            to_info.get("longitude", 0.0)
-        ],
+        to_station_name=to_info.title,
+        to_coordinates=[to_info.latitude, to_info.longitude],
         railway=segment.railway,
-        railway_name=railway_info.get("title", segment.railway.split(":")[-1]),
+        railway_name=optimizer.railway_info.title(segment.railway, segment.railway.split(":")[-1]),
         travel_time=segment.travel_time,
         num_stops=segment.num_stops,
         is_transfer=segment.railway == "Transfer"
@@ -94,7 +147,7 @@ def format_candidate(
     optimizer: CommuteOptimizer
 ) -> CandidateStation:
     """Format a candidate station for API response."""
-    station_info = optimizer.station_info.get(candidate.station_id, {})
+    info = station_details(candidate.station_id, optimizer)
     
     return CandidateStation(
         station_id=candidate.station_id,
@@ -102,13 +155,59 @@ def format_candidate(
         total_time=candidate.total_time,
         time_difference=candidate.time_difference,
         balance_score=candidate.balance_score,
-        latitude=station_info.get("latitude", 0.0),
-        longitude=station_info.get("longitude", 0.0),
+        latitude=info.latitude,
+        longitude=info.longitude,
         route_from_a=format_route(candidate.route_from_a, optimizer),
         route_from_b=format_route(candidate.route_from_b, optimizer)
     )
 
 
+def format_group_candidate(
+    candidate: GroupMeetingPoint,
+    optimizer: CommuteOptimizer
+) -> GroupCandidateStation:
+    """Format a group candidate station for API response."""
+    info = station_details(candidate.station_id, optimizer)
+    
+    return GroupCandidateStation(
+        station_id=candidate.station_id,
+        station_name=candidate.station_name,
+        total_time=candidate.total_time,
+        longest_time=candidate.longest_time,
+        spread=candidate.spread,
+        balance_score=candidate.balance_score,
+        latitude=info.latitude,
+        longitude=info.longitude,
+        commute_times=candidate.commute_times,
+        routes=[format_route(route, optimizer) for route in candidate.routes]
+    )
+
+
+def format_station(station_id: str, optimizer: CommuteOptimizer) -> StationInfo:
+    """Format a station of the network for API response."""
+    info = station_details(station_id, optimizer)
+    railway = info.railway or ""
+    
+    operator = "Unknown"
+    if "JR-East" in railway:
+        operator = "JR East"
+    elif "TokyoMetro" in railway:
+        operator = "Tokyo Metro"
+    elif "Keikyu" in railway:
+        operator = "Keikyu"
+    
+    return StationInfo(
+        id=station_id,
+        title=info.title or "",
+        title_en=info.title_en or "",
+        railway=railway,
+        railway_name=optimizer.railway_info.title(railway, railway.split(":")[-1]),
+        operator=operator,
+        latitude=info.latitude,
+        longitude=info.longitude
+    )
+
+
 @app.on_event("startup")
 async def startup_event() -> None:
     """Initialize on startup."""
@@ -118,6 +217,12 @@ async def startup_event() -> None:
     print("✅ Ready to serve requests!")
 
 
+@app.on_event("shutdown")
+def shutdown_event() -> None:
+    """Stop the batch analysis worker processes."""
+    batch_pool.shutdown()
+
+
 @app.get("/", include_in_schema=False)
 async def read_root() -> FileResponse:
     """Serve the main UI page."""
@@ -150,6 +255,43 @@ async def health_check() -> HealthResponse:
     )
 
 
+@app.get(
+    "/api/stats/cache",
+    response_model=PathCacheStats,
+    summary="Route cache statistics",
+    tags=["System"]
+)
+async def path_cache_stats() -> PathCacheStats:
+    """Get hit/miss/eviction counters of the shortest-path tree cache."""
+    return PathCacheStats(**optimizer.path_cache.stats())
+
+
+@app.post(
+    "/api/network/reload",
+    response_model=NetworkReloadResponse,
+    status_code=202,
+    summary="Rebuild the network in the background",
+    tags=["System"]
+)
+async def reload_network(background_tasks: BackgroundTasks) -> NetworkReloadResponse:
+    """
+    Re-read stations and railways from the database without a restart.
+    
+    The rebuild runs after the response is sent. Requests keep being served
+    from the current network snapshot until the new one is swapped in, and
+    a request in flight finishes on the snapshot it started with.
+    """
+    running = _rebuild_lock.locked()
+    if not running:
+        background_tasks.add_task(rebuild_network)
+    
+    return NetworkReloadResponse(
+        status="already running" if running else "scheduled",
+        graph_version=optimizer.graph_version,
+        fingerprint=optimizer.graph_fingerprint.hex()
+    )
+
+
 @app.get(
     "/api/stations/search",
     response_model=StationSearchResponse,
@@ -166,35 +308,10 @@ async def search_stations(
     Searches both Japanese and English station names.
     Returns station information including coordinates for map display.
     """
-    if not optimizer.station_info:
-        optimizer.build_network()
+    view = current_optimizer()
     
-    results = optimizer.search_station(q)[:limit]
-    
-    stations: List[StationInfo] = []
-    for station_id, title, title_en, railway in results:
-        info = optimizer.station_info.get(station_id, {})
-        railway_info = optimizer.railway_info.get(railway, {})
-        
-        # Get operator from railway
-        operator = "Unknown"
-        if "JR-East" in railway:
-            operator = "JR East"
-        elif "TokyoMetro" in railway:
-            operator = "Tokyo Metro"
-        elif "Keikyu" in railway:
-            operator = "Keikyu"
-        
-        stations.append(StationInfo(
-            id=station_id,
-            title=title,
-            title_en=title_en,
-            railway=railway,
-            railway_name=railway_info.get("title", railway.split(":")[-1]),
-            operator=operator,
-            latitude=info.get("latitude"),
-            longitude=info.get("longitude")
-        ))
+    results = view.search_station(q, limit)
+    stations = [format_station(station_id, view) for station_id, *_ in results]
     
     return StationSearchResponse(
         stations=stations,
@@ -202,6 +319,78 @@ async def search_stations(
     )
 
 
+@app.get(
+    "/api/stations/nearby",
+    response_model=NearbyStationsResponse,
+    summary="Find stations near a point",
+    tags=["Stations"]
+)
+async def stations_nearby(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude in degrees"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude in degrees"),
+    radius: float = Query(
+        config.NEARBY_DEFAULT_RADIUS, gt=0, le=config.NEARBY_MAX_RADIUS,
+        description="Search radius in meters"
+    ),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results")
+) -> NearbyStationsResponse:
+    """
+    Get the stations closest to a point, nearest first.
+    
+    Lets the map snap a click to the nearest stations. Only the grid cells
+    around the point are searched.
+    """
+    view = current_optimizer()
+    
+    try:
+        nearby = view.stations_nearby(lat, lon, radius, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    stations = [
+        NearbyStation(distance=round(distance, 1), **format_station(station_id, view).model_dump())
+        for station_id, distance in nearby
+    ]
+    return NearbyStationsResponse(stations=stations, count=len(stations))
+
+
+@app.get(
+    "/api/stations/bbox",
+    response_model=StationsInBoundsResponse,
+    summary="List stations inside a bounding box",
+    tags=["Stations"]
+)
+async def stations_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90, description="Southern edge in degrees"),
+    min_lon: float = Query(..., ge=-180, le=180, description="Western edge in degrees"),
+    max_lat: float = Query(..., ge=-90, le=90, description="Northern edge in degrees"),
+    max_lon: float = Query(..., ge=-180, le=180, description="Eastern edge in degrees"),
+    limit: int = Query(
+        config.BBOX_MAX_STATIONS, ge=1, le=config.BBOX_MAX_STATIONS,
+        description="Maximum number of results"
+    )
+) -> StationsInBoundsResponse:
+    """
+    Get the stations inside the visible map area.
+    
+    Only the grid cells overlapping the box are searched, so panning the
+    map loads just the stations in view.
+    """
+    view = current_optimizer()
+    
+    try:
+        station_ids = view.stations_in_bbox(min_lat, min_lon, max_lat, max_lon, limit + 1)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    stations = [format_station(station_id, view) for station_id in station_ids[:limit]]
+    return StationsInBoundsResponse(
+        stations=stations,
+        count=len(stations),
+        truncated=len(station_ids) > limit
+    )
+
+
 @app.get(
     "/api/stations/{station_id}",
     response_model=StationInfo,
@@ -210,34 +399,12 @@ async def search_stations(
 )
 async def get_station(station_id: str) -> StationInfo:
     """Get detailed information about a specific station."""
-    if not optimizer.station_info:
-        optimizer.build_network()
+    view = current_optimizer()
     
-    if station_id not in optimizer.station_info:
+    if view.station_info.record(station_id) is None:
         raise HTTPException(status_code=404, detail="Station not found")
     
-    info = optimizer.station_info[station_id]
-    railway = info.get("railway", "")
-    railway_info = optimizer.railway_info.get(railway, {})
-    
-    operator = "Unknown"
-    if "JR-East" in railway:
-        operator = "JR East"
-    elif "TokyoMetro" in railway:
-        operator = "Tokyo Metro"
-    elif "Keikyu" in railway:
-        operator = "Keikyu"
-    
-    return StationInfo(
-        id=station_id,
-        title=info.get("title", ""),
-        title_en=info.get("title_en", ""),
-        railway=railway,
-        railway_name=railway_info.get("title", ""),
-        operator=operator,
-        latitude=info.get("latitude"),
-        longitude=info.get("longitude")
-    )
+    return format_station(station_id, view)
 
 
 @app.post(
@@ -266,30 +433,62 @@ async def analyze_commute(request: AnalyzeRequest) -> AnalyzeResponse:
             detail="Work stations must be different"
         )
     
-    if not optimizer.network_graph:
-        optimizer.build_network()
+    view = current_optimizer()
     
     # Verify stations exist
-    if request.station_a not in optimizer.station_info:
+    if request.station_a not in view.station_info:
         raise HTTPException(
             status_code=404,
             detail=f"Station A not found: {request.station_a}"
         )
     
-    if request.station_b not in optimizer.station_info:
+    if request.station_b not in view.station_info:
         raise HTTPException(
             status_code=404,
             detail=f"Station B not found: {request.station_b}"
         )
     
+    if (request.depart_at is None) != (request.arrive_by is None):
+        raise HTTPException(
+            status_code=400,
+            detail="depart_at and arrive_by must be given together"
+        )
+    
+    if (request.window_start is None) != (request.window_end is None):
+        raise HTTPException(
+            status_code=400,
+            detail="window_start and window_end must be given together"
+        )
+    
+    departure_window = None
+    if request.window_start is not None:
+        departure_window = (request.window_start, request.window_end)
+    
     # Run analysis
     try:
-        candidates = optimizer.find_optimal_stations(
-            work_station_a=request.station_a,
-            work_station_b=request.station_b,
-            top_n=request.top_n,
-            max_time=request.max_time
-        )
+        if request.depart_at is not None:
+            candidates = view.find_optimal_stations_by_timetable(
+                work_station_a=request.station_a,
+                work_station_b=request.station_b,
+                depart_at=request.depart_at,
+                arrive_by=request.arrive_by,
+                top_n=request.top_n,
+                calendar=request.calendar
+            )
+        else:
+            candidates = view.find_optimal_stations(
+                work_station_a=request.station_a,
+                work_station_b=request.station_b,
+                top_n=request.top_n,
+                max_time=request.max_time,
+                departure_window=departure_window,
+                window_score=request.window_score,
+                calendar=request.calendar,
+                optimize=request.optimize,
+                transfer_penalty=request.transfer_penalty
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -303,26 +502,26 @@ async def analyze_commute(request: AnalyzeRequest) -> AnalyzeResponse:
         )
     
     # Format work station info
-    station_a_info = optimizer.station_info.get(request.station_a, {})
-    station_b_info = optimizer.station_info.get(request.station_b, {})
+    station_a_info = station_details(request.station_a, view)
+    station_b_info = station_details(request.station_b, view)
     
     work_stations = {
         "a": {
             "id": request.station_a,
-            "name": station_a_info.get("title", "Unknown"),
-            "latitude": station_a_info.get("latitude", 0.0),
-            "longitude": station_a_info.get("longitude", 0.0)
+            "name": station_a_info.title,
+            "latitude": station_a_info.latitude,
+            "longitude": station_a_info.longitude
         },
         "b": {
             "id": request.station_b,
-            "name": station_b_info.get("title", "Unknown"),
-            "latitude": station_b_info.get("latitude", 0.0),
-            "longitude": station_b_info.get("longitude", 0.0)
+            "name": station_b_info.title,
+            "latitude": station_b_info.latitude,
+            "longitude": station_b_info.longitude
         }
     }
     
     # Format candidates
-    formatted_candidates = [format_candidate(c, optimizer) for c in candidates]
+    formatted_candidates = [format_candidate(c, view) for c in candidates]
     
     computation_time = time.time() - start_time
     
@@ -333,6 +532,208 @@ async def analyze_commute(request: AnalyzeRequest) -> AnalyzeResponse:
     )
 
 
+@app.post(
+    "/api/analyze/group",
+    response_model=GroupAnalyzeResponse,
+    summary="Analyze commute options for three or more people",
+    tags=["Analysis"]
+)
+async def analyze_group_commute(request: GroupAnalyzeRequest) -> GroupAnalyzeResponse:
+    """
+    Find optimal living stations for any number of work locations.
+    
+    Ranks stations by weighted total commute time (or by the longest single
+    commute with objective "max"), breaking ties by the spread between the
+    longest and shortest commute.
+    """
+    start_time = time.time()
+    
+    if len(set(request.stations)) != len(request.stations):
+        raise HTTPException(
+            status_code=400,
+            detail="Work stations must be different"
+        )
+    
+    view = current_optimizer()
+    
+    for station in request.stations:
+        if station not in view.station_info:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Station not found: {station}"
+            )
+    
+    try:
+        candidates = view.find_optimal_stations_for_group(
+            work_stations=request.stations,
+            weights=request.weights,
+            top_n=request.top_n,
+            max_time=request.max_time,
+            objective=request.objective
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Analysis failed: {str(e)}"
+        )
+    
+    if not candidates:
+        raise HTTPException(
+            status_code=404,
+            detail="No common reachable stations found. Try increasing max_time."
+        )
+    
+    work_stations = []
+    for station in request.stations:
+        info = station_details(station, view)
+        work_stations.append(WorkStationInfo(
+            id=station,
+            name=info.title,
+            latitude=info.latitude,
+            longitude=info.longitude
+        ))
+    
+    return GroupAnalyzeResponse(
+        work_stations=work_stations,
+        candidates=[format_group_candidate(c, view) for c in candidates],
+        computation_time=time.time() - start_time
+    )
+
+
+@app.post(
+    "/api/analyze/batch",
+    response_model=BatchAnalyzeResponse,
+    summary="Analyze many workplace pairs",
+    tags=["Analysis"]
+)
+def analyze_commute_batch(request: BatchAnalyzeRequest) -> BatchAnalyzeResponse:
+    """
+    Find optimal living stations for many workplace pairs in one call.
+    
+    Each distinct work station is searched once and shared by every pair it
+    appears in, so reports over many couples cost one search per workplace
+    rather than two per pair. Pairs that cannot be analyzed carry an error
+    instead of failing the whole batch.
+    
+    The endpoint is synchronous so FastAPI runs it in its thread pool: the
+    searches take a while and must not block the event loop.
+    """
+    start_time = time.time()
+    
+    view = current_optimizer()
+    
+    # Only valid pairs are searched; the rest get an error in place
+    errors: List[Optional[str]] = []
+    valid_pairs = []
+    for pair in request.pairs:
+        if pair.station_a == pair.station_b:
+            errors.append("Work stations must be different")
+        elif pair.station_a not in view.station_info:
+            errors.append(f"Station A not found: {pair.station_a}")
+        elif pair.station_b not in view.station_info:
+            errors.append(f"Station B not found: {pair.station_b}")
+        else:
+            errors.append(None)
+            valid_pairs.append((pair.station_a, pair.station_b))
+    
+    try:
+        batch = view.find_optimal_stations_batch(
+            valid_pairs,
+            top_n=request.top_n,
+            max_time=request.max_time,
+            pool=batch_pool
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch analysis failed: {str(e)}"
+        )
+    
+    results: List[BatchAnalyzeResult] = []
+    candidates_iter = iter(batch)
+    for pair, error in zip(request.pairs, errors):
+        candidates = [] if error else next(candidates_iter)
+        if not error and not candidates:
+            error = "No common reachable stations found. Try increasing max_time."
+        results.append(BatchAnalyzeResult(
+            station_a=pair.station_a,
+            station_b=pair.station_b,
+            candidates=[format_candidate(c, view) for c in candidates],
+            error=error
+        ))
+    
+    return BatchAnalyzeResponse(
+        results=results,
+        unique_workplaces=len({station for pair in valid_pairs for station in pair}),
+        computation_time=time.time() - start_time
+    )
+
+
+@app.get(
+    "/api/isochrone/{station_id}",
+    response_model=IsochroneResponse,
+    summary="Stations reachable within travel-time bands",
+    tags=["Analysis"]
+)
+async def get_isochrone(
+    station_id: str,
+    request: Request,
+    response: Response,
+    bands: str = Query(
+        config.ISOCHRONE_DEFAULT_BANDS,
+        description="Comma-separated ascending band limits in minutes, e.g. 30,45,60"
+    )
+) -> IsochroneResponse:
+    """
+    Get the stations reachable from one station, grouped by travel time.
+    
+    Only station IDs are returned, so the response stays small enough for
+    map overlays. It depends only on the origin, the bands and the network,
+    so it carries an ETag and a Cache-Control header.
+    """
+    try:
+        band_limits = [float(b) for b in bands.split(",") if b.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Bands must be numbers in minutes")
+    if len(band_limits) > config.ISOCHRONE_MAX_BANDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.ISOCHRONE_MAX_BANDS} bands are allowed"
+        )
+    
+    # Invalid bands are rejected before any conditional response
+    try:
+        check_isochrone_bands(band_limits)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    view = current_optimizer()
+    
+    if station_id not in view.station_info:
+        raise HTTPException(status_code=404, detail="Station not found")
+    
+    etag = '"{}-{}"'.format(
+        view.graph_fingerprint.hex()[:16],
+        "-".join(f"{b:g}" for b in band_limits)
+    )
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={config.ISOCHRONE_CACHE_MAX_AGE}"
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        buckets = view.isochrone(station_id, band_limits)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    response.headers.update(headers)
+    return IsochroneResponse(origin=station_id, bands=band_limits, stations=buckets)
+
+
 @app.get(
     "/api/railways",
     response_model=RailwaysResponse,
@@ -341,11 +742,11 @@ async def analyze_commute(request: AnalyzeRequest) -> AnalyzeResponse:
 )
 async def list_railways() -> RailwaysResponse:
     """Get list of all railway lines in the system."""
-    if not optimizer.railway_info:
-        optimizer.build_network()
+    view = current_optimizer()
     
     railways: List[RailwayInfo] = []
-    for railway_id, info in optimizer.railway_info.items():
+    for railway_id in view.railway_info:
+        info = view.railway_info.record(railway_id)
         operator = "Unknown"
         if "JR-East" in railway_id:
             operator = "JR East"
@@ -356,8 +757,8 @@ async def list_railways() -> RailwaysResponse:
         
         railways.append(RailwayInfo(
             id=railway_id,
-            title=info.get("title", ""),
-            title_en=info.get("title_en"),
+            title=info.title or "",
+            title_en=info.title_en,
             operator=operator,
             color=None  # Can be added from database if needed
         ))
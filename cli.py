@@ -2,11 +2,13 @@
 
 import argparse
 import sys
+import time
 from typing import Optional, List
 import config
 from data_fetcher import DataFetcher
 from commute_optimizer import CommuteOptimizer
 from database_manager import TrainDatabaseManager
+from segment_times import derive_segment_times
 
 
 def cmd_fetch(args):
@@ -26,7 +28,7 @@ def cmd_fetch(args):
         operator_keys = None  # Fetch all
     
     try:
-        stats = fetcher.fetch_and_populate(operator_keys)
+        stats = fetcher.fetch_and_populate(operator_keys, args.timetables, args.stream)
         print("\n✓ Database updated successfully!")
         return 0
     except Exception as e:
@@ -34,6 +36,49 @@ def cmd_fetch(args):
         return 1
 
 
+def select_station(
+    optimizer: CommuteOptimizer,
+    query: str,
+    label: str
+) -> Optional[str]:
+    """
+    Resolve a station name to a station ID, asking the user if ambiguous.
+    
+    Args:
+        optimizer: Optimizer with the network already built
+        query: Station name or partial name
+        label: How the station is referred to in prompts (e.g. "A")
+        
+    Returns:
+        Station ID, or None if nothing matched or the selection was invalid
+    """
+    results = optimizer.search_station(query)
+    if not results:
+        print(f"✗ No stations found matching '{query}'")
+        return None
+    
+    if len(results) == 1:
+        print(f"✓ Found station {label}: {results[0][1]} ({results[0][2]})")
+        return results[0][0]
+    
+    print(f"\nMultiple stations found for '{query}':")
+    for i, (sid, title, title_en, railway) in enumerate(results, 1):
+        railway_name = railway.split(":")[-1] if ":" in railway else railway
+        print(f"  {i}. {title} ({title_en}) - {railway_name}")
+    
+    choice = input(f"\nSelect station {label} (enter number): ").strip()
+    try:
+        idx = int(choice) - 1
+        if 0 <= idx < len(results):
+            print(f"✓ Selected: {results[idx][1]}")
+            return results[idx][0]
+        print("✗ Invalid selection")
+        return None
+    except ValueError:
+        print("✗ Invalid input")
+        return None
+
+
 def cmd_analyze(args):
     """Execute the analyze command to find optimal stations."""
     optimizer = CommuteOptimizer(args.db_path)
@@ -44,73 +89,49 @@ def cmd_analyze(args):
     # Load station info first
     optimizer.build_network()
     
-    # Search for station A
-    results_a = optimizer.search_station(args.station_a)
-    if not results_a:
-        print(f"✗ No stations found matching '{args.station_a}'")
+    station_a_id = select_station(optimizer, args.station_a, "A")
+    if station_a_id is None:
         return 1
     
-    # Search for station B
-    results_b = optimizer.search_station(args.station_b)
-    if not results_b:
-        print(f"✗ No stations found matching '{args.station_b}'")
+    station_b_id = select_station(optimizer, args.station_b, "B")
+    if station_b_id is None:
         return 1
     
-    # If multiple results, show options
-    station_a_id = None
-    if len(results_a) == 1:
-        station_a_id = results_a[0][0]
-        print(f"✓ Found station A: {results_a[0][1]} ({results_a[0][2]})")
-    else:
-        print(f"\nMultiple stations found for '{args.station_a}':")
-        for i, (sid, title, title_en, railway) in enumerate(results_a, 1):
-            railway_name = railway.split(":")[-1] if ":" in railway else railway
-            print(f"  {i}. {title} ({title_en}) - {railway_name}")
-        
-        choice = input("\nSelect station A (enter number): ").strip()
-        try:
-            idx = int(choice) - 1
-            if 0 <= idx < len(results_a):
-                station_a_id = results_a[idx][0]
-                print(f"✓ Selected: {results_a[idx][1]}")
-            else:
-                print("✗ Invalid selection")
-                return 1
-        except ValueError:
-            print("✗ Invalid input")
-            return 1
+    if bool(args.depart_at) != bool(args.arrive_by):
+        print("✗ --depart-at and --arrive-by must be given together")
+        return 1
     
-    station_b_id = None
-    if len(results_b) == 1:
-        station_b_id = results_b[0][0]
-        print(f"✓ Found station B: {results_b[0][1]} ({results_b[0][2]})")
-    else:
-        print(f"\nMultiple stations found for '{args.station_b}':")
-        for i, (sid, title, title_en, railway) in enumerate(results_b, 1):
-            railway_name = railway.split(":")[-1] if ":" in railway else railway
-            print(f"  {i}. {title} ({title_en}) - {railway_name}")
-        
-        choice = input("\nSelect station B (enter number): ").strip()
-        try:
-            idx = int(choice) - 1
-            if 0 <= idx < len(results_b):
-                station_b_id = results_b[idx][0]
-                print(f"✓ Selected: {results_b[idx][1]}")
-            else:
-                print("✗ Invalid selection")
-                return 1
-        except ValueError:
-            print("✗ Invalid input")
+    departure_window = None
+    if args.window:
+        start, _, end = args.window.partition("-")
+        if not end:
+            print("✗ --window must look like 07:30-09:00")
             return 1
+        departure_window = (start.strip(), end.strip())
     
     # Run analysis
     try:
-        candidates = optimizer.find_optimal_stations(
-            work_station_a=station_a_id,
-            work_station_b=station_b_id,
-            top_n=args.top,
-            max_time=args.max_time
-        )
+        if args.depart_at:
+            candidates = optimizer.find_optimal_stations_by_timetable(
+                work_station_a=station_a_id,
+                work_station_b=station_b_id,
+                depart_at=args.depart_at,
+                arrive_by=args.arrive_by,
+                top_n=args.top,
+                calendar=args.calendar
+            )
+        else:
+            candidates = optimizer.find_optimal_stations(
+                work_station_a=station_a_id,
+                work_station_b=station_b_id,
+                top_n=args.top,
+                max_time=args.max_time,
+                departure_window=departure_window,
+                window_score=args.window_score,
+                calendar=args.calendar,
+                optimize=args.optimize,
+                transfer_penalty=args.transfer_penalty
+            )
         
         if not candidates:
             print("\n✗ No common reachable stations found!")
@@ -129,8 +150,20 @@ def cmd_analyze(args):
         print(f"  • Minimum total commute time for both people")
         print(f"  • Equal commute times (fairness)")
         print(f"  • Good connectivity to both work locations")
-        print(f"\nNote: Times estimated at {config.DEFAULT_AVG_TIME_PER_STOP} min/stop")
-        print(f"      + {config.DEFAULT_TRANSFER_TIME} min/transfer\n")
+        if departure_window:
+            print(f"\nNote: Times from {args.calendar} timetables, {args.window_score} "
+                  f"door-to-door commute")
+            print(f"      for leaving home at any minute between {args.window}\n")
+        elif args.depart_at:
+            print(f"\nNote: Times from {args.calendar} timetables, leaving after")
+            print(f"      {args.depart_at} and arriving by {args.arrive_by}, waiting included\n")
+        else:
+            print(f"\nNote: Times from timetable running times where available, else "
+                  f"{config.DEFAULT_AVG_TIME_PER_STOP} min/stop")
+            print(f"      + {config.DEFAULT_TRANSFER_TIME} min/transfer")
+            if args.optimize == "pareto":
+                print(f"      ranked with {args.transfer_penalty} extra min per transfer")
+            print()
         
         return 0
         
@@ -141,6 +174,48 @@ def cmd_analyze(args):
         return 1
 
 
+def cmd_analyze_group(args):
+    """Execute the analyze-group command for three or more commuters."""
+    optimizer = CommuteOptimizer(args.db_path)
+    
+    print(f"\nSearching for stations...")
+    optimizer.build_network()
+    
+    weights = None
+    if args.weights:
+        try:
+            weights = [float(w) for w in args.weights.split(",")]
+        except ValueError:
+            print("✗ --weights must be comma-separated numbers")
+            return 1
+    
+    station_ids = []
+    for i, query in enumerate(args.stations, 1):
+        station_id = select_station(optimizer, query, str(i))
+        if station_id is None:
+            return 1
+        station_ids.append(station_id)
+    
+    try:
+        candidates = optimizer.find_optimal_stations_for_group(
+            work_stations=station_ids,
+            weights=weights,
+            top_n=args.top,
+            max_time=args.max_time,
+            objective=args.objective
+        )
+    except ValueError as e:
+        print(f"\n✗ {e}")
+        return 1
+    
+    if not candidates:
+        print("\n✗ No common reachable stations found!")
+        return 1
+    
+    optimizer.display_group_results(station_ids, candidates)
+    return 0
+
+
 def cmd_search(args):
     """Execute the search command to find stations."""
     optimizer = CommuteOptimizer(args.db_path)
@@ -162,6 +237,51 @@ def cmd_search(args):
     return 0
 
 
+def cmd_build_matrix(args):
+    """Execute the build-matrix command to precompute all-pairs travel times."""
+    optimizer = CommuteOptimizer(args.db_path)
+    optimizer.build_network()
+    
+    print("\nComputing all-pairs travel times...")
+    start = time.time()
+    try:
+        optimizer.build_travel_time_matrix()
+    except OSError as e:
+        print(f"✗ Error: {e}")
+        return 1
+    
+    print(f"  ✓ Done in {time.time() - start:.1f} seconds\n")
+    return 0
+
+
+def cmd_build_segment_times(args):
+    """Execute the build-segment-times command to derive running times from timetables."""
+    print("\nDeriving segment running times from timetables...")
+    start = time.time()
+    with TrainDatabaseManager(args.db_path) as db:
+        db.create_schema()
+        count = derive_segment_times(db)
+    
+    if not count:
+        print("✗ No timetable data found (run fetch --timetables first)")
+        return 1
+    
+    print(f"  ✓ Stored median running times for {count} segments "
+          f"in {time.time() - start:.1f} seconds\n")
+    return 0
+
+
+def cmd_upgrade_db(args):
+    """Execute the upgrade-db command to bring an older database up to the current schema."""
+    print("\nUpgrading database schema...")
+    with TrainDatabaseManager(args.db_path) as db:
+        db.create_schema()
+        db.cursor.execute("SELECT COUNT(*) FROM railway_stations")
+        count = db.cursor.fetchone()[0]
+    print(f"  ✓ Schema up to date ({count} railway station order rows)\n")
+    return 0
+
+
 def cmd_stats(args):
     """Execute the stats command to show database statistics."""
     fetcher = DataFetcher(args.db_path)
@@ -211,13 +331,32 @@ Examples:
   # Fetch only from specific operators
   python cli.py fetch --operators JR_EAST,TOKYO_METRO
   
+  # Fetch timetables too, storing records as they download
+  python cli.py fetch --timetables --stream
+  
   # Analyze commute between two stations
   python cli.py analyze 六本木 海浜幕張
   python cli.py analyze Roppongi Kaihimmakuhari --top 10
   
+  # Prefer fewer transfers: each transfer counts as 10 extra minutes
+  python cli.py analyze 六本木 海浜幕張 --optimize pareto --transfer-penalty 10
+  
+  # Analyze with real timetables (requires fetch --timetables)
+  python cli.py analyze 六本木 海浜幕張 --depart-at 07:30 --arrive-by 09:00
+  python cli.py analyze 六本木 海浜幕張 --window 07:30-09:00 --window-score worst
+  
+  # Three commuters, the third weighted half
+  python cli.py analyze-group 六本木 海浜幕張 渋谷 --weights 1,1,0.5
+  
   # Search for a station
   python cli.py search 渋谷
   
+  # Precompute all-pairs travel times for faster analysis
+  python cli.py build-matrix
+  
+  # Recompute per-segment running times from stored timetables
+  python cli.py build-segment-times
+  
   # Show database statistics
   python cli.py stats
   
@@ -243,6 +382,16 @@ Examples:
         "--operators",
         help="Comma-separated list of operators (e.g., JR_EAST,TOKYO_METRO). Default: all"
     )
+    fetch_parser.add_argument(
+        "--timetables",
+        action="store_true",
+        help="Also fetch train timetables (needed for --depart-at/--arrive-by and --window)"
+    )
+    fetch_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Store records while responses download, keeping memory flat (for --timetables)"
+    )
     
     # Analyze command
     analyze_parser = subparsers.add_parser(
@@ -269,6 +418,76 @@ Examples:
         default=config.DEFAULT_MAX_COMMUTE_TIME,
         help=f"Maximum commute time in minutes (default: {config.DEFAULT_MAX_COMMUTE_TIME})"
     )
+    analyze_parser.add_argument(
+        "--depart-at",
+        help="Use timetables: earliest departure from home (HH:MM)"
+    )
+    analyze_parser.add_argument(
+        "--arrive-by",
+        help="Use timetables: latest arrival at work (HH:MM)"
+    )
+    analyze_parser.add_argument(
+        "--window",
+        help="Use timetables: score every departure minute in a window (e.g. 07:30-09:00)"
+    )
+    analyze_parser.add_argument(
+        "--window-score",
+        choices=config.WINDOW_SCORES,
+        default=config.DEFAULT_WINDOW_SCORE,
+        help=f"Score over the window (default: {config.DEFAULT_WINDOW_SCORE})"
+    )
+    analyze_parser.add_argument(
+        "--calendar",
+        default=config.DEFAULT_TIMETABLE_CALENDAR,
+        help=f"Timetable calendar (default: {config.DEFAULT_TIMETABLE_CALENDAR})"
+    )
+    analyze_parser.add_argument(
+        "--optimize",
+        choices=config.OPTIMIZE_MODES,
+        default=config.DEFAULT_OPTIMIZE,
+        help="Rank by fastest routes (time) or time plus a transfer penalty over "
+             f"every (time, transfers) trade-off (pareto) (default: {config.DEFAULT_OPTIMIZE})"
+    )
+    analyze_parser.add_argument(
+        "--transfer-penalty",
+        type=float,
+        default=config.DEFAULT_TRANSFER_PENALTY,
+        help=f"Extra minutes per transfer with --optimize pareto "
+             f"(default: {config.DEFAULT_TRANSFER_PENALTY})"
+    )
+    
+    # Analyze group command
+    analyze_group_parser = subparsers.add_parser(
+        "analyze-group",
+        help="Find optimal living stations for three or more commuters"
+    )
+    analyze_group_parser.add_argument(
+        "stations",
+        nargs="+",
+        help="Work stations (names or partial names), one per commuter"
+    )
+    analyze_group_parser.add_argument(
+        "--weights",
+        help="Comma-separated weight per work station (e.g. 1,1,0.5)"
+    )
+    analyze_group_parser.add_argument(
+        "--objective",
+        choices=config.GROUP_OBJECTIVES,
+        default=config.DEFAULT_GROUP_OBJECTIVE,
+        help="Rank by weighted total time (sum) or longest commute (max)"
+    )
+    analyze_group_parser.add_argument(
+        "--top",
+        type=int,
+        default=config.DEFAULT_TOP_N_RESULTS,
+        help=f"Number of results to show (default: {config.DEFAULT_TOP_N_RESULTS})"
+    )
+    analyze_group_parser.add_argument(
+        "--max-time",
+        type=float,
+        default=config.DEFAULT_MAX_COMMUTE_TIME,
+        help=f"Maximum commute time per person (default: {config.DEFAULT_MAX_COMMUTE_TIME})"
+    )
     
     # Search command
     search_parser = subparsers.add_parser(
@@ -280,6 +499,24 @@ Examples:
         help="Station name or partial name to search for"
     )
     
+    # Build matrix command
+    build_matrix_parser = subparsers.add_parser(
+        "build-matrix",
+        help="Precompute all-pairs travel times next to the database"
+    )
+    
+    # Build segment times command
+    build_segment_times_parser = subparsers.add_parser(
+        "build-segment-times",
+        help="Derive median per-segment running times from stored timetables"
+    )
+    
+    # Upgrade database command
+    upgrade_db_parser = subparsers.add_parser(
+        "upgrade-db",
+        help="Upgrade a database fetched by an older version to the current schema"
+    )
+    
     # Stats command
     stats_parser = subparsers.add_parser(
         "stats",
@@ -304,8 +541,16 @@ Examples:
         return cmd_fetch(args)
     elif args.command == "analyze":
         return cmd_analyze(args)
+    elif args.command == "analyze-group":
+        return cmd_analyze_group(args)
     elif args.command == "search":
         return cmd_search(args)
+    elif args.command == "build-matrix":
+        return cmd_build_matrix(args)
+    elif args.command == "build-segment-times":
+        return cmd_build_segment_times(args)
+    elif args.command == "upgrade-db":
+        return cmd_upgrade_db(args)
     elif args.command == "stats":
         return cmd_stats(args)
     elif args.command == "list-operators":
@@ -1,15 +1,59 @@
 """Commute optimizer for finding ideal living stations between two work locations."""
 
-import json
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
-from heapq import heappush, heappop
-from collections import defaultdict
+import copy
+import math
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+from types import MappingProxyType
+from typing import AbstractSet, Dict, FrozenSet, List, Mapping, Sequence, Tuple, Optional, Union
+from dataclasses import dataclass, field, replace
 import config
 from database_manager import TrainDatabaseManager
+from graph_snapshot import (
+    graph_source_hash,
+    load_graph_snapshot,
+    read_graph_sources,
+    snapshot_path_for,
+    write_graph_snapshot,
+)
+from network_graph import (
+    HUB_PREFIX,
+    NetworkGraph,
+    NetworkGraphBuilder,
+    TRANSFER_INDEX,
+    TRANSFER_RAILWAY,
+)
+from path_cache import ShortestPathTreeCache
+from path_search import (
+    INFINITY,
+    ParetoTree,
+    ShortestPathPool,
+    ShortestPathTree,
+    dijkstra,
+    meeting_point_search,
+    pareto_search,
+    rank_group_meeting_points,
+    rank_meeting_points,
+    shortest_path_trees,
+    trace_path,
+)
+from raptor_router import DepartureProfiles, RaptorRouter
+from spatial_index import StationSpatialIndex
+from station_search import StationSearchIndex
+from station_table import RailwayTable, StationTable
+from timetable_router import TimetableRouter, parse_time
+from travel_time_matrix import (
+    UNREACHABLE,
+    TravelTimeMatrix,
+    matrix_path_for,
+    write_travel_time_matrix,
+)
 
 
-@dataclass
+@dataclass(slots=True)
 class RouteSegment:
     """A segment of a route from one station to another."""
     from_station: str
@@ -19,26 +63,75 @@ class RouteSegment:
     num_stops: int
 
 
-@dataclass
 class Route:
-    """Complete route from origin to destination."""
-    segments: List[RouteSegment]
-    total_time: float
-    total_stops: int
+    """
+    Complete route from origin to destination.
+    
+    Segments are packed into two typed arrays, one of station and railway
+    indices into the graph's intern tables and one of travel times, so a
+    route is two flat buffers rather than one object per segment.
+    ``segments`` builds RouteSegment views on demand, and the totals are
+    kept up to date as segments are appended.
+    """
+    __slots__ = ("station_ids", "railway_ids", "links", "travel_times", "total_time", "total_stops")
+    
+    # links holds (from_node, to_node, railway, num_stops) per segment
+    _LINK_FIELDS = 4
+    
+    def __init__(self, station_ids: Sequence[str], railway_ids: Sequence[str]):
+        """
+        Initialize an empty route.
+        
+        Args:
+            station_ids: Table the station indices refer to (e.g. graph.station_ids)
+            railway_ids: Table the railway indices refer to (e.g. graph.railway_ids)
+        """
+        self.station_ids = station_ids
+        self.railway_ids = railway_ids
+        self.links = array("i")
+        self.travel_times = array("d")
+        self.total_time = 0.0
+        self.total_stops = 0
+    
+    def __len__(self) -> int:
+        """Number of segments."""
+        return len(self.travel_times)
+    
+    def append(
+        self,
+        from_node: int,
+        to_node: int,
+        railway: int,
+        travel_time: float,
+        num_stops: int
+    ) -> None:
+        """Add a segment at the end of the route and update the totals."""
+        self.links.extend((from_node, to_node, railway, num_stops))
+        self.travel_times.append(travel_time)
+        self.total_time += travel_time
+        self.total_stops += num_stops
+    
+    @property
+    def segments(self) -> List[RouteSegment]:
+        """The segments in travel order, with station and railway IDs resolved."""
+        station_ids = self.station_ids
+        railway_ids = self.railway_ids
+        links = self.links
+        return [
+            RouteSegment(
+                station_ids[links[k]], station_ids[links[k + 1]],
+                railway_ids[links[k + 2]], travel_time, links[k + 3]
+            )
+            for k, travel_time in zip(range(0, len(links), self._LINK_FIELDS), self.travel_times)
+        ]
     
     def get_transfer_count(self) -> int:
         """Count the number of transfers in this route."""
-        if not self.segments:
-            return 0
-        
-        transfers = 0
-        for i in range(1, len(self.segments)):
-            if self.segments[i].railway != self.segments[i-1].railway:
-                transfers += 1
-        return transfers
+        railways = self.links[2::self._LINK_FIELDS]
+        return sum(1 for i in range(1, len(railways)) if railways[i] != railways[i - 1])
 
 
-@dataclass
+@dataclass(slots=True)
 class MeetingPoint:
     """A candidate meeting point with routes from both origin stations."""
     station_id: str
@@ -50,6 +143,54 @@ class MeetingPoint:
     balance_score: float
 
 
+@dataclass(slots=True)
+class GroupMeetingPoint:
+    """A candidate meeting point with routes from any number of origin stations."""
+    station_id: str
+    station_name: str
+    routes: List[Route]           # One route per origin, in input order
+    commute_times: List[float]    # Travel time from each origin
+    total_time: float             # Weighted sum of commute times
+    longest_time: float           # Longest single commute
+    spread: float                 # Longest minus shortest commute
+    balance_score: float
+
+
+@dataclass(frozen=True, eq=False)
+class NetworkSnapshot:
+    """
+    One published version of the network graph and its station tables.
+    
+    A snapshot is never modified once published. Rebuilds assemble a new
+    snapshot and swap it in with a single reference assignment, so a reader
+    that took a snapshot keeps a consistent graph and station tables without
+    locking while the next version is built. Routers index the graph's
+    nodes, so they are cached per snapshot; they are loaded on first use
+    under router_lock, so concurrent requests load each one once and
+    never see a half-filled cache.
+    """
+    graph: NetworkGraph
+    station_info: StationTable
+    railway_info: RailwayTable
+    transfer_stations: Mapping[str, FrozenSet[str]]  # Station name -> station IDs
+    search_index: StationSearchIndex
+    spatial_index: StationSpatialIndex
+    version: int
+    fingerprint: bytes
+    travel_time_matrix: Optional[TravelTimeMatrix] = None
+    timetable_routers: Dict[str, TimetableRouter] = field(default_factory=dict, repr=False)
+    raptor_routers: Dict[str, RaptorRouter] = field(default_factory=dict, repr=False)
+    router_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+
+# Graph, station_info, railway_info and transfer_stations of a build, before publishing
+NetworkTables = Tuple[NetworkGraph, StationTable, RailwayTable, Dict[str, AbstractSet[str]]]
+
+_EMPTY_TABLE: Mapping = MappingProxyType({})
+_EMPTY_STATIONS = StationTable()
+_EMPTY_RAILWAYS = RailwayTable()
+
+
 class CommuteOptimizer:
     """Optimizer for finding ideal living stations for dual commute."""
     
@@ -61,206 +202,764 @@ class CommuteOptimizer:
             db_path: Path to the SQLite database file
         """
         self.db_path = db_path
-        self.network_graph = {}
-        self.station_info = {}
-        self.railway_info = {}
-        self.transfer_stations = {}  # Maps station name to set of station IDs
+        self.network: Optional[NetworkSnapshot] = None
+        # Row hashes the graph was built from, and the nodes each railway's
+        # edges leave from (filled lazily), for incremental rebuilds
+        self._source_hashes: Optional[Tuple[Dict, Dict, Dict]] = None
+        self._railway_nodes: Optional[Dict[int, set]] = None
+        self.path_cache: ShortestPathTreeCache[ShortestPathTree] = ShortestPathTreeCache(
+            config.PATH_TREE_CACHE_MAX_ENTRIES,
+            config.PATH_TREE_CACHE_MAX_BYTES
+        )
+        self.pareto_cache: ShortestPathTreeCache[ParetoTree] = ShortestPathTreeCache(
+            config.PATH_TREE_CACHE_MAX_ENTRIES,
+            config.PATH_TREE_CACHE_MAX_BYTES
+        )
+    
+    @property
+    def network_graph(self) -> Optional[NetworkGraph]:
+        """Graph of the current network snapshot (None before build_network)."""
+        return self.network.graph if self.network is not None else None
+    
+    @property
+    def station_info(self) -> StationTable:
+        """Station ID -> title, title_en, railway, latitude, longitude."""
+        return self.network.station_info if self.network is not None else _EMPTY_STATIONS
+    
+    @property
+    def railway_info(self) -> RailwayTable:
+        """Railway ID -> title, title_en."""
+        return self.network.railway_info if self.network is not None else _EMPTY_RAILWAYS
+    
+    @property
+    def transfer_stations(self) -> Mapping[str, FrozenSet[str]]:
+        """Station name -> IDs of the stations sharing it."""
+        return self.network.transfer_stations if self.network is not None else _EMPTY_TABLE
+    
+    @property
+    def travel_time_matrix(self) -> Optional[TravelTimeMatrix]:
+        """Precomputed travel-time matrix of the current graph, if one was found."""
+        return self.network.travel_time_matrix if self.network is not None else None
+    
+    @property
+    def graph_version(self) -> int:
+        """Counter that changes whenever the published graph does (keys the path caches)."""
+        return self.network.version if self.network is not None else 0
+    
+    @property
+    def graph_fingerprint(self) -> bytes:
+        """NetworkGraph.fingerprint() of the current graph."""
+        return self.network.fingerprint if self.network is not None else b""
+    
+    @property
+    def timetable_routers(self) -> Dict[str, TimetableRouter]:
+        """Connection scan routers of the current snapshot, by calendar."""
+        return self.network.timetable_routers if self.network is not None else {}
+    
+    @property
+    def raptor_routers(self) -> Dict[str, RaptorRouter]:
+        """RAPTOR routers of the current snapshot, by calendar."""
+        return self.network.raptor_routers if self.network is not None else {}
+    
+    def pinned(self) -> "CommuteOptimizer":
+        """
+        Get a view of this optimizer that keeps the current network snapshot.
+        
+        The view shares the path caches, but a rebuild publishing a new
+        snapshot does not reach it, so everything one request computes comes
+        from the same graph and station tables. The caches are keyed by graph
+        version, so views of different snapshots keep separate trees.
+        Rebuilds must be run on the optimizer itself, not on a view.
+        
+        Returns:
+            Shallow copy of the optimizer bound to the current snapshot
+        """
+        return copy.copy(self)
     
     def build_network(self) -> None:
-        """Build network graph from railway station order data."""
+        """
+        Build network graph from railway station order data.
+        
+        The graph and station tables are saved as a binary snapshot next to
+        the database, keyed by a hash of the source rows. Later starts load
+        the snapshot instead of parsing every station order again, and any
+        change to the data makes the snapshot stale so it is rebuilt.
+        
+        Once a graph is loaded, calling this again only applies what changed
+        in the database (see _update_graph). Either way the result is
+        published as a new NetworkSnapshot in one assignment; the previous
+        snapshot is never modified, so readers holding it are unaffected.
+        """
         print("\nBuilding network from railway station orders...")
         
         with TrainDatabaseManager(self.db_path) as db:
-            # Get all stations
-            db.cursor.execute("""
-                SELECT same_as, title, title_en, railway, latitude, longitude
-                FROM stations
-                WHERE same_as IS NOT NULL
-            """)
-            
-            for row in db.cursor.fetchall():
-                station_id, title, title_en, railway, lat, lon = row
-                self.station_info[station_id] = {
-                    "title": title,
-                    "title_en": title_en,
-                    "railway": railway,
-                    "latitude": lat,
-                    "longitude": lon
-                }
-                
-                # Build transfer station mapping
-                if title not in self.transfer_stations:
-                    self.transfer_stations[title] = set()
-                self.transfer_stations[title].add(station_id)
-            
-            # Get railway information with station order
-            db.cursor.execute("""
-                SELECT same_as, title, title_en, station_order
-                FROM railways
-                WHERE same_as IS NOT NULL AND station_order IS NOT NULL
-            """)
-            
-            railway_count = 0
-            for row in db.cursor.fetchall():
-                railway_id, title, title_en, station_order_json = row
-                self.railway_info[railway_id] = {
-                    "title": title,
-                    "title_en": title_en
-                }
-                
-                try:
-                    station_order = json.loads(station_order_json)
-                    if station_order:  # Only process if not empty
-                        self._process_railway_order(railway_id, station_order)
-                        railway_count += 1
-                except (json.JSONDecodeError, KeyError):
-                    continue
-            
-            print(f"  ✓ Processed {railway_count} railway lines")
-            print(f"  ✓ Built graph with {len(self.network_graph)} stations")
-            print(f"  ✓ Found {len(self.transfer_stations)} station names")
-            
-            # Add transfer connections
-            self._add_transfer_connections()
-    
-    def _process_railway_order(self, railway: str, station_order: List[Dict]) -> None:
-        """Process railway station order to build network connections."""
-        for i in range(len(station_order) - 1):
-            current = station_order[i]
-            next_stop = station_order[i + 1]
-            
-            current_station = current.get("odpt:station")
-            next_station = next_stop.get("odpt:station")
+            station_rows, railway_rows, segment_times = read_graph_sources(db)
+        source_hash = graph_source_hash(station_rows, railway_rows, segment_times)
+        snapshot_path = snapshot_path_for(self.db_path)
+        current = self.network
+        
+        tables: Optional[NetworkTables] = None
+        if current is not None and self._source_hashes is not None:
+            delta = self._update_graph(current, station_rows, railway_rows, segment_times)
+            if delta is not None:
+                changes, tables = delta
+                if tables is None:
+                    print("  ✓ Network unchanged since the last build")
+                    # Timetables are not part of the row hashes: a fresh
+                    # snapshot drops routers built from older timetables
+                    self.network = replace(current, timetable_routers={}, raptor_routers={})
+                    return
+                print(f"  ✓ Updated {changes[0]} stations, {changes[1]} railway lines and "
+                      f"{changes[2]} station complexes in place")
+                self._write_graph_snapshot(snapshot_path, source_hash, tables)
+        
+        if tables is None:
+            loaded = load_graph_snapshot(snapshot_path, source_hash)
+            if loaded is not None:
+                graph, stored_stations, stored_railways = loaded
+                transfer_stations: Dict[str, set] = {}
+                for station_id, title, *_ in stored_stations:
+                    transfer_stations.setdefault(title, set()).add(station_id)
+                railway_info = RailwayTable(stored_railways)
+                tables = (
+                    graph, StationTable.from_rows(graph, stored_stations),
+                    railway_info, transfer_stations
+                )
+                print(f"  ✓ Loaded graph snapshot from {snapshot_path} "
+                      f"({graph.num_stations} stations, {len(railway_info)} railway lines)")
+            else:
+                tables = self._build_graph(station_rows, railway_rows, segment_times)
+                self._write_graph_snapshot(snapshot_path, source_hash, tables)
+            self._railway_nodes = None
+        
+        self._source_hashes = _row_hashes(station_rows, railway_rows, segment_times)
+        self._publish(tables)
+    
+    def _publish(self, tables: NetworkTables) -> None:
+        """
+        Swap in a new network snapshot built from the given tables.
+        
+        Cached trees and the matrix stay valid if only station details
+        changed, so the version only moves when the graph itself does; the
+        search and spatial indexes are likewise kept unless stations changed.
+        """
+        graph, station_info, railway_info, transfer_stations = tables
+        current = self.network
+        if current is not None and station_info == current.station_info:
+            search_index = current.search_index
+            spatial_index = current.spatial_index
+        else:
+            search_index = StationSearchIndex(station_info)
+            spatial_index = StationSpatialIndex(station_info)
+        fingerprint = graph.fingerprint()
+        if current is not None and fingerprint == current.fingerprint:
+            version = current.version
+            matrix = current.travel_time_matrix
+        else:
+            version = (current.version if current is not None else 0) + 1
+            matrix = self._load_travel_time_matrix(fingerprint)
+        
+        self.network = NetworkSnapshot(
+            graph=graph,
+            station_info=station_info,
+            railway_info=railway_info,
+            transfer_stations=MappingProxyType({
+                title: frozenset(station_ids)
+                for title, station_ids in transfer_stations.items()
+            }),
+            search_index=search_index,
+            spatial_index=spatial_index,
+            version=version,
+            fingerprint=fingerprint,
+            travel_time_matrix=matrix
+        )
+    
+    def _write_graph_snapshot(self, path: str, source_hash: bytes, tables: NetworkTables) -> None:
+        """Save built tables as a graph snapshot, warning if the file cannot be written."""
+        graph, station_info, railway_info, _ = tables
+        try:
+            write_graph_snapshot(path, source_hash, graph, station_info, railway_info)
+        except OSError as e:
+            print(f"  ⚠ Could not write graph snapshot {path}: {e}")
+    
+    def _build_graph(
+        self,
+        station_rows: List[tuple],
+        railway_rows: List[tuple],
+        segment_times: Dict[Tuple[str, str, str], float]
+    ) -> NetworkTables:
+        """
+        Build the graph and station tables from the source rows.
+        
+        Args:
+            station_rows: Rows of STATION_QUERY
+            railway_rows: Railway rows from read_graph_sources
+            segment_times: Running times from get_segment_times
+        
+        Returns:
+            Tuple of (graph, station_info, railway_info, transfer_stations)
+        """
+        transfer_stations: Dict[str, set] = {}
+        builder = NetworkGraphBuilder()
+        
+        for station_id, title, *_ in station_rows:
+            builder.add_station(station_id)
+        
+            # Build transfer station mapping
+            if title not in transfer_stations:
+                transfer_stations[title] = set()
+            transfer_stations[title].add(station_id)
+        
+        railway_count = 0
+        timed_count = 0
+        for railway_id, _, _, station_order in railway_rows:
+            if station_order:  # Only process if not empty
+                timed_count += self._process_railway_order(
+                    builder, railway_id, station_order, segment_times
+                )
+                railway_count += 1
+        
+        print(f"  ✓ Processed {railway_count} railway lines")
+        if segment_times:
+            print(f"  ✓ Timed {timed_count} edges from timetables "
+                  f"(others use {config.DEFAULT_AVG_TIME_PER_STOP} min/stop)")
+        print(f"  ✓ Built graph with {builder.num_connected} stations")
+        print(f"  ✓ Found {len(transfer_stations)} station names")
+        
+        # Add transfer connections
+        self._add_transfer_connections(builder, transfer_stations)
+        
+        graph = builder.build()
+        station_info = StationTable.from_rows(graph, station_rows)
+        return graph, station_info, RailwayTable(railway_rows), transfer_stations
+    
+    def _update_graph(
+        self,
+        network: NetworkSnapshot,
+        station_rows: List[tuple],
+        railway_rows: List[tuple],
+        segment_times: Dict[Tuple[str, str, str], float]
+    ) -> Optional[Tuple[Tuple[int, int, int], Optional[NetworkTables]]]:
+        """
+        Apply changed station and railway rows to a published network as a delta.
+        
+        Rows are compared by hash with the ones the graph was built from.
+        Edges of changed railways are removed and re-added, and station
+        complex hubs are rebuilt only for the station names involved; all
+        other nodes keep their edges, and touched nodes list theirs in build
+        order, so the result equals a full build of the same rows. Adding or
+        removing stations, railway lines or station complexes renumbers
+        nodes or railways, so that is left to a full rebuild. The snapshot
+        itself is left untouched; changed tables are rebuilt from the rows.
+        
+        Args:
+            network: Snapshot the delta is applied to
+            station_rows: Rows of STATION_QUERY
+            railway_rows: Railway rows from read_graph_sources
+            segment_times: Running times from get_segment_times
+        
+        Returns:
+            Tuple of ((changed stations, changed railways, rebuilt station
+            complexes), new tables), with the tables None if nothing changed,
+            or None if a full rebuild is needed
+        """
+        old_stations, old_railways, old_segments = self._source_hashes
+        stations, railways, segments = _row_hashes(station_rows, railway_rows, segment_times)
+        if stations.keys() != old_stations.keys():
+            return None
+        
+        changed_stations = {sid for sid, h in stations.items() if old_stations[sid] != h}
+        changed_railways = {
+            railway
+            for railway in railways.keys() | old_railways.keys() | segments.keys() | old_segments.keys()
+            if railways.get(railway) != old_railways.get(railway)
+            or segments.get(railway) != old_segments.get(railway)
+        }
+        if not changed_stations and not changed_railways:
+            return (0, 0, 0), None
+        
+        # Stations, railways and hubs are numbered in row order, like
+        # _build_graph does; stations only some line refers to come after
+        # the station rows
+        graph = network.graph
+        num_rows = len(station_rows)
+        if [row[0] for row in station_rows] != list(graph.station_ids[:num_rows]):
+            return None
+        railway_ids = list(dict.fromkeys(
+            [TRANSFER_RAILWAY] + [railway_id for railway_id, _, _, order in railway_rows if order]
+        ))
+        if railway_ids != list(graph.railway_ids):
+            return None
+        transfer_stations: Dict[str, set] = {}
+        for station_id, title, *_ in station_rows:
+            transfer_stations.setdefault(title, set()).add(station_id)
+        hub_ids = [HUB_PREFIX + title for title, group in transfer_stations.items() if len(group) > 1]
+        if hub_ids != list(graph.station_ids[graph.num_stations:]):
+            return None
+        
+        railway_index = graph.railway_index
+        old_railway_nodes = self._railway_source_nodes(graph)
+        
+        # New edges of the changed railways, by source node
+        rail_edges: Dict[int, List[Tuple[int, float, int]]] = {}
+        railway_nodes: Dict[int, set] = {}
+        for railway_id, _, _, station_order in railway_rows:
+            if railway_id not in changed_railways or not station_order:
+                continue
+        
+            index = railway_index[railway_id]
+            nodes = railway_nodes[index] = set()
+            edges, _ = self._railway_edges(railway_id, station_order, segment_times)
+            for from_station, to_station, minutes in edges:
+                source = graph.index_of(from_station)
+                target = graph.index_of(to_station)
+                if source is None or target is None or max(source, target) >= num_rows:
+                    return None  # A station missing from the station rows
+                rail_edges.setdefault(source, []).append((target, minutes, index))
+                nodes.add(source)
+        
+        changed_indices = {railway_index[r] for r in changed_railways if r in railway_index}
+        touched = set(rail_edges)
+        for index in changed_indices:
+            touched |= old_railway_nodes.get(index, set())
+        if touched and max(touched) >= num_rows:
+            return None
+        
+        # A renamed station leaves one station complex and joins another
+        new_titles: Dict[str, str] = {}
+        affected_titles = set()
+        for station_id, title, *_ in station_rows:
+            if station_id not in changed_stations:
+                continue
+            affected_titles.update((network.station_info.title(station_id), title))
+            new_titles[station_id] = title
+        
+        # Platforms whose lines changed may gain or lose their way into the hub
+        for node in touched:
+            station_id = graph.station_ids[node]
+            if station_id in new_titles:
+                affected_titles.add(new_titles[station_id])
+            elif station_id in network.station_info:
+                affected_titles.add(network.station_info.title(station_id))
+        
+        hubs = {}
+        for title in affected_titles:
+            hub = graph.index_of(HUB_PREFIX + title)
+            if hub is not None:
+                hubs[title] = hub
+                touched.add(hub)
+                touched.update(target for target, _, _ in graph.edges(hub))
+            for station_id in transfer_stations.get(title, ()):
+                touched.add(graph.index_of(station_id))
+        
+        # Touched nodes keep their edges except changed railways and transfers;
+        # a stable sort by railway puts them back in the order lines are built
+        adjacency = {}
+        for node in touched:
+            kept = [
+                edge for edge in graph.edges(node)
+                if edge[2] != TRANSFER_INDEX and edge[2] not in changed_indices
+            ]
+            adjacency[node] = sorted(kept + rail_edges.get(node, []), key=itemgetter(2))
+        
+        half_transfer = config.DEFAULT_TRANSFER_TIME / 2
+        rebuilt = 0
+        for title in affected_titles:
+            group = transfer_stations.get(title, ())
+            if len(group) < 2:
+                continue
+            hub = hubs[title]
+            for station_id in sorted(group):
+                platform = graph.index_of(station_id)
+        
+                # Only platforms on a line can be left through the hub
+                if adjacency[platform]:
+                    adjacency[platform].append((hub, half_transfer, TRANSFER_INDEX))
+                adjacency[hub].append((platform, half_transfer, TRANSFER_INDEX))
+            rebuilt += 1
+        
+        new_graph = graph.replace_edges(adjacency)
+        
+        # Unchanged station details keep their columns; only the graph moves
+        if changed_stations:
+            station_info = StationTable.from_rows(new_graph, station_rows)
+        else:
+            station_info = network.station_info.rebind(new_graph)
+        railway_info = RailwayTable(railway_rows)
+        for index in changed_indices:
+            self._railway_nodes.pop(index, None)
+        self._railway_nodes.update(railway_nodes)
+        
+        changes = (len(changed_stations), len(changed_railways), rebuilt)
+        return changes, (new_graph, station_info, railway_info, transfer_stations)
+    
+    def _railway_source_nodes(self, graph: NetworkGraph) -> Dict[int, set]:
+        """Get the nodes each railway's edges leave from, indexing the graph once."""
+        if self._railway_nodes is None:
+            offsets = graph.offsets
+            railways = graph.railways
+            self._railway_nodes = {}
+            for node in range(graph.num_stations):
+                for e in range(offsets[node], offsets[node + 1]):
+                    self._railway_nodes.setdefault(railways[e], set()).add(node)
+        return self._railway_nodes
+    
+    def _load_travel_time_matrix(self, fingerprint: bytes) -> Optional[TravelTimeMatrix]:
+        """
+        Load the precomputed travel-time matrix if it matches a graph.
+        
+        The previous matrix is not closed here: readers holding an older
+        snapshot may still use it, and its map is released with the last
+        of them.
+        """
+        path = matrix_path_for(self.db_path)
+        matrix = TravelTimeMatrix.load(path, fingerprint)
+        if matrix is not None:
+            print(f"  ✓ Loaded travel-time matrix from {path}")
+        elif os.path.exists(path):
+            print(f"  ⚠ Ignoring stale travel-time matrix {path} (run build-matrix)")
+        return matrix
+    
+    def build_travel_time_matrix(self) -> str:
+        """
+        Precompute all-pairs travel times for the current graph and save them.
+        
+        Returns:
+            Path of the written matrix file
+        """
+        if not self.network_graph:
+            self.build_network()
+        
+        network = self.network
+        path = matrix_path_for(self.db_path)
+        size = write_travel_time_matrix(network.graph, path)
+        print(f"  ✓ Wrote {len(network.graph)}×{len(network.graph)} matrix "
+              f"({size / 1024 / 1024:.1f} MB) to {path}")
+        
+        self.network = replace(
+            network, travel_time_matrix=self._load_travel_time_matrix(network.fingerprint)
+        )
+        return path
+    
+    def _process_railway_order(
+        self,
+        builder: NetworkGraphBuilder,
+        railway: str,
+        station_order: Sequence[Optional[str]],
+        segment_times: Dict[Tuple[str, str, str], float]
+    ) -> int:
+        """
+        Process railway station order to build network connections.
+        
+        Args:
+            builder: Graph builder to add edges to
+            railway: Railway ID
+            station_order: Station IDs of the railway in line order (None
+                for an entry without a station, which breaks the line)
+            segment_times: Running times keyed by (railway, from, to); a
+                segment timed in one direction only uses that time both ways,
+                and untimed segments fall back to DEFAULT_AVG_TIME_PER_STOP
             
+        Returns:
+            Number of edges whose time came from segment_times
+        """
+        railway_index = builder.add_railway(railway)
+        edges, timed = self._railway_edges(railway, station_order, segment_times)
+        for from_station, to_station, minutes in edges:
+            builder.add_edge(
+                builder.add_station(from_station), builder.add_station(to_station),
+                minutes, railway_index
+            )
+        return timed
+    
+    def _railway_edges(
+        self,
+        railway: str,
+        station_order: Sequence[Optional[str]],
+        segment_times: Dict[Tuple[str, str, str], float]
+    ) -> Tuple[List[Tuple[str, str, float]], int]:
+        """
+        Turn a railway's station order into directed edges between station IDs.
+        
+        Returns:
+            Tuple of ((from_station, to_station, minutes) edges in build
+            order, number of edges whose time came from segment_times)
+        """
+        edges = []
+        timed = 0
+        
+        for current_station, next_station in zip(station_order, station_order[1:]):
             if not current_station or not next_station:
                 continue
             
-            # Use configured travel time
-            travel_time = config.DEFAULT_AVG_TIME_PER_STOP
+            forward_time = segment_times.get((railway, current_station, next_station))
+            backward_time = segment_times.get((railway, next_station, current_station))
+            timed += (forward_time is not None) + (backward_time is not None)
+            
+            # Fall back to the other direction, then to the configured time
+            if forward_time is None:
+                forward_time = backward_time or config.DEFAULT_AVG_TIME_PER_STOP
+            if backward_time is None:
+                backward_time = forward_time
             
             # Add bidirectional connections
-            if current_station not in self.network_graph:
-                self.network_graph[current_station] = []
-            
-            self.network_graph[current_station].append({
-                "to_station": next_station,
-                "travel_time": travel_time,
-                "railway": railway,
-                "num_stops": 1
-            })
-            
-            if next_station not in self.network_graph:
-                self.network_graph[next_station] = []
-            
-            self.network_graph[next_station].append({
-                "to_station": current_station,
-                "travel_time": travel_time,
-                "railway": railway,
-                "num_stops": 1
-            })
-    
-    def _add_transfer_connections(self) -> None:
-        """Add transfer connections between stations with the same name."""
+            edges.append((current_station, next_station, forward_time))
+            edges.append((next_station, current_station, backward_time))
+        
+        return edges, timed
+    
+    def _add_transfer_connections(
+        self,
+        builder: NetworkGraphBuilder,
+        transfer_stations: Dict[str, AbstractSet[str]]
+    ) -> None:
+        """
+        Connect stations with the same name through a station complex hub.
+        
+        Each platform links to its hub and back at half the transfer time, so
+        any platform-to-platform transfer still costs DEFAULT_TRANSFER_TIME
+        while a complex of k platforms needs O(k) edges instead of O(k²).
+        
+        Args:
+            builder: Builder holding the railway edges
+            transfer_stations: Station name -> IDs of the stations sharing it
+        """
+        half_transfer = config.DEFAULT_TRANSFER_TIME / 2
+        hub_count = 0
         transfer_count = 0
-        for station_name, station_ids in self.transfer_stations.items():
+        for station_name, station_ids in transfer_stations.items():
             if len(station_ids) > 1:
-                # Create connections between all stations with same name
-                station_list = list(station_ids)
-                for i in range(len(station_list)):
-                    for j in range(i + 1, len(station_list)):
-                        station_a = station_list[i]
-                        station_b = station_list[j]
-                        
-                        # Add bidirectional transfer
-                        if station_a in self.network_graph:
-                            self.network_graph[station_a].append({
-                                "to_station": station_b,
-                                "travel_time": config.DEFAULT_TRANSFER_TIME,
-                                "railway": "Transfer",
-                                "num_stops": 0
-                            })
-                        
-                        if station_b in self.network_graph:
-                            self.network_graph[station_b].append({
-                                "to_station": station_a,
-                                "travel_time": config.DEFAULT_TRANSFER_TIME,
-                                "railway": "Transfer",
-                                "num_stops": 0
-                            })
-                        
-                        transfer_count += 1
-        
-        print(f"  ✓ Added {transfer_count} transfer connections")
+                hub = builder.add_hub(station_name)
+                # Sets iterate in hash order, which changes between runs; sort
+                # so the graph (and its fingerprint) is the same every build
+                for station_id in sorted(station_ids):
+                    platform = builder.add_station(station_id)
+                    
+                    # Only platforms on a line can be left through the hub
+                    if builder.has_edges(platform):
+                        builder.add_edge(platform, hub, half_transfer, TRANSFER_INDEX)
+                    builder.add_edge(hub, platform, half_transfer, TRANSFER_INDEX)
+                    transfer_count += 1
+                hub_count += 1
+        
+        print(f"  ✓ Added {hub_count} station complexes ({transfer_count} transfer links)")
     
     def _dijkstra_with_path(
         self,
         start_station: str,
-        max_time: float = config.DEFAULT_MAX_COMMUTE_TIME
-    ) -> Dict[str, Tuple[float, Route]]:
+        max_time: float = config.DEFAULT_MAX_COMMUTE_TIME,
+        optimize: str = config.DEFAULT_OPTIMIZE
+    ) -> Union[ShortestPathTree, ParetoTree]:
         """
-        Run Dijkstra's algorithm and track the actual routes.
+        Run Dijkstra's algorithm tracking predecessors for later route building.
         
         Args:
             start_station: Starting station ID
             max_time: Maximum travel time to consider (in minutes)
+            optimize: "time" for the fastest route to each station, or
+                "pareto" for every non-dominated (time, transfers) route
             
         Returns:
-            Dictionary mapping station_id to (travel_time, Route)
+            ShortestPathTree over node indices (use _build_route to get a
+            Route), or a ParetoTree in "pareto" mode
+            
+        Raises:
+            ValueError: If the station is not part of the network graph
         """
-        distances = {start_station: (0, Route([], 0, 0))}
-        pq = [(0, start_station, [])]  # (time, station, path_segments)
-        visited = set()
+        start = self.network_graph.index_of(start_station)
+        if start is None:
+            raise ValueError(f"Unknown station: {start_station}")
         
-        while pq:
-            current_time, current_station, path_segments = heappop(pq)
+        if optimize == "pareto":
+            return pareto_search(
+                self.network_graph, start, max_time, config.PARETO_MAX_TRANSFERS
+            )
+        return dijkstra(self.network_graph, start, max_time)
+    
+    def _shortest_path_tree(self, node: int) -> ShortestPathTree:
+        """
+        Get the unbounded shortest-path tree of an origin, using the cache.
+        
+        Args:
+            node: Origin node index
             
-            if current_station in visited:
-                continue
+        Returns:
+            ShortestPathTree covering every reachable node
+        """
+        tree = self.path_cache.get(node, self.graph_version)
+        if tree is None:
+            tree = dijkstra(self.network_graph, node, INFINITY)
+            self.path_cache.put(tree, self.graph_version)
+        return tree
+    
+    def _cached_trees(
+        self,
+        node_a: int,
+        node_b: int
+    ) -> Optional[Tuple[ShortestPathTree, ShortestPathTree]]:
+        """
+        Get unbounded trees of both origins if the cache can serve them.
+        
+        A full tree costs more than one bounded lockstep search, so it is
+        only computed (and cached) for an origin that keeps missing; a
+        one-off workplace is left to meeting_point_search.
+        
+        Returns:
+            Tuple of (tree_a, tree_b), or None if either origin is not cached
+        """
+        if not self.path_cache.enabled:
+            return None
+        
+        trees = []
+        for node in (node_a, node_b):
+            tree = self.path_cache.get(node, self.graph_version)
+            if tree is None and self.path_cache.missed_repeatedly(node, self.graph_version):
+                tree = dijkstra(self.network_graph, node, INFINITY)
+                self.path_cache.put(tree, self.graph_version)
+            trees.append(tree)
+        
+        if None in trees:
+            return None
+        return trees[0], trees[1]
+    
+    def _pareto_tree(self, node: int, max_time: float) -> ParetoTree:
+        """
+        Get the (time, transfers) labels of an origin, using the cache.
+        
+        Cached trees are unbounded so they serve every max_time and transfer
+        penalty; without a cache the search is bounded by max_time.
+        
+        Args:
+            node: Origin node index
+            max_time: Maximum travel time needed by the caller (in minutes)
+        """
+        if not self.pareto_cache.enabled:
+            return pareto_search(
+                self.network_graph, node, max_time, config.PARETO_MAX_TRANSFERS
+            )
+        
+        tree = self.pareto_cache.get(node, self.graph_version)
+        if tree is None:
+            tree = pareto_search(
+                self.network_graph, node, INFINITY, config.PARETO_MAX_TRANSFERS
+            )
+            self.pareto_cache.put(tree, self.graph_version)
+        return tree
+    
+    def isochrone(self, station_id: str, bands: List[float]) -> List[List[str]]:
+        """
+        Bucket the stations reachable from one station by travel-time band.
+        
+        Uses the travel-time matrix or the route tree cache when available,
+        otherwise one search bounded by the widest band. No routes are built.
+        
+        Args:
+            station_id: Origin station ID
+            bands: Ascending band limits in minutes (e.g. [30, 45, 60])
+            
+        Returns:
+            One list of station IDs per band; band i holds the stations with
+            bands[i-1] < travel time <= bands[i] (the first band starts at 0)
             
-            visited.add(current_station)
+        Raises:
+            ValueError: If the station is unknown or the bands are invalid
+        """
+        check_isochrone_bands(bands)
+        
+        if not self.network_graph:
+            self.build_network()
+        
+        graph = self.network_graph
+        node = graph.index_of(station_id)
+        if node is None:
+            raise ValueError(f"Unknown station: {station_id}")
+        
+        num_stations = graph.num_stations
+        if self.travel_time_matrix is not None:
+            times = self.travel_time_matrix.row(node).half_minutes[:num_stations]
+            limits = [b * 2 for b in bands]
+            # Unreachable stations are stored as UNREACHABLE, not infinity
+            widest = min(limits[-1], UNREACHABLE - 1)
+        else:
+            if self.path_cache.enabled:
+                tree = self._shortest_path_tree(node)
+            else:
+                tree = dijkstra(graph, node, bands[-1])
+            times = tree.dist[:num_stations]
+            limits = bands
+            widest = limits[-1]
+        
+        buckets: List[List[str]] = [[] for _ in bands]
+        station_ids = graph.station_ids
+        for i, t in enumerate(times):
+            if t <= widest:
+                buckets[bisect_left(limits, t)].append(station_ids[i])
+        return buckets
+    
+    def _build_route(self, tree: ShortestPathTree, node: int) -> Route:
+        """
+        Reconstruct the Route from a tree's origin to a settled node.
+        
+        Args:
+            tree: Any search result exposing ``origin`` and ``pred_edge``
+            node: Node index of the destination
+        """
+        edges = trace_path(self.network_graph, tree.origin, tree.pred_edge, node)
+        return self._route_from_edges(tree.origin, edges)
+    
+    def _route_from_edges(self, origin: int, edges: List[int]) -> Route:
+        """
+        Turn a path of graph edges into a Route.
+        
+        A platform → hub → platform pair is reported as a single transfer
+        segment between the two platforms.
+        
+        Args:
+            origin: Node index the path starts from
+            edges: Edge indices in travel order
+        """
+        graph = self.network_graph
+        route = Route(graph.station_ids, graph.railway_ids)
+        
+        current = origin
+        transfer_from = None
+        transfer_time = 0.0
+        for e in edges:
+            railway_index = graph.railways[e]
+            next_node = graph.targets[e]
+            travel_time = graph.weights[e]
             
-            if current_time > max_time:
+            if graph.is_hub(next_node):
+                transfer_from = current
+                transfer_time = travel_time
+                current = next_node
                 continue
             
-            if current_station not in self.network_graph:
+            if transfer_from is not None:
+                route.append(
+                    transfer_from, next_node, TRANSFER_INDEX, transfer_time + travel_time, 0
+                )
+                transfer_from = None
+                current = next_node
                 continue
             
-            for connection in self.network_graph[current_station]:
-                next_station = connection["to_station"]
-                travel_time = connection["travel_time"]
-                railway = connection["railway"]
-                num_stops = connection["num_stops"]
-                
-                new_time = current_time + travel_time
-                
-                if new_time <= max_time:
-                    segment = RouteSegment(
-                        from_station=current_station,
-                        to_station=next_station,
-                        railway=railway,
-                        travel_time=travel_time,
-                        num_stops=num_stops
-                    )
-                    
-                    new_path = path_segments + [segment]
-                    new_route = Route(
-                        segments=new_path,
-                        total_time=new_time,
-                        total_stops=sum(seg.num_stops for seg in new_path)
-                    )
-                    
-                    if next_station not in distances or new_time < distances[next_station][0]:
-                        distances[next_station] = (new_time, new_route)
-                        heappush(pq, (new_time, next_station, new_path))
+            num_stops = 0 if railway_index == TRANSFER_INDEX else 1
+            route.append(current, next_node, railway_index, travel_time, num_stops)
+            current = next_node
         
-        return distances
+        return route
     
     def find_optimal_stations(
         self,
         work_station_a: str,
         work_station_b: str,
         top_n: int = config.DEFAULT_TOP_N_RESULTS,
-        max_time: float = config.DEFAULT_MAX_COMMUTE_TIME
+        max_time: float = config.DEFAULT_MAX_COMMUTE_TIME,
+        departure_window: Optional[Tuple[str, str]] = None,
+        window_score: str = config.DEFAULT_WINDOW_SCORE,
+        calendar: str = config.DEFAULT_TIMETABLE_CALENDAR,
+        optimize: str = config.DEFAULT_OPTIMIZE,
+        transfer_penalty: float = config.DEFAULT_TRANSFER_PENALTY
     ) -> List[MeetingPoint]:
         """
         Find optimal living stations for two people working at different locations.
@@ -270,59 +969,585 @@ class CommuteOptimizer:
             work_station_b: Station ID for person B's workplace
             top_n: Number of top results to return
             max_time: Maximum commute time to consider (minutes)
+            departure_window: Optional ("HH:MM", "HH:MM") range of times to
+                leave home; stations are then scored on real timetables
+                across every departure minute in the window
+            window_score: "average" or "worst" commute over the window
+            calendar: ODPT calendar the trips must run on (window only)
+            optimize: "time" ranks by fastest routes; "pareto" picks, per
+                person and station, the route minimizing time plus
+                transfer_penalty per transfer
+            transfer_penalty: Extra minutes each transfer counts as ("pareto")
             
         Returns:
             List of MeetingPoint candidates, sorted by total time and balance
+            
+        Raises:
+            ValueError: If the window or optimize mode is invalid, or no
+                timetable data exists
         """
+        if optimize not in config.OPTIMIZE_MODES:
+            raise ValueError(
+                f"optimize must be one of {', '.join(config.OPTIMIZE_MODES)}"
+            )
+        if optimize == "pareto" and departure_window is not None:
+            raise ValueError("optimize='pareto' cannot be combined with a departure window")
+        
         if not self.network_graph:
             self.build_network()
         
-        work_a_name = self.station_info.get(work_station_a, {}).get('title', work_station_a)
-        work_b_name = self.station_info.get(work_station_b, {}).get('title', work_station_b)
+        if departure_window is not None:
+            return self._find_optimal_stations_over_window(
+                work_station_a, work_station_b, top_n, max_time,
+                departure_window, window_score, calendar
+            )
+        
+        work_a_name = self.station_info.title(work_station_a, work_station_a)
+        work_b_name = self.station_info.title(work_station_b, work_station_b)
         
-        print(f"\nCalculating routes from {work_a_name}...")
-        routes_from_a = self._dijkstra_with_path(work_station_a, max_time)
-        print(f"  ✓ Found {len(routes_from_a)} reachable stations")
+        node_a = self.network_graph.index_of(work_station_a)
+        node_b = self.network_graph.index_of(work_station_b)
+        if node_a is None or node_b is None:
+            return []
         
-        print(f"Calculating routes from {work_b_name}...")
-        routes_from_b = self._dijkstra_with_path(work_station_b, max_time)
-        print(f"  ✓ Found {len(routes_from_b)} reachable stations")
+        if optimize == "pareto":
+            return self._find_optimal_stations_pareto(
+                node_a, node_b, work_a_name, work_b_name, top_n, max_time, transfer_penalty
+            )
         
-        # Find common stations
-        common_stations = set(routes_from_a.keys()) & set(routes_from_b.keys())
-        common_stations.discard(work_station_a)
-        common_stations.discard(work_station_b)
+        cached = None
+        if self.travel_time_matrix is None:
+            cached = self._cached_trees(node_a, node_b)
         
-        print(f"  ✓ Found {len(common_stations)} common reachable stations\n")
+        if self.travel_time_matrix is not None:
+            print(f"\nLooking up travel times from {work_a_name} and {work_b_name}...")
+            ranked = self.travel_time_matrix.top_meeting_points(
+                node_a, node_b, max_time, top_n,
+                num_candidates=self.network_graph.num_stations,
+                exclude=(node_a, node_b)
+            )
+            tree_a = self.travel_time_matrix.row(node_a)
+            tree_b = self.travel_time_matrix.row(node_b)
+        elif cached is not None:
+            print(f"\nLoading route trees from {work_a_name} and {work_b_name}...")
+            tree_a, tree_b = cached
+            num_stations = self.network_graph.num_stations
+            ranked = rank_meeting_points(
+                tree_a.dist[:num_stations], tree_b.dist[:num_stations],
+                max_time, top_n, exclude=(node_a, node_b)
+            )
+        else:
+            print(f"\nSearching outward from {work_a_name} and {work_b_name}...")
+            tree_a, tree_b, ranked = meeting_point_search(
+                self.network_graph, node_a, node_b, max_time, top_n,
+                exclude=(node_a, node_b)
+            )
+            print(f"  ✓ Settled {len(tree_a)} + {len(tree_b)} stations")
+        print(f"  ✓ Found {len(ranked)} candidate stations\n")
         
-        # Create meeting point candidates
+        return self._meeting_points(tree_a, tree_b, ranked, max_time)
+    
+    def _find_optimal_stations_pareto(
+        self,
+        node_a: int,
+        node_b: int,
+        work_a_name: str,
+        work_b_name: str,
+        top_n: int,
+        max_time: float,
+        transfer_penalty: float
+    ) -> List[MeetingPoint]:
+        """
+        Rank stations on time plus a transfer penalty from (time, transfers) labels.
+        
+        The label trees hold every non-dominated route, so any penalty is
+        applied to cached trees without searching again. Candidates are
+        ranked by penalized total; reported times are the real travel times
+        of the chosen routes.
+        """
+        print(f"\nLoading (time, transfers) routes from {work_a_name} and {work_b_name}...")
+        tree_a = self._pareto_tree(node_a, max_time)
+        tree_b = self._pareto_tree(node_b, max_time)
+        num_stations = self.network_graph.num_stations
+        costs_a, chosen_a = tree_a.penalized_times(transfer_penalty, max_time, num_stations)
+        costs_b, chosen_b = tree_b.penalized_times(transfer_penalty, max_time, num_stations)
+        
+        # Penalized costs of reachable stations never exceed this
+        limit = max_time + transfer_penalty * config.PARETO_MAX_TRANSFERS
+        ranked = rank_meeting_points(
+            costs_a, costs_b, limit, top_n, exclude=(node_a, node_b)
+        )
+        print(f"  ✓ Found {len(ranked)} candidate stations\n")
+        
+        graph = self.network_graph
         candidates = []
-        for station in common_stations:
-            time_a, route_a = routes_from_a[station]
-            time_b, route_b = routes_from_b[station]
+        for _, _, node in ranked:
+            station = graph.station_ids[node]
+            route_a = self._route_from_edges(
+                node_a, tree_a.path_edges(graph, node, chosen_a[node])
+            )
+            route_b = self._route_from_edges(
+                node_b, tree_b.path_edges(graph, node, chosen_b[node])
+            )
+            time_diff = abs(route_a.total_time - route_b.total_time)
             
-            total_time = time_a + time_b
-            time_diff = abs(time_a - time_b)
+            candidates.append(MeetingPoint(
+                station_id=station,
+                station_name=self.station_info.title(station, "Unknown"),
+                route_from_a=route_a,
+                route_from_b=route_b,
+                total_time=route_a.total_time + route_b.total_time,
+                time_difference=time_diff,
+                balance_score=1 - (time_diff / max_time)
+            ))
+        
+        return candidates
+    
+    def _meeting_points(
+        self,
+        tree_a,
+        tree_b,
+        ranked: List[Tuple[float, float, int]],
+        max_time: float
+    ) -> List[MeetingPoint]:
+        """
+        Turn ranked (total_time, time_difference, node) tuples into MeetingPoints.
+        
+        Args:
+            tree_a: Search result from person A's workplace (tree or matrix row)
+            tree_b: Search result from person B's workplace (tree or matrix row)
+            ranked: Ranked meeting nodes
+            max_time: Maximum commute time used for the balance score
+        """
+        # Build routes only for the stations that make the final list
+        candidates = []
+        for total_time, time_diff, node in ranked:
+            station = self.network_graph.station_ids[node]
             
             # Balance score: 1.0 = perfect balance, 0.0 = maximum imbalance
             balance_score = 1 - (time_diff / max_time)
             
-            station_name = self.station_info.get(station, {}).get("title", "Unknown")
+            station_name = self.station_info.title(station, "Unknown")
             
             candidates.append(MeetingPoint(
                 station_id=station,
                 station_name=station_name,
-                route_from_a=route_a,
-                route_from_b=route_b,
+                route_from_a=self._build_route(tree_a, node),
+                route_from_b=self._build_route(tree_b, node),
                 total_time=total_time,
                 time_difference=time_diff,
                 balance_score=balance_score
             ))
         
-        # Sort by: 1) minimum total time, 2) best balance
-        candidates.sort(key=lambda x: (x.total_time, x.time_difference))
+        return candidates
+    
+    def find_optimal_stations_batch(
+        self,
+        pairs: List[Tuple[str, str]],
+        top_n: int = config.DEFAULT_TOP_N_RESULTS,
+        max_time: float = config.DEFAULT_MAX_COMMUTE_TIME,
+        max_workers: Optional[int] = config.BATCH_MAX_WORKERS,
+        pool: Optional[ShortestPathPool] = None
+    ) -> List[List[MeetingPoint]]:
+        """
+        Find optimal living stations for many workplace pairs at once.
+        
+        Workplaces shared between pairs are searched only once: every
+        distinct workplace gets one unbounded shortest-path tree (from the
+        travel-time matrix or route cache when available, otherwise computed
+        in a process pool), and all pairs are scored from those trees.
+        
+        Args:
+            pairs: (work_station_a, work_station_b) station ID pairs
+            top_n: Number of top results to return per pair
+            max_time: Maximum commute time to consider (minutes)
+            max_workers: Worker processes for the searches (None uses the CPU count)
+            pool: Long-lived worker pool to search on (servers keep one
+                rather than starting processes per call)
+            
+        Returns:
+            One candidate list per pair, in input order (empty for pairs
+            with an unknown station)
+        """
+        if not self.network_graph:
+            self.build_network()
+        
+        graph = self.network_graph
+        node_pairs = [(graph.index_of(a), graph.index_of(b)) for a, b in pairs]
+        origins = {node for pair in node_pairs if None not in pair for node in pair}
+        print(f"\nAnalyzing {len(pairs)} workplace pairs ({len(origins)} distinct workplaces)...")
+        
+        trees = {}
+        if self.travel_time_matrix is not None:
+            trees = {node: self.travel_time_matrix.row(node) for node in origins}
+        else:
+            missing = []
+            for node in origins:
+                tree = self.path_cache.get(node, self.graph_version)
+                if tree is None:
+                    missing.append(node)
+                else:
+                    trees[node] = tree
+            
+            computed = shortest_path_trees(
+                graph, missing, max_workers, config.BATCH_POOL_MIN_ORIGINS, pool
+            )
+            for tree in computed.values():
+                self.path_cache.put(tree, self.graph_version)
+            trees.update(computed)
+            print(f"  ✓ Computed {len(computed)} route trees "
+                  f"({len(origins) - len(computed)} reused)")
+        
+        num_stations = graph.num_stations
+        results = []
+        for node_a, node_b in node_pairs:
+            if node_a is None or node_b is None:
+                results.append([])
+                continue
+            
+            if self.travel_time_matrix is not None:
+                ranked = self.travel_time_matrix.top_meeting_points(
+                    node_a, node_b, max_time, top_n,
+                    num_candidates=num_stations, exclude=(node_a, node_b)
+                )
+            else:
+                ranked = rank_meeting_points(
+                    trees[node_a].dist[:num_stations], trees[node_b].dist[:num_stations],
+                    max_time, top_n, exclude=(node_a, node_b)
+                )
+            results.append(self._meeting_points(trees[node_a], trees[node_b], ranked, max_time))
+        
+        print(f"  ✓ Scored {len(pairs)} pairs\n")
+        return results
+    
+    def find_optimal_stations_for_group(
+        self,
+        work_stations: List[str],
+        weights: Optional[List[float]] = None,
+        top_n: int = config.DEFAULT_TOP_N_RESULTS,
+        max_time: float = config.DEFAULT_MAX_COMMUTE_TIME,
+        objective: str = config.DEFAULT_GROUP_OBJECTIVE
+    ) -> List[GroupMeetingPoint]:
+        """
+        Find optimal living stations for any number of commuters.
+        
+        Every workplace contributes one per-station travel time vector (a
+        matrix row or a cached tree); the weighted sum, longest commute and
+        spread are combined across the vectors with array operations.
+        
+        Args:
+            work_stations: Station IDs of every commuter's workplace
+            weights: Optional positive weight per workplace (default all 1)
+            top_n: Number of top results to return
+            max_time: Maximum commute time per person (minutes)
+            objective: "sum" ranks by weighted total time, "max" by the
+                longest single commute; ties go to the smaller spread
+            
+        Returns:
+            List of GroupMeetingPoint candidates in ranking order
+            
+        Raises:
+            ValueError: If the weights or objective are invalid
+        """
+        if weights is None:
+            weights = [1.0] * len(work_stations)
+        if len(weights) != len(work_stations):
+            raise ValueError("Need exactly one weight per work station")
+        if any(weight <= 0 for weight in weights):
+            raise ValueError("Weights must be positive")
+        if objective not in config.GROUP_OBJECTIVES:
+            raise ValueError(f"objective must be one of {', '.join(config.GROUP_OBJECTIVES)}")
+        
+        if not self.network_graph:
+            self.build_network()
+        
+        graph = self.network_graph
+        nodes = [graph.index_of(station) for station in work_stations]
+        if not nodes or None in nodes:
+            return []
+        
+        print(f"\nRanking stations for {len(nodes)} workplaces ({objective} objective)...")
+        if self.travel_time_matrix is not None:
+            trees = [self.travel_time_matrix.row(node) for node in nodes]
+            ranked = self.travel_time_matrix.top_group_meeting_points(
+                nodes, weights, max_time, top_n, objective,
+                num_candidates=graph.num_stations, exclude=nodes
+            )
+        else:
+            trees = [self._shortest_path_tree(node) for node in nodes]
+            num_stations = graph.num_stations
+            ranked = rank_group_meeting_points(
+                [tree.dist[:num_stations] for tree in trees], weights,
+                max_time, top_n, objective, exclude=nodes
+            )
+        print(f"  ✓ Found {len(ranked)} candidate stations\n")
+        
+        candidates = []
+        for total_time, longest_time, spread, node in ranked:
+            station = graph.station_ids[node]
+            routes = [self._build_route(tree, node) for tree in trees]
+            candidates.append(GroupMeetingPoint(
+                station_id=station,
+                station_name=self.station_info.title(station, "Unknown"),
+                routes=routes,
+                commute_times=[route.total_time for route in routes],
+                total_time=total_time,
+                longest_time=longest_time,
+                spread=spread,
+                balance_score=1 - (spread / max_time)
+            ))
+        
+        return candidates
+    
+    def get_raptor_router(
+        self,
+        calendar: str = config.DEFAULT_TIMETABLE_CALENDAR
+    ) -> RaptorRouter:
+        """
+        Get the RAPTOR router for a calendar, loading it on first use.
+        
+        Args:
+            calendar: ODPT calendar ID (e.g. odpt.Calendar:Weekday)
+            
+        Returns:
+            RaptorRouter over the trips running on that calendar
+        """
+        if not self.network_graph:
+            self.build_network()
+        
+        network = self.network
+        router = network.raptor_routers.get(calendar)
+        if router is not None:
+            return router
         
-        return candidates[:top_n]
+        with network.router_lock:
+            router = network.raptor_routers.get(calendar)
+            if router is None:
+                with TrainDatabaseManager(self.db_path) as db:
+                    router = RaptorRouter.load(
+                        db, network.graph, calendar, config.RAPTOR_MAX_TRIPS
+                    )
+                print(f"  ✓ Loaded {len(router)} timetable routes "
+                      f"({router.num_trips} trips, {calendar})")
+                network.raptor_routers[calendar] = router
+        return router
+    
+    def _find_optimal_stations_over_window(
+        self,
+        work_station_a: str,
+        work_station_b: str,
+        top_n: int,
+        max_time: float,
+        departure_window: Tuple[str, str],
+        window_score: str,
+        calendar: str
+    ) -> List[MeetingPoint]:
+        """
+        Rank living stations by their commute across a departure window.
+        
+        One range RAPTOR query per workplace yields Pareto profiles for every
+        station; each station is then scored on the average or worst
+        door-to-door time over all departure minutes in the window. The
+        routes shown are the journeys for leaving at the start of the window.
+        """
+        if window_score not in config.WINDOW_SCORES:
+            raise ValueError(f"window_score must be one of {', '.join(config.WINDOW_SCORES)}")
+        earliest = parse_time(departure_window[0])
+        latest = parse_time(departure_window[1])
+        if latest < earliest:
+            raise ValueError("Departure window must not end before it starts")
+        
+        router = self.get_raptor_router(calendar)
+        if not len(router):
+            raise ValueError(f"No timetable data for {calendar}; run fetch --timetables")
+        
+        graph = self.network_graph
+        node_a = graph.index_of(work_station_a)
+        node_b = graph.index_of(work_station_b)
+        if node_a is None or node_b is None:
+            return []
+        
+        print(f"\nProfiling departures between {departure_window[0]} "
+              f"and {departure_window[1]}...")
+        profiles_a = router.departure_profiles(node_a, earliest, latest, max_time)
+        profiles_b = router.departure_profiles(node_b, earliest, latest, max_time)
+        
+        score = 0 if window_score == "average" else 1
+        ranked = rank_meeting_points(
+            profiles_a.window_scores(graph.num_stations)[score],
+            profiles_b.window_scores(graph.num_stations)[score],
+            max_time, top_n, exclude=(node_a, node_b)
+        )
+        print(f"  ✓ Found {len(ranked)} candidate stations ({window_score} over window)\n")
+        
+        candidates = []
+        for total_time, time_diff, node in ranked:
+            station = graph.station_ids[node]
+            station_name = self.station_info.title(station, "Unknown")
+            candidates.append(MeetingPoint(
+                station_id=station,
+                station_name=station_name,
+                route_from_a=self._build_window_route(router, profiles_a, node),
+                route_from_b=self._build_window_route(router, profiles_b, node),
+                total_time=total_time,
+                time_difference=time_diff,
+                balance_score=1 - (time_diff / max_time)
+            ))
+        
+        return candidates
+    
+    def _build_window_route(
+        self,
+        router: RaptorRouter,
+        profiles: DepartureProfiles,
+        node: int
+    ) -> Route:
+        """Build the Route for leaving a home station at the start of the window."""
+        entry, hops = router.journey(profiles, node, profiles.earliest)
+        total_time = float(entry[1] - entry[0]) if entry is not None else INFINITY
+        return self._build_timetable_route(hops, total_time)
+    
+    def get_timetable_router(
+        self,
+        calendar: str = config.DEFAULT_TIMETABLE_CALENDAR
+    ) -> TimetableRouter:
+        """
+        Get the connection scan router for a calendar, loading it on first use.
+        
+        Args:
+            calendar: ODPT calendar ID (e.g. odpt.Calendar:Weekday)
+            
+        Returns:
+            TimetableRouter over the trips running on that calendar
+        """
+        if not self.network_graph:
+            self.build_network()
+        
+        network = self.network
+        router = network.timetable_routers.get(calendar)
+        if router is not None:
+            return router
+        
+        with network.router_lock:
+            router = network.timetable_routers.get(calendar)
+            if router is None:
+                with TrainDatabaseManager(self.db_path) as db:
+                    router = TimetableRouter.load(db, network.graph, calendar)
+                print(f"  ✓ Loaded {len(router)} timetable connections "
+                      f"({len(router.trip_ids)} trips, {calendar})")
+                network.timetable_routers[calendar] = router
+        return router
+    
+    def find_optimal_stations_by_timetable(
+        self,
+        work_station_a: str,
+        work_station_b: str,
+        depart_at: str,
+        arrive_by: str,
+        top_n: int = config.DEFAULT_TOP_N_RESULTS,
+        calendar: str = config.DEFAULT_TIMETABLE_CALENDAR
+    ) -> List[MeetingPoint]:
+        """
+        Find optimal living stations using real train timetables.
+        
+        Both people leave home no earlier than depart_at and must reach work
+        by arrive_by. One backwards connection scan per workplace gives every
+        home station's latest feasible departure; its commute time is the
+        door-to-door duration of that journey, waiting time included.
+        
+        Args:
+            work_station_a: Station ID for person A's workplace
+            work_station_b: Station ID for person B's workplace
+            depart_at: Earliest departure from home ("HH:MM")
+            arrive_by: Latest arrival at work ("HH:MM")
+            top_n: Number of top results to return
+            calendar: ODPT calendar the trips must run on
+            
+        Returns:
+            List of MeetingPoint candidates, sorted by total time and balance
+            
+        Raises:
+            ValueError: If the times are invalid or no timetable data exists
+        """
+        earliest = parse_time(depart_at)
+        deadline = parse_time(arrive_by)
+        if deadline <= earliest:
+            raise ValueError("arrive_by must be later than depart_at")
+        
+        router = self.get_timetable_router(calendar)
+        if not len(router):
+            raise ValueError(f"No timetable data for {calendar}; run fetch --timetables")
+        
+        graph = self.network_graph
+        node_a = graph.index_of(work_station_a)
+        node_b = graph.index_of(work_station_b)
+        if node_a is None or node_b is None:
+            return []
+        
+        print(f"\nScanning timetables for arrivals by {arrive_by} "
+              f"(leaving after {depart_at})...")
+        profile_a = router.latest_departures(node_a, deadline, earliest)
+        profile_b = router.latest_departures(node_b, deadline, earliest)
+        
+        num_stations = graph.num_stations
+        window = deadline - earliest
+        ranked = rank_meeting_points(
+            profile_a.durations(num_stations),
+            profile_b.durations(num_stations),
+            window, top_n, exclude=(node_a, node_b)
+        )
+        print(f"  ✓ Found {len(ranked)} candidate stations\n")
+        
+        candidates = []
+        for total_time, time_diff, node in ranked:
+            station = graph.station_ids[node]
+            station_name = self.station_info.title(station, "Unknown")
+            candidates.append(MeetingPoint(
+                station_id=station,
+                station_name=station_name,
+                route_from_a=self._build_timetable_route(
+                    router.journey(profile_a, node), profile_a.duration(node)
+                ),
+                route_from_b=self._build_timetable_route(
+                    router.journey(profile_b, node), profile_b.duration(node)
+                ),
+                total_time=total_time,
+                time_difference=time_diff,
+                balance_score=1 - (time_diff / window)
+            ))
+        
+        return candidates
+    
+    def _build_timetable_route(
+        self,
+        hops: List[Tuple[int, int, str, float, int]],
+        total_time: float
+    ) -> Route:
+        """
+        Build the Route of a timetable journey from a home station to work.
+        
+        Args:
+            hops: (from_stop, to_stop, railway, minutes, num_stops) in travel order
+            total_time: Door-to-door duration of the journey, waiting included
+        """
+        graph = self.network_graph
+        railway_ids = graph.railway_ids
+        railway_index = graph.railway_index
+        
+        # Trips may run on a railway without a station order, which the
+        # graph does not know; such a route gets its own railway table
+        unknown = [r for _, _, r, _, _ in hops if r not in railway_index]
+        if unknown:
+            railway_ids = list(railway_ids) + list(dict.fromkeys(unknown))
+            railway_index = {railway: i for i, railway in enumerate(railway_ids)}
+        
+        route = Route(graph.station_ids, railway_ids)
+        for from_stop, to_stop, railway, minutes, num_stops in hops:
+            route.append(from_stop, to_stop, railway_index[railway], minutes, num_stops)
+        
+        # The journey's duration includes waiting for trains
+        route.total_time = total_time
+        return route
     
     def display_results(
         self,
@@ -335,8 +1560,8 @@ class CommuteOptimizer:
         print(" OPTIMAL LIVING STATION FINDER")
         print("=" * config.DISPLAY_WIDTH)
         
-        work_a_name = self.station_info.get(work_station_a, {}).get("title", work_station_a)
-        work_b_name = self.station_info.get(work_station_b, {}).get("title", work_station_b)
+        work_a_name = self.station_info.title(work_station_a, work_station_a)
+        work_b_name = self.station_info.title(work_station_b, work_station_b)
         
         print(f"\nPerson A works at: {work_a_name}")
         print(f"Person B works at: {work_b_name}")
@@ -362,9 +1587,42 @@ class CommuteOptimizer:
             
             print()
     
+    def display_group_results(
+        self,
+        work_stations: List[str],
+        candidates: List[GroupMeetingPoint]
+    ) -> None:
+        """Display group search results with each commuter's route."""
+        print("\n" + "=" * config.DISPLAY_WIDTH)
+        print(" OPTIMAL LIVING STATION FINDER")
+        print("=" * config.DISPLAY_WIDTH)
+        
+        work_names = [
+            self.station_info.title(station, station)
+            for station in work_stations
+        ]
+        print()
+        for i, name in enumerate(work_names, 1):
+            print(f"Person {i} works at: {name}")
+        print(f"\nTop {len(candidates)} stations:\n")
+        
+        for i, candidate in enumerate(candidates, 1):
+            print("=" * config.DISPLAY_WIDTH)
+            print(f"#{i} {candidate.station_name}")
+            print("=" * config.DISPLAY_WIDTH)
+            print(f"Total commute time: {candidate.total_time:.1f} minutes (weighted)")
+            print(f"Longest commute: {candidate.longest_time:.1f} minutes")
+            print(f"Spread: {candidate.spread:.1f} minutes")
+            print(f"Balance score: {candidate.balance_score:.3f}\n")
+            
+            for person, (name, route) in enumerate(zip(work_names, candidate.routes), 1):
+                print(f"Person {person}'s commute to {name}: {route.total_time:.1f} minutes")
+                self._display_route(route)
+                print()
+    
     def _display_route(self, route: Route) -> None:
         """Display a single route with transfer information."""
-        if not route.segments:
+        if not route:
             print("  Direct connection (already at destination)")
             return
         
@@ -383,7 +1641,7 @@ class CommuteOptimizer:
                     segment_group = []
                 
                 # Display transfer
-                from_name = self.station_info.get(segment.from_station, {}).get("title", "Unknown")
+                from_name = self.station_info.title(segment.from_station, "Unknown")
                 print(f"  Transfer at {from_name} ({segment.travel_time:.1f} min)\n")
                 current_railway = None
                 
@@ -404,11 +1662,10 @@ class CommuteOptimizer:
     
     def _display_segment_group(self, segments: List[RouteSegment], railway: str) -> None:
         """Display a group of segments on the same railway line."""
-        railway_info = self.railway_info.get(railway, {})
-        railway_name = railway_info.get("title", railway.split(":")[-1] if ":" in railway else railway)
+        railway_name = self.railway_info.title(railway, railway.split(":")[-1] if ":" in railway else railway)
         
-        from_station = self.station_info.get(segments[0].from_station, {}).get("title", "Unknown")
-        to_station = self.station_info.get(segments[-1].to_station, {}).get("title", "Unknown")
+        from_station = self.station_info.title(segments[0].from_station, "Unknown")
+        to_station = self.station_info.title(segments[-1].to_station, "Unknown")
         
         total_time = sum(seg.travel_time for seg in segments)
         total_stops = sum(seg.num_stops for seg in segments)
@@ -417,29 +1674,122 @@ class CommuteOptimizer:
         print(f"    {from_station} → {to_station}")
         print(f"    ({total_stops} stops, {total_time:.1f} minutes)")
     
-    def search_station(self, search_term: str) -> List[Tuple[str, str, str, str]]:
+    def search_station(
+        self,
+        search_term: str,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, str, str, str]]:
         """
         Search for stations by name.
         
+        Uses the current snapshot's StationSearchIndex, so full-width and
+        half-width text, hiragana or katakana and romaji with or without
+        macrons all match. Exact and prefix matches rank before substring
+        matches.
+        
         Args:
             search_term: Search term (case-insensitive)
+            limit: Maximum number of results (None for all)
             
         Returns:
             List of tuples: (station_id, title, title_en, railway)
         """
-        search_term_lower = search_term.lower()
-        results = []
+        if self.network is None:
+            return []
+        return self.network.search_index.search(search_term, limit)
+    
+    def stations_nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the stations within a radius of a point, nearest first.
         
-        for station_id, info in self.station_info.items():
-            title = info.get("title", "")
-            title_en = info.get("title_en", "")
-            railway = info.get("railway", "")
+        Args:
+            latitude: Latitude in degrees
+            longitude: Longitude in degrees
+            radius: Search radius in meters
+            limit: Maximum number of stations (None for all)
             
-            if (search_term_lower in title.lower() or
-                search_term_lower in title_en.lower()):
-                results.append((station_id, title, title_en, railway))
+        Returns:
+            List of (station_id, distance in meters) sorted by distance
+            
+        Raises:
+            ValueError: If the radius is not positive
+        """
+        if radius <= 0:
+            raise ValueError("Radius must be positive")
+        
+        if not self.network_graph:
+            self.build_network()
+        
+        return self.network.spatial_index.nearby(latitude, longitude, radius, limit)
+    
+    def stations_in_bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Find the stations inside a bounding box, e.g. the visible map area.
+        
+        Args:
+            min_lat: Southern edge in degrees
+            min_lon: Western edge in degrees
+            max_lat: Northern edge in degrees
+            max_lon: Eastern edge in degrees
+            limit: Maximum number of stations (None for all)
+            
+        Returns:
+            Station IDs inside the box
+            
+        Raises:
+            ValueError: If an edge is beyond the opposite one
+        """
+        if min_lat > max_lat or min_lon > max_lon:
+            raise ValueError("Bounding box edges must satisfy min <= max")
+        
+        if not self.network_graph:
+            self.build_network()
         
-        return sorted(results, key=lambda x: x[1])
+        return self.network.spatial_index.within(min_lat, min_lon, max_lat, max_lon, limit)
+
+
+def _row_hashes(
+    station_rows: List[tuple],
+    railway_rows: List[tuple],
+    segment_times: Dict[Tuple[str, str, str], float]
+) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]:
+    """Hash each station row, railway row and railway's segment times by ID."""
+    segments: Dict[str, list] = {}
+    for key, minutes in segment_times.items():
+        segments.setdefault(key[0], []).append((key, minutes))
+    # Segment times come from an unordered scan; sort so equal data hashes equal
+    return (
+        {row[0]: hash(row) for row in station_rows},
+        {row[0]: hash(row) for row in railway_rows},
+        {railway: hash(tuple(sorted(items))) for railway, items in segments.items()}
+    )
+
+
+def check_isochrone_bands(bands: Sequence[float]) -> None:
+    """
+    Check that isochrone band limits are usable.
+    
+    Raises:
+        ValueError: If there are no bands, or they are not finite, positive
+            and strictly ascending
+    """
+    if not bands or not all(math.isfinite(b) and b > 0 for b in bands):
+        raise ValueError("Bands must be finite positive numbers of minutes")
+    if any(a >= b for a, b in zip(bands, bands[1:])):
+        raise ValueError("Bands must be strictly ascending")
 
 
 def main():
@@ -33,12 +33,65 @@ OPERATORS: Dict[str, Dict[str, Any]] = {
 # Database Configuration
 DEFAULT_DB_PATH = "train_data.db"
 
+# Precomputed travel-time matrix, stored next to the database file
+# (train_data.db -> train_data.ttm); build with `python cli.py build-matrix`
+TRAVEL_TIME_MATRIX_SUFFIX = ".ttm"
+
+# Binary snapshot of the network graph, stored next to the database file and
+# rebuilt automatically whenever the stations/railways/segment_times change
+GRAPH_SNAPSHOT_SUFFIX = ".graph"
+
 # Network Optimization Parameters
-DEFAULT_AVG_TIME_PER_STOP = 2.5  # minutes per station stop
+DEFAULT_AVG_TIME_PER_STOP = 2.5  # minutes per station stop (segments without timetable data)
 DEFAULT_TRANSFER_TIME = 5.0       # minutes per line transfer
 DEFAULT_MAX_COMMUTE_TIME = 120    # maximum commute time to consider (minutes)
 DEFAULT_TOP_N_RESULTS = 10        # number of top results to return
 
+# Timetable routing (Connection Scan Algorithm over train_timetables)
+DEFAULT_TIMETABLE_CALENDAR = "odpt.Calendar:Weekday"
+
+# Departure-window profiles (RAPTOR over train_timetables)
+RAPTOR_MAX_TRIPS = 5                  # trips per journey (transfers + 1)
+WINDOW_SCORES = ("average", "worst")  # how a station is scored over the window
+DEFAULT_WINDOW_SCORE = "average"
+
+# Optimization modes for find_optimal_stations: "time" finds the fastest
+# route; "pareto" keeps every non-dominated (time, transfers) route and ranks
+# with time + transfers * transfer penalty
+OPTIMIZE_MODES = ("time", "pareto")
+DEFAULT_OPTIMIZE = "time"
+DEFAULT_TRANSFER_PENALTY = 5.0    # extra minutes a transfer counts as (pareto)
+PARETO_MAX_TRANSFERS = 8          # highest transfer count labelled per route
+
+# Priority queue of the shortest-path search: "bucket" is Dial's bucket queue,
+# used when every edge weight is a whole multiple of SEARCH_BUCKET_STEP (segment
+# times are rounded to half a minute); "heap" always uses a binary heap
+SEARCH_QUEUE = "bucket"
+SEARCH_BUCKET_STEP = 0.5          # minutes
+
+# Shortest-path tree cache (one unbounded tree per workplace station)
+PATH_TREE_CACHE_MAX_ENTRIES = 64                  # 0 disables the cache
+PATH_TREE_CACHE_MAX_BYTES = 64 * 1024 * 1024      # approximate memory budget
+
+# Isochrones (GET /api/isochrone/{station_id})
+ISOCHRONE_DEFAULT_BANDS = "30,45,60"   # minutes
+ISOCHRONE_MAX_BANDS = 12
+ISOCHRONE_CACHE_MAX_AGE = 3600         # seconds clients may reuse a response
+
+# Spatial station index (GET /api/stations/nearby and /api/stations/bbox)
+SPATIAL_GRID_CELL_DEGREES = 0.01       # grid cell edge (~1.1 km of latitude)
+NEARBY_DEFAULT_RADIUS = 1000           # meters
+NEARBY_MAX_RADIUS = 10000              # meters
+BBOX_MAX_STATIONS = 2000               # most stations returned for one map view
+
+# Group analysis (three or more workplaces)
+GROUP_OBJECTIVES = ("sum", "max")     # rank by weighted total or longest commute
+DEFAULT_GROUP_OBJECTIVE = "sum"
+
+# Batch analysis (many workplace pairs sharing shortest-path trees)
+BATCH_MAX_WORKERS = None      # worker processes; None uses the CPU count
+BATCH_POOL_MIN_ORIGINS = 16   # fewer distinct workplaces are searched in-process
+
 # Display Configuration
 DISPLAY_WIDTH = 100  # characters width for output formatting
 
@@ -47,5 +100,10 @@ API_TIMEOUT = 60  # seconds
 MAX_RETRIES = 3
 RETRY_DELAY = 2   # seconds
 
+# Streaming ingestion (python cli.py fetch --stream): responses are parsed as
+# they arrive and stored in batches, so memory does not grow with their size
+FETCH_STREAM_CHUNK_BYTES = 64 * 1024   # bytes read from the response at a time
+FETCH_BATCH_RECORDS = 500              # records per insert
+
 # Database Schema Version
 SCHEMA_VERSION = "2.0"
\ No newline at end of file
@@ -1,12 +1,21 @@
 """Data fetcher for train network data from ODPT APIs."""
 
 import os
+import time
 import requests
-import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 from dotenv import load_dotenv
 import config
 from database_manager import TrainDatabaseManager
+from json_stream import chunked, iter_json_array
+from segment_times import derive_segment_times
+
+# Resources stored per operator: (ODPT resource type, stats key, insert method)
+_RESOURCES = [
+    ("Station", "stations", "insert_stations"),
+    ("Railway", "railways", "insert_railways"),
+    ("TrainTimetable", "train_timetables", "insert_train_timetables"),
+]
 
 
 class DataFetcher:
@@ -29,24 +38,26 @@ class DataFetcher:
         else:
             return config.ODPT_API_CHALLENGE_BASE_URL
     
-    def _fetch_data(
+    def _request(
         self,
         resource_type: str,
         operator_id: str,
         api_base: str,
-        env_key: str
-    ) -> List[Dict[str, Any]]:
+        env_key: str,
+        stream: bool = False
+    ) -> requests.Response:
         """
-        Fetch data from the ODPT API.
+        Send a request to the ODPT API.
         
         Args:
             resource_type: Type of resource (e.g., 'Station', 'Railway')
             operator_id: Operator identifier
             api_base: Which API to use ('production' or 'challenge')
             env_key: Environment variable name for API key
+            stream: Leave the body unread, to be consumed incrementally
             
         Returns:
-            List of data dictionaries
+            Response with a successful status
             
         Raises:
             requests.RequestException: If the API request fails
@@ -64,23 +75,90 @@ class DataFetcher:
             "acl:consumerKey": api_key
         }
         
+        response = requests.get(
+            endpoint, params=params, timeout=config.API_TIMEOUT, stream=stream
+        )
+        try:
+            response.raise_for_status()
+        except requests.RequestException:
+            response.close()
+            raise
+        return response
+    
+    def _fetch_data(
+        self,
+        resource_type: str,
+        operator_id: str,
+        api_base: str,
+        env_key: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch data from the ODPT API.
+        
+        Args:
+            resource_type: Type of resource (e.g., 'Station', 'Railway')
+            operator_id: Operator identifier
+            api_base: Which API to use ('production' or 'challenge')
+            env_key: Environment variable name for API key
+            
+        Returns:
+            List of data dictionaries
+            
+        Raises:
+            requests.RequestException: If the API request fails
+        """
         print(f"    Fetching {resource_type}...")
-        response = requests.get(endpoint, params=params, timeout=config.API_TIMEOUT)
-        response.raise_for_status()
+        response = self._request(resource_type, operator_id, api_base, env_key)
         
         data = response.json()
         print(f"    ✓ Fetched {len(data)} {resource_type} records")
         return data
     
-    def fetch_operator_data(self, operator_key: str) -> Dict[str, List[Dict[str, Any]]]:
+    def _stream_data(
+        self,
+        resource_type: str,
+        operator_id: str,
+        api_base: str,
+        env_key: str
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Fetch data from the ODPT API, parsing records as the body arrives.
+        
+        Only the unparsed part of the body is held in memory, so memory use
+        does not grow with the size of the response.
+        
+        Args:
+            resource_type: Type of resource (e.g., 'Station', 'Railway')
+            operator_id: Operator identifier
+            api_base: Which API to use ('production' or 'challenge')
+            env_key: Environment variable name for API key
+            
+        Yields:
+            Data dictionaries, in response order
+            
+        Raises:
+            requests.RequestException: If the API request fails
+            ValueError: If the response body is not a complete JSON array
+        """
+        with self._request(resource_type, operator_id, api_base, env_key, stream=True) as response:
+            yield from iter_json_array(
+                response.iter_content(chunk_size=config.FETCH_STREAM_CHUNK_BYTES)
+            )
+    
+    def fetch_operator_data(
+        self,
+        operator_key: str,
+        include_timetables: bool = False
+    ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Fetch all data for a specific operator.
         
         Args:
             operator_key: Key from config.OPERATORS (e.g., 'JR_EAST')
+            include_timetables: Also fetch train timetables (large)
             
         Returns:
-            Dictionary with 'stations' and 'railways' data
+            Dictionary with 'stations', 'railways' and 'train_timetables' data
         """
         if operator_key not in config.OPERATORS:
             raise ValueError(f"Unknown operator: {operator_key}")
@@ -96,26 +174,36 @@ class DataFetcher:
             stations = self._fetch_data("Station", operator_id, api_base, env_key)
             railways = self._fetch_data("Railway", operator_id, api_base, env_key)
             
+            train_timetables = []
+            if include_timetables:
+                train_timetables = self._fetch_data(
+                    "TrainTimetable", operator_id, api_base, env_key
+                )
+            
             return {
                 "stations": stations,
-                "railways": railways
+                "railways": railways,
+                "train_timetables": train_timetables
             }
         except Exception as e:
             print(f"    ✗ Error fetching {operator_config['name']}: {e}")
             return {
                 "stations": [],
-                "railways": []
+                "railways": [],
+                "train_timetables": []
             }
     
     def fetch_all_operators(
         self,
-        operator_keys: Optional[List[str]] = None
+        operator_keys: Optional[List[str]] = None,
+        include_timetables: bool = False
     ) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
         """
         Fetch data from all specified operators.
         
         Args:
             operator_keys: List of operator keys to fetch, or None for all
+            include_timetables: Also fetch train timetables (large)
             
         Returns:
             Dictionary mapping operator keys to their data
@@ -129,7 +217,9 @@ class DataFetcher:
         
         all_data = {}
         for operator_key in operator_keys:
-            all_data[operator_key] = self.fetch_operator_data(operator_key)
+            all_data[operator_key] = self.fetch_operator_data(
+                operator_key, include_timetables
+            )
         
         print("\n" + "=" * config.DISPLAY_WIDTH)
         print(" DATA FETCHING COMPLETE")
@@ -156,50 +246,176 @@ class DataFetcher:
         
         stats = {
             "stations": 0,
-            "railways": 0
+            "railways": 0,
+            "train_timetables": 0
         }
         
         with TrainDatabaseManager(self.db_path) as db:
             db.create_schema()
-            db.clear_all_data()
+            load_start = time.perf_counter()
             
-            for operator_key, operator_data in data.items():
-                operator_name = config.OPERATORS[operator_key]["name"]
+            # One transaction: a failed load leaves the previous data in place
+            with db.bulk_load():
+                db.clear_all_data()
                 
-                if operator_data["stations"]:
-                    print(f"\nStoring {operator_name} stations...")
-                    count = db.insert_stations(operator_data["stations"])
-                    stats["stations"] += count
-                    print(f"  ✓ Stored {count} stations")
+                for operator_key, operator_data in data.items():
+                    operator_name = config.OPERATORS[operator_key]["name"]
+                    
+                    if operator_data["stations"]:
+                        print(f"\nStoring {operator_name} stations...")
+                        start = time.perf_counter()
+                        count = db.insert_stations(operator_data["stations"])
+                        stats["stations"] += count
+                        print(f"  ✓ Stored {count} stations ({_rows_per_second(count, start)})")
+                    
+                    if operator_data["railways"]:
+                        print(f"Storing {operator_name} railways...")
+                        start = time.perf_counter()
+                        count = db.insert_railways(operator_data["railways"])
+                        stats["railways"] += count
+                        print(f"  ✓ Stored {count} railways ({_rows_per_second(count, start)})")
+                    
+                    if operator_data.get("train_timetables"):
+                        print(f"Storing {operator_name} train timetables...")
+                        start = time.perf_counter()
+                        count = db.insert_train_timetables(operator_data["train_timetables"])
+                        stats["train_timetables"] += count
+                        print(f"  ✓ Stored {count} train timetables "
+                              f"({_rows_per_second(count, start)})")
+            
+            total = sum(stats.values())
+            print(f"\n  ✓ Loaded {total} rows and rebuilt indexes in "
+                  f"{time.perf_counter() - load_start:.2f} seconds "
+                  f"({_rows_per_second(total, load_start)})")
+            
+            if stats["train_timetables"]:
+                print("\nDeriving segment running times from timetables...")
+                count = derive_segment_times(db)
+                print(f"  ✓ Stored median running times for {count} segments")
+        
+        print("\n" + "=" * config.DISPLAY_WIDTH)
+        print(" DATABASE POPULATION COMPLETE")
+        print("=" * config.DISPLAY_WIDTH)
+        print(f"\nTotal stations: {stats['stations']}")
+        print(f"Total railways: {stats['railways']}")
+        print(f"Total train timetables: {stats['train_timetables']}\n")
+        
+        return stats
+    
+    def stream_and_populate(
+        self,
+        operator_keys: Optional[List[str]] = None,
+        include_timetables: bool = False
+    ) -> Dict[str, int]:
+        """
+        Fetch data from operators and store it while the responses arrive.
+        
+        Records are parsed incrementally from each response body and
+        inserted in batches of config.FETCH_BATCH_RECORDS, so peak memory
+        stays flat however large the responses are. Like populate_database
+        the whole load is one bulk transaction; an operator whose fetch
+        fails part-way is rolled back to a savepoint and stores nothing.
+        
+        Args:
+            operator_keys: List of operator keys to fetch, or None for all
+            include_timetables: Also fetch train timetables (large)
+            
+        Returns:
+            Dictionary with statistics about inserted records
+        """
+        if operator_keys is None:
+            operator_keys = list(config.OPERATORS.keys())
+        for operator_key in operator_keys:
+            if operator_key not in config.OPERATORS:
+                raise ValueError(f"Unknown operator: {operator_key}")
+        
+        resources = _RESOURCES if include_timetables else _RESOURCES[:2]
+        
+        print("\n" + "=" * config.DISPLAY_WIDTH)
+        print(" STREAMING DATA INTO DATABASE")
+        print("=" * config.DISPLAY_WIDTH)
+        
+        stats = {
+            "stations": 0,
+            "railways": 0,
+            "train_timetables": 0
+        }
+        
+        with TrainDatabaseManager(self.db_path) as db:
+            db.create_schema()
+            load_start = time.perf_counter()
+            
+            with db.bulk_load():
+                db.clear_all_data()
                 
-                if operator_data["railways"]:
-                    print(f"Storing {operator_name} railways...")
-                    count = db.insert_railways(operator_data["railways"])
-                    stats["railways"] += count
-                    print(f"  ✓ Stored {count} railways")
+                for operator_key in operator_keys:
+                    operator_config = config.OPERATORS[operator_key]
+                    operator_name = operator_config["name"]
+                    print(f"\n--- Streaming {operator_name} data ---")
+                    
+                    counts = {}
+                    try:
+                        with db.savepoint("operator_load"):
+                            for resource_type, key, insert_name in resources:
+                                print(f"    Streaming {resource_type}...")
+                                insert = getattr(db, insert_name)
+                                start = time.perf_counter()
+                                counts[key] = 0
+                                records = self._stream_data(
+                                    resource_type, operator_config["id"],
+                                    operator_config["api_base"], operator_config["env_key"]
+                                )
+                                for batch in chunked(records, config.FETCH_BATCH_RECORDS):
+                                    counts[key] += insert(batch)
+                                print(f"    ✓ Stored {counts[key]} {resource_type} records "
+                                      f"({_rows_per_second(counts[key], start)})")
+                    except Exception as e:
+                        print(f"    ✗ Error fetching {operator_name}: {e}")
+                        continue
+                    
+                    for key, count in counts.items():
+                        stats[key] += count
+            
+            total = sum(stats.values())
+            print(f"\n  ✓ Loaded {total} rows and rebuilt indexes in "
+                  f"{time.perf_counter() - load_start:.2f} seconds "
+                  f"({_rows_per_second(total, load_start)})")
+            
+            if stats["train_timetables"]:
+                print("\nDeriving segment running times from timetables...")
+                count = derive_segment_times(db)
+                print(f"  ✓ Stored median running times for {count} segments")
         
         print("\n" + "=" * config.DISPLAY_WIDTH)
         print(" DATABASE POPULATION COMPLETE")
         print("=" * config.DISPLAY_WIDTH)
         print(f"\nTotal stations: {stats['stations']}")
-        print(f"Total railways: {stats['railways']}\n")
+        print(f"Total railways: {stats['railways']}")
+        print(f"Total train timetables: {stats['train_timetables']}\n")
         
         return stats
     
     def fetch_and_populate(
         self,
-        operator_keys: Optional[List[str]] = None
+        operator_keys: Optional[List[str]] = None,
+        include_timetables: bool = False,
+        stream: bool = False
     ) -> Dict[str, int]:
         """
         Fetch data from operators and populate database in one operation.
         
         Args:
             operator_keys: List of operator keys to fetch, or None for all
+            include_timetables: Also fetch train timetables (large)
+            stream: Store records while the responses arrive instead of
+                holding every response in memory (see stream_and_populate)
             
         Returns:
             Dictionary with statistics about inserted records
         """
-        data = self.fetch_all_operators(operator_keys)
+        if stream:
+            return self.stream_and_populate(operator_keys, include_timetables)
+        data = self.fetch_all_operators(operator_keys, include_timetables)
         stats = self.populate_database(data)
         return stats
     
@@ -234,6 +450,14 @@ class DataFetcher:
             }
 
 
+def _rows_per_second(count: int, start: float) -> str:
+    """Format the insert throughput since a time.perf_counter() start."""
+    elapsed = time.perf_counter() - start
+    if elapsed <= 0:
+        return f"{count} rows"
+    return f"{count / elapsed:,.0f} rows/s"
+
+
 def main():
     """Example usage of the data fetcher."""
     fetcher = DataFetcher()
@@ -2,9 +2,51 @@
 
 import sqlite3
 import json
-from typing import Dict, List, Any, Optional
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 from datetime import datetime
 
+# Secondary indexes; bulk loads drop them and build each once at the end
+_INDEXES = {
+    "idx_trains_railway": "trains(railway)",
+    "idx_trains_train_number": "trains(train_number)",
+    "idx_trains_delay": "trains(delay)",
+    "idx_stations_railway": "stations(railway)",
+    "idx_stations_same_as": "stations(same_as)",
+    "idx_station_timetables_station": "station_timetables(station)",
+    "idx_train_timetables_railway": "train_timetables(railway)",
+    "idx_train_timetables_calendar": "train_timetables(calendar)",
+    "idx_segment_times_stations": "segment_times(railway, from_station, to_station)",
+}
+
+# Page cache for bulk loads, in KiB (negative PRAGMA cache_size values are KiB)
+_BULK_CACHE_KIB = 64 * 1024
+
+
+def _english(title: Any) -> Optional[str]:
+    """English entry of a multilingual title object, if there is one."""
+    return title.get("en") if isinstance(title, dict) else None
+
+
+def _json_if_list(value: Any) -> Any:
+    """JSON-encode a value that may be a list (or else a plain string)."""
+    return json.dumps(value) if isinstance(value, list) else value
+
+
+def _railway_station_rows(railway: Optional[str], station_order: Any) -> Iterator[tuple]:
+    """
+    Yield the railway_stations rows of one railway's odpt:stationOrder.
+    
+    Rows are (railway, seq, station) with seq the position in the order;
+    entries without a station are skipped, leaving a gap in seq.
+    """
+    if not railway or not isinstance(station_order, list):
+        return
+    for seq, entry in enumerate(station_order):
+        station = entry.get("odpt:station") if isinstance(entry, dict) else None
+        if station:
+            yield railway, seq, station
+
 
 class TrainDatabaseManager:
     """Manager for SQLite database operations."""
@@ -19,6 +61,7 @@ class TrainDatabaseManager:
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        self.bulk_loading = False
     
     def connect(self) -> None:
         """Establish connection to the database."""
@@ -31,7 +74,14 @@ class TrainDatabaseManager:
             self.conn.close()
     
     def create_schema(self) -> None:
-        """Create database schema for all datasets."""
+        """
+        Create database schema for all datasets.
+        
+        Also upgrades databases fetched before railway_stations existed:
+        when that table is created, it is filled from the station_order
+        JSON of the railways already stored.
+        """
+        upgrade_station_orders = not self._has_table("railway_stations")
         
         # Trains table
         self.cursor.execute("""
@@ -75,6 +125,17 @@ class TrainDatabaseManager:
             )
         """)
         
+        # Stations of each railway in line order (odpt:stationOrder of the
+        # railway's same_as); the primary key is the (railway, seq) scan order
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS railway_stations (
+                railway TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                station TEXT NOT NULL,
+                PRIMARY KEY (railway, seq)
+            ) WITHOUT ROWID
+        """)
+        
         # Stations table
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS stations (
@@ -135,39 +196,116 @@ class TrainDatabaseManager:
             )
         """)
         
+        # Median running time per railway segment, derived from train_timetables
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS segment_times (
+                railway TEXT NOT NULL,
+                direction TEXT NOT NULL,
+                from_station TEXT NOT NULL,
+                to_station TEXT NOT NULL,
+                median_time REAL NOT NULL,
+                samples INTEGER NOT NULL,
+                PRIMARY KEY (railway, direction, from_station, to_station)
+            )
+        """)
+        
         # Create indexes for faster queries
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_trains_railway ON trains(railway)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_trains_train_number ON trains(train_number)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_trains_delay ON trains(delay)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_stations_railway ON stations(railway)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_station_timetables_station ON station_timetables(station)")
-        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_train_timetables_railway ON train_timetables(railway)")
+        self.create_indexes()
+        
+        if upgrade_station_orders:
+            self.rebuild_railway_stations()
+    
+    def _has_table(self, name: str) -> bool:
+        """Check whether a table exists."""
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        )
+        return self.cursor.fetchone() is not None
+    
+    def create_indexes(self) -> None:
+        """Create any missing secondary indexes."""
+        for name, columns in _INDEXES.items():
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+        self.conn.commit()
+    
+    @contextmanager
+    def bulk_load(self) -> Iterator[None]:
+        """
+        Run a block of inserts as one bulk load.
+        
+        Inside the block the database runs with synchronous=NORMAL,
+        in-memory temp storage and a larger page cache, the secondary
+        indexes are dropped, and clear_all_data and the insert_* methods do
+        not commit, so the whole block is one transaction. On exit it is
+        committed (or rolled back if the block raised), every index is
+        rebuilt in a single pass and the previous sync, temp storage and
+        cache settings are restored.
         
+        The journal mode is left alone: in WAL mode one large transaction
+        is written twice, to the log and again at the checkpoint.
+        """
         self.conn.commit()
+        synchronous = self.cursor.execute("PRAGMA synchronous").fetchone()[0]
+        temp_store = self.cursor.execute("PRAGMA temp_store").fetchone()[0]
+        cache_size = self.cursor.execute("PRAGMA cache_size").fetchone()[0]
+        self.cursor.execute("PRAGMA synchronous=NORMAL")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        self.cursor.execute(f"PRAGMA cache_size=-{_BULK_CACHE_KIB}")
+        for name in _INDEXES:
+            self.cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        
+        self.bulk_loading = True
+        try:
+            yield
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self.bulk_loading = False
+            self.create_indexes()
+            self.cursor.execute(f"PRAGMA synchronous={synchronous}")
+            self.cursor.execute(f"PRAGMA temp_store={temp_store}")
+            self.cursor.execute(f"PRAGMA cache_size={cache_size}")
+    
+    @contextmanager
+    def savepoint(self, name: str) -> Iterator[None]:
+        """
+        Run a block that is undone on its own if it raises.
+        
+        The block's changes stay part of the enclosing transaction (e.g. a
+        bulk load); only a failure inside the block is rolled back.
+        
+        Args:
+            name: SQL identifier of the savepoint
+        """
+        self.cursor.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except BaseException:
+            self.cursor.execute(f"ROLLBACK TO {name}")
+            self.cursor.execute(f"RELEASE {name}")
+            raise
+        self.cursor.execute(f"RELEASE {name}")
+    
+    def _commit(self) -> None:
+        """Commit, unless the bulk load in progress commits at its end."""
+        if not self.bulk_loading:
+            self.conn.commit()
     
     def clear_all_data(self) -> None:
         """Clear all data from all tables."""
-        tables = ['trains', 'railways', 'stations', 'station_timetables', 'train_timetables']
+        tables = ['trains', 'railways', 'railway_stations', 'stations', 'station_timetables',
+                  'train_timetables', 'segment_times']
         for table in tables:
             self.cursor.execute(f"DELETE FROM {table}")
-        self.conn.commit()
+        self._commit()
     
-    def insert_trains(self, trains: List[Dict[str, Any]]) -> int:
+    def insert_trains(self, trains: Iterable[Dict[str, Any]]) -> int:
         """Insert train data into the database."""
         created_at = datetime.now().isoformat()
-        count = 0
-        
-        for train in trains:
-            # Handle destination stations (list)
-            dest_stations = json.dumps(train.get("odpt:destinationStation", []))
-            
-            self.cursor.execute("""
-                INSERT OR REPLACE INTO trains 
-                (id, context, type, date, valid, railway, train_number, train_type, 
-                 rail_direction, operator, from_station, to_station, delay, 
-                 car_composition, destination_stations, same_as, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        rows = (
+            (
                 train.get("@id"),
                 train.get("@context"),
                 train.get("@type"),
@@ -182,99 +320,163 @@ class TrainDatabaseManager:
                 train.get("odpt:toStation"),
                 train.get("odpt:delay"),
                 train.get("odpt:carComposition"),
-                dest_stations,
+                json.dumps(train.get("odpt:destinationStation", [])),
                 train.get("owl:sameAs"),
                 created_at
-            ))
-            count += 1
+            )
+            for train in trains
+        )
         
-        self.conn.commit()
-        return count
+        self.cursor.executemany("""
+            INSERT OR REPLACE INTO trains 
+            (id, context, type, date, valid, railway, train_number, train_type, 
+             rail_direction, operator, from_station, to_station, delay, 
+             car_composition, destination_stations, same_as, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        self._commit()
+        return self.cursor.rowcount
     
-    def insert_railways(self, railways: List[Dict[str, Any]]) -> int:
-        """Insert railway data into the database."""
+    def insert_railways(self, railways: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert railway data into the database.
+        
+        Each railway's station order is stored both as JSON in railways and
+        as rows of railway_stations, replacing any earlier rows of the railway.
+        """
         created_at = datetime.now().isoformat()
-        count = 0
+        replaced = []
+        station_rows = []
         
-        for railway in railways:
-            # Handle station order (list)
-            station_order = json.dumps(railway.get("odpt:stationOrder", []))
-            
-            self.cursor.execute("""
-                INSERT OR REPLACE INTO railways 
-                (id, context, type, title, title_en, operator, line_code, color, 
-                 ascending_direction, descending_direction, station_order, same_as, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                railway.get("@id"),
-                railway.get("@context"),
-                railway.get("@type"),
-                railway.get("dc:title"),
-                railway.get("odpt:railwayTitle", {}).get("en") if isinstance(railway.get("odpt:railwayTitle"), dict) else None,
-                railway.get("odpt:operator"),
-                railway.get("odpt:lineCode"),
-                railway.get("odpt:color"),
-                railway.get("odpt:ascendingRailDirection"),
-                railway.get("odpt:descendingRailDirection"),
-                station_order,
-                railway.get("owl:sameAs"),
-                created_at
-            ))
-            count += 1
+        def rows() -> Iterator[tuple]:
+            for railway in railways:
+                station_order = railway.get("odpt:stationOrder", [])
+                replaced.append((railway.get("owl:sameAs"),))
+                station_rows.extend(_railway_station_rows(railway.get("owl:sameAs"), station_order))
+                yield (
+                    railway.get("@id"),
+                    railway.get("@context"),
+                    railway.get("@type"),
+                    railway.get("dc:title"),
+                    _english(railway.get("odpt:railwayTitle")),
+                    railway.get("odpt:operator"),
+                    railway.get("odpt:lineCode"),
+                    railway.get("odpt:color"),
+                    railway.get("odpt:ascendingRailDirection"),
+                    railway.get("odpt:descendingRailDirection"),
+                    json.dumps(station_order),
+                    railway.get("owl:sameAs"),
+                    created_at
+                )
         
-        self.conn.commit()
+        self.cursor.executemany("""
+            INSERT OR REPLACE INTO railways 
+            (id, context, type, title, title_en, operator, line_code, color, 
+             ascending_direction, descending_direction, station_order, same_as, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows())
+        count = self.cursor.rowcount
+        
+        self.cursor.executemany("DELETE FROM railway_stations WHERE railway = ?", replaced)
+        self.cursor.executemany("""
+            INSERT OR REPLACE INTO railway_stations (railway, seq, station)
+            VALUES (?, ?, ?)
+        """, station_rows)
+        self._commit()
         return count
     
-    def insert_stations(self, stations: List[Dict[str, Any]]) -> int:
-        """Insert station data into the database."""
-        created_at = datetime.now().isoformat()
-        count = 0
+    def rebuild_railway_stations(self) -> int:
+        """
+        Refill railway_stations from the station_order JSON of every railway.
+        
+        create_schema runs this once for databases fetched before the table
+        existed.
         
-        for station in stations:
-            # Handle exit info (complex object)
-            exit_info = json.dumps(station.get("odpt:exit", []))
+        Returns:
+            Number of rows written
+        """
+        self.cursor.execute("DELETE FROM railway_stations")
+        self.cursor.execute("""
+            SELECT same_as, station_order
+            FROM railways
+            WHERE same_as IS NOT NULL AND station_order IS NOT NULL
+        """)
+        rows = []
+        for railway, station_order_json in self.cursor.fetchall():
+            try:
+                rows.extend(_railway_station_rows(railway, json.loads(station_order_json)))
+            except json.JSONDecodeError:
+                continue
+        self.cursor.executemany("""
+            INSERT OR REPLACE INTO railway_stations (railway, seq, station)
+            VALUES (?, ?, ?)
+        """, rows)
+        self._commit()
+        return len(rows)
+    
+    def get_station_orders(self) -> Dict[str, List[Optional[str]]]:
+        """
+        Get the stations of every railway in line order, in one ordered scan.
+        
+        Returns:
+            Dictionary mapping railway ID to station IDs by position, with
+            None where the station order has an entry without a station
             
-            self.cursor.execute("""
-                INSERT OR REPLACE INTO stations 
-                (id, context, type, title, title_en, railway, operator, station_code, 
-                 latitude, longitude, region, exit_info, same_as, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        Raises:
+            ValueError: If the database predates railway_stations and has
+                not been upgraded (see create_schema)
+        """
+        if not self._has_table("railway_stations"):
+            raise ValueError(
+                "Database has no railway_stations table; "
+                "run `python cli.py upgrade-db` to upgrade it"
+            )
+        
+        orders: Dict[str, List[Optional[str]]] = {}
+        self.cursor.execute("SELECT railway, seq, station FROM railway_stations ORDER BY railway, seq")
+        for railway, seq, station in self.cursor:
+            stations = orders.setdefault(railway, [])
+            stations.extend([None] * (seq - len(stations)))
+            stations.append(station)
+        return orders
+    
+    def insert_stations(self, stations: Iterable[Dict[str, Any]]) -> int:
+        """Insert station data into the database."""
+        created_at = datetime.now().isoformat()
+        rows = (
+            (
                 station.get("@id"),
                 station.get("@context"),
                 station.get("@type"),
                 station.get("dc:title"),
-                station.get("odpt:stationTitle", {}).get("en") if isinstance(station.get("odpt:stationTitle"), dict) else None,
+                _english(station.get("odpt:stationTitle")),
                 station.get("odpt:railway"),
                 station.get("odpt:operator"),
                 station.get("odpt:stationCode"),
                 station.get("geo:lat"),
                 station.get("geo:long"),
                 station.get("ug:region"),
-                exit_info,
+                json.dumps(station.get("odpt:exit", [])),
                 station.get("owl:sameAs"),
                 created_at
-            ))
-            count += 1
+            )
+            for station in stations
+        )
         
-        self.conn.commit()
-        return count
+        self.cursor.executemany("""
+            INSERT OR REPLACE INTO stations 
+            (id, context, type, title, title_en, railway, operator, station_code, 
+             latitude, longitude, region, exit_info, same_as, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        self._commit()
+        return self.cursor.rowcount
     
-    def insert_station_timetables(self, timetables: List[Dict[str, Any]]) -> int:
+    def insert_station_timetables(self, timetables: Iterable[Dict[str, Any]]) -> int:
         """Insert station timetable data into the database."""
         created_at = datetime.now().isoformat()
-        count = 0
-        
-        for timetable in timetables:
-            # Handle timetable objects (complex list)
-            timetable_objects = json.dumps(timetable.get("odpt:stationTimetableObject", []))
-            
-            self.cursor.execute("""
-                INSERT OR REPLACE INTO station_timetables 
-                (id, context, type, station, railway, operator, rail_direction, 
-                 calendar, timetable_objects, same_as, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        rows = (
+            (
                 timetable.get("@id"),
                 timetable.get("@context"),
                 timetable.get("@type"),
@@ -283,44 +485,28 @@ class TrainDatabaseManager:
                 timetable.get("odpt:operator"),
                 timetable.get("odpt:railDirection"),
                 timetable.get("odpt:calendar"),
-                timetable_objects,
+                json.dumps(timetable.get("odpt:stationTimetableObject", [])),
                 timetable.get("owl:sameAs"),
                 created_at
-            ))
-            count += 1
+            )
+            for timetable in timetables
+        )
         
-        self.conn.commit()
-        return count
+        self.cursor.executemany("""
+            INSERT OR REPLACE INTO station_timetables 
+            (id, context, type, station, railway, operator, rail_direction, 
+             calendar, timetable_objects, same_as, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        self._commit()
+        return self.cursor.rowcount
     
-    def insert_train_timetables(self, timetables: List[Dict[str, Any]]) -> int:
+    def insert_train_timetables(self, timetables: Iterable[Dict[str, Any]]) -> int:
         """Insert train timetable data into the database."""
         created_at = datetime.now().isoformat()
-        count = 0
-        
-        for timetable in timetables:
-            # Handle timetable objects (complex list)
-            timetable_objects = json.dumps(timetable.get("odpt:trainTimetableObject", []))
-            
-            # Handle via railway and station (can be lists)
-            via_railway = json.dumps(timetable.get("odpt:viaRailway", []))
-            via_station = json.dumps(timetable.get("odpt:viaStation", []))
-            
-            # Handle origin and destination stations (can be lists or strings)
-            origin_station = timetable.get("odpt:originStation")
-            if isinstance(origin_station, list):
-                origin_station = json.dumps(origin_station)
-            
-            destination_station = timetable.get("odpt:destinationStation")
-            if isinstance(destination_station, list):
-                destination_station = json.dumps(destination_station)
-            
-            self.cursor.execute("""
-                INSERT OR REPLACE INTO train_timetables
-                (id, context, type, train_number, train_type, railway, operator,
-                 rail_direction, calendar, origin_station, destination_station,
-                 via_railway, via_station, timetable_objects, note, same_as, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        # Origin and destination stations can be lists or strings
+        rows = (
+            (
                 timetable.get("@id"),
                 timetable.get("@context"),
                 timetable.get("@type"),
@@ -330,19 +516,68 @@ class TrainDatabaseManager:
                 timetable.get("odpt:operator"),
                 timetable.get("odpt:railDirection"),
                 timetable.get("odpt:calendar"),
-                origin_station,
-                destination_station,
-                via_railway,
-                via_station,
-                timetable_objects,
+                _json_if_list(timetable.get("odpt:originStation")),
+                _json_if_list(timetable.get("odpt:destinationStation")),
+                json.dumps(timetable.get("odpt:viaRailway", [])),
+                json.dumps(timetable.get("odpt:viaStation", [])),
+                json.dumps(timetable.get("odpt:trainTimetableObject", [])),
                 timetable.get("odpt:note"),
                 timetable.get("owl:sameAs"),
                 created_at
-            ))
-            count += 1
+            )
+            for timetable in timetables
+        )
         
-        self.conn.commit()
-        return count
+        self.cursor.executemany("""
+            INSERT OR REPLACE INTO train_timetables
+            (id, context, type, train_number, train_type, railway, operator,
+             rail_direction, calendar, origin_station, destination_station,
+             via_railway, via_station, timetable_objects, note, same_as, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        self._commit()
+        return self.cursor.rowcount
+    
+    def replace_segment_times(self, rows: List[tuple]) -> int:
+        """
+        Replace all segment running times in one transaction.
+        
+        Args:
+            rows: (railway, direction, from_station, to_station, median_time, samples) tuples
+        """
+        self.cursor.execute("DELETE FROM segment_times")
+        self.cursor.executemany("""
+            INSERT INTO segment_times
+            (railway, direction, from_station, to_station, median_time, samples)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        self._commit()
+        return len(rows)
+    
+    def get_segment_times(self) -> Dict[tuple, float]:
+        """
+        Get the running time of every timed segment.
+        
+        Directions that share a station pair are combined, weighted by samples.
+        
+        Returns:
+            Dictionary mapping (railway, from_station, to_station) to minutes
+            (empty if the segment_times table does not exist yet)
+        """
+        try:
+            self.cursor.execute("""
+                SELECT railway, from_station, to_station,
+                       SUM(median_time * samples) / SUM(samples)
+                FROM segment_times
+                GROUP BY railway, from_station, to_station
+            """)
+        except sqlite3.OperationalError:
+            return {}
+        
+        return {
+            (railway, from_station, to_station): round(minutes * 2) / 2
+            for railway, from_station, to_station, minutes in self.cursor.fetchall()
+        }
     
     def get_train_count(self) -> int:
         """Get total number of trains in database."""
@@ -397,16 +632,34 @@ class TrainDatabaseManager:
         return results
     
     def get_stations_by_railway(self, railway: str) -> List[Dict[str, Any]]:
-        """Get all stations for a specific railway."""
-        self.cursor.execute("""
-            SELECT id, title, title_en, station_code, latitude, longitude
-            FROM stations 
-            WHERE railway = ?
-            ORDER BY station_code
-        """, (railway,))
+        """
+        Get all stations for a specific railway.
+        
+        Stations come in line order from railway_stations; a railway without
+        a station order (or a database not yet upgraded) falls back to its
+        stations sorted by station code.
+        """
+        rows = []
+        if self._has_table("railway_stations"):
+            self.cursor.execute("""
+                SELECT s.id, s.title, s.title_en, s.station_code, s.latitude, s.longitude
+                FROM railway_stations rs
+                JOIN stations s ON s.same_as = rs.station
+                WHERE rs.railway = ?
+                ORDER BY rs.seq
+            """, (railway,))
+            rows = self.cursor.fetchall()
+        if not rows:
+            self.cursor.execute("""
+                SELECT id, title, title_en, station_code, latitude, longitude
+                FROM stations 
+                WHERE railway = ?
+                ORDER BY station_code
+            """, (railway,))
+            rows = self.cursor.fetchall()
         
         results = []
-        for row in self.cursor.fetchall():
+        for row in rows:
             results.append({
                 "id": row[0],
                 "title": row[1],
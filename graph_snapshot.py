@@ -0,0 +1,264 @@
+"""Binary snapshot of the network graph and station tables, keyed by source content."""
+
+import hashlib
+import math
+import os
+import struct
+from array import array
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import config
+from network_graph import NetworkGraph
+
+# Header: magic, format version, byte-order mark, source hash, then counts of
+# nodes, stations, edges, railway IDs, station rows, railway rows and the
+# byte length of the string table
+_MAGIC = b"DSGS"
+_FORMAT_VERSION = 1
+_BYTE_ORDER_MARK = 0xFEFF
+_HEADER = struct.Struct("=4sHH32s7I")
+
+# Missing strings (e.g. no English title) are stored as this string index
+_NO_STRING = -1
+
+# Rows that go into the graph. They are sorted by ID: node and railway
+# numbers follow row order, and rowids move whenever a fetch replaces a row
+STATION_QUERY = """
+    SELECT same_as, title, title_en, railway, latitude, longitude
+    FROM stations
+    WHERE same_as IS NOT NULL
+    ORDER BY same_as, id
+"""
+RAILWAY_QUERY = """
+    SELECT same_as, title, title_en
+    FROM railways
+    WHERE same_as IS NOT NULL AND station_order IS NOT NULL
+    ORDER BY same_as, id
+"""
+
+
+def snapshot_path_for(db_path: str) -> str:
+    """Get the snapshot file path that sits next to a database file."""
+    return os.path.splitext(db_path)[0] + config.GRAPH_SNAPSHOT_SUFFIX
+
+
+def read_graph_sources(db) -> Tuple[List[tuple], List[tuple], Dict[tuple, float]]:
+    """
+    Read every row the network graph is built from.
+
+    Args:
+        db: Connected TrainDatabaseManager
+
+    Returns:
+        Tuple of (station rows, railway rows, segment times). Station rows
+        are as returned by STATION_QUERY; railway rows are RAILWAY_QUERY
+        rows extended with the railway's stations in line order (a tuple
+        from get_station_orders, empty if it has none). Segment times are
+        as returned by get_segment_times
+    """
+    station_orders = db.get_station_orders()
+    db.cursor.execute(STATION_QUERY)
+    station_rows = db.cursor.fetchall()
+    db.cursor.execute(RAILWAY_QUERY)
+    railway_rows = [
+        (railway_id, title, title_en, tuple(station_orders.get(railway_id, ())))
+        for railway_id, title, title_en in db.cursor.fetchall()
+    ]
+    return station_rows, railway_rows, db.get_segment_times()
+
+
+def graph_source_hash(
+    station_rows: List[tuple],
+    railway_rows: List[tuple],
+    segment_times: Dict[tuple, float]
+) -> bytes:
+    """
+    SHA-256 digest of every source row and setting the graph is built from.
+
+    Returns:
+        32-byte digest; any change to stations, railways, segment times or
+        the timing defaults produces a different digest
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((
+        _FORMAT_VERSION, config.DEFAULT_AVG_TIME_PER_STOP, config.DEFAULT_TRANSFER_TIME
+    )).encode("utf-8"))
+    for part in (station_rows, railway_rows, list(segment_times.items())):
+        digest.update(b"\0")
+        digest.update(repr(part).encode("utf-8"))
+    return digest.digest()
+
+
+def write_graph_snapshot(
+    path: str,
+    source_hash: bytes,
+    graph: NetworkGraph,
+    station_info: Mapping[str, Dict],
+    railway_info: Mapping[str, Dict]
+) -> int:
+    """
+    Write the graph arrays and station/railway tables to disk atomically.
+
+    Args:
+        path: Destination file path
+        source_hash: graph_source_hash() of the rows the graph was built from
+        graph: Network graph to store
+        station_info: Station ID -> title, title_en, railway, latitude, longitude
+        railway_info: Railway ID -> title, title_en
+
+    Returns:
+        Size of the written file in bytes
+    """
+    string_index: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return _NO_STRING
+        return string_index.setdefault(value, len(string_index))
+
+    node_strings = array("i", map(intern, graph.station_ids))
+    railway_strings = array("i", map(intern, graph.railway_ids))
+
+    station_rows = array("i")
+    coordinates = array("d")
+    for station_id, info in station_info.items():
+        station_rows.extend((
+            intern(station_id), intern(info["title"]),
+            intern(info["title_en"]), intern(info["railway"])
+        ))
+        for value in (info["latitude"], info["longitude"]):
+            coordinates.append(float("nan") if value is None else value)
+
+    railway_rows = array("i")
+    for railway_id, info in railway_info.items():
+        railway_rows.extend((intern(railway_id), intern(info["title"]), intern(info["title_en"])))
+
+    string_table = "\0".join(string_index).encode("utf-8")
+    header = _HEADER.pack(
+        _MAGIC, _FORMAT_VERSION, _BYTE_ORDER_MARK, source_hash,
+        len(graph), graph.num_stations, graph.num_edges, len(graph.railway_ids),
+        len(station_info), len(railway_info), len(string_table)
+    )
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for section in (
+            graph.offsets, graph.targets, graph.weights, graph.railways,
+            node_strings, railway_strings, station_rows, coordinates, railway_rows
+        ):
+            _write_section(f, section.tobytes())
+        f.write(string_table)
+    os.replace(tmp_path, path)
+
+    return os.path.getsize(path)
+
+
+def load_graph_snapshot(
+    path: str,
+    source_hash: bytes
+) -> Optional[Tuple[NetworkGraph, List[tuple], List[tuple]]]:
+    """
+    Load a snapshot if it was built from the given source tables.
+
+    Sections are copied straight into typed arrays and the string table is
+    split once, so no SQL or JSON parsing is involved. Every string is
+    decoded once, so the rows share their ID and title strings with the
+    graph.
+
+    Args:
+        path: Path to the snapshot file
+        source_hash: graph_source_hash() of the current rows
+
+    Returns:
+        Tuple of (graph, station rows, railway rows), with station rows
+        shaped like STATION_QUERY and railway rows as (railway_id, title,
+        title_en), or None if the file is missing, corrupt or stale
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < _HEADER.size:
+        return None
+    (magic, version, bom, stored_hash, num_nodes, num_stations, num_edges,
+     num_railways, num_station_rows, num_railway_rows, strings_size) = _HEADER.unpack_from(data)
+    if (magic != _MAGIC or version != _FORMAT_VERSION
+            or bom != _BYTE_ORDER_MARK or stored_hash != source_hash):
+        return None
+
+    reader = _SectionReader(data, _HEADER.size)
+    try:
+        offsets = reader.read("i", num_nodes + 1)
+        targets = reader.read("i", num_edges)
+        weights = reader.read("f", num_edges)
+        railways = reader.read("H", num_edges)
+        node_strings = reader.read("i", num_nodes)
+        railway_strings = reader.read("i", num_railways)
+        station_fields = reader.read("i", 4 * num_station_rows)
+        coordinates = reader.read("d", 2 * num_station_rows)
+        railway_fields = reader.read("i", 3 * num_railway_rows)
+        strings = reader.read_strings(strings_size)
+    except ValueError:
+        return None
+    strings.append(None)  # _NO_STRING (-1) resolves to None
+
+    graph = NetworkGraph(
+        [strings[i] for i in node_strings],
+        [strings[i] for i in railway_strings],
+        offsets, targets, weights, railways,
+        num_stations=num_stations
+    )
+
+    station_rows = []
+    for row in range(num_station_rows):
+        station_id, title, title_en, railway = station_fields[4 * row:4 * row + 4]
+        lat, lon = coordinates[2 * row], coordinates[2 * row + 1]
+        station_rows.append((
+            strings[station_id], strings[title], strings[title_en], strings[railway],
+            None if math.isnan(lat) else lat,
+            None if math.isnan(lon) else lon
+        ))
+
+    railway_rows = []
+    for row in range(num_railway_rows):
+        railway_id, title, title_en = railway_fields[3 * row:3 * row + 3]
+        railway_rows.append((strings[railway_id], strings[title], strings[title_en]))
+
+    return graph, station_rows, railway_rows
+
+
+def _write_section(f, payload: bytes) -> None:
+    """Write one section, padded to 8-byte alignment."""
+    f.write(payload)
+    f.write(bytes(-len(payload) % 8))
+
+
+class _SectionReader:
+    """Sequential reader for the padded sections of a snapshot file."""
+
+    def __init__(self, data: bytes, start: int):
+        """Start reading data at byte offset start."""
+        self.view = memoryview(data)
+        self.position = start
+
+    def read(self, typecode: str, count: int) -> array:
+        """Copy the next section into a typed array of count items."""
+        values = array(typecode)
+        size = values.itemsize * count
+        end = self.position + size
+        if end > len(self.view):
+            raise ValueError("Truncated snapshot")
+        values.frombytes(self.view[self.position:end])
+        self.position = end + (-size % 8)
+        return values
+
+    def read_strings(self, size: int) -> List[Optional[str]]:
+        """Decode the string table (the last section)."""
+        end = self.position + size
+        if end != len(self.view):
+            raise ValueError("Truncated snapshot")
+        table = bytes(self.view[self.position:end]).decode("utf-8")
+        return table.split("\0")
@@ -0,0 +1,118 @@
+"""Incremental parsing of large JSON array responses."""
+
+import codecs
+import json
+from itertools import islice
+from typing import Any, Iterable, Iterator, List
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Parse a JSON array from a stream of UTF-8 byte chunks, one item at a time.
+
+    Only the unparsed tail of the body is buffered: each item is decoded as
+    soon as its closing bracket arrives and the text before it is dropped,
+    so memory is bounded by the chunk size and the largest single item
+    rather than by the whole body.
+
+    Args:
+        chunks: Pieces of the response body, e.g. response.iter_content()
+
+    Yields:
+        Each element of the top-level array, in order
+
+    Raises:
+        ValueError: If the body is not a JSON array, is cut off, or has an
+            empty element (as in "[1,,2]" or "[1,]")
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    started = False
+    seen_item = False
+    after_item = False  # The last token was an item, so "," or "]" must follow
+    chunks = iter(chunks)
+    finished = False
+    retry_size = 0  # Unparsed text needed before retrying an incomplete item
+
+    while True:
+        # Consume whatever complete items the buffer holds
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Response body is not a JSON array")
+                started = True
+                position += 1
+                continue
+            char = buffer[position]
+            if after_item:
+                if char == "]":
+                    return
+                # Items are only yielded once "," or "]" follows, so this is a comma
+                position += 1
+                after_item = False
+                continue
+            if char == "]" and not seen_item:
+                return
+            if char in ",]":
+                raise ValueError("Malformed JSON array: missing element")
+            if not finished and len(buffer) - position < retry_size:
+                break
+            try:
+                item, end = _DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if finished:
+                    raise ValueError("Truncated or malformed JSON array") from None
+                # The item continues in a later chunk; wait for the tail to
+                # double so a large item is not re-parsed for every chunk
+                retry_size = 2 * (len(buffer) - position)
+                break
+            # Only a following delimiter proves the item is complete: a
+            # number cut at a chunk boundary ("-15" of "-1500.0") parses too
+            after = end
+            while after < len(buffer) and buffer[after] in _WHITESPACE:
+                after += 1
+            if after == len(buffer) or buffer[after] not in ",]":
+                if finished:
+                    raise ValueError("Truncated or malformed JSON array")
+                retry_size = len(buffer) - position + 1
+                break
+            position = end
+            retry_size = 0
+            seen_item = after_item = True
+            yield item
+
+        if finished:
+            raise ValueError("Truncated JSON array")
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+            text = decoder.decode(b"", final=True)
+        else:
+            text = decoder.decode(chunk)
+        buffer = buffer[position:] + text
+        position = 0
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Group items into lists of at most size items.
+
+    Raises:
+        ValueError: If size is not positive
+    """
+    if size < 1:
+        raise ValueError("Chunk size must be positive")
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
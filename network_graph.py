@@ -0,0 +1,327 @@
+"""Compact array-backed railway network graph."""
+
+import hashlib
+import math
+from array import array
+from bisect import bisect_right
+from itertools import repeat
+from operator import add
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Railway index 0 is reserved for transfer edges between stations
+TRANSFER_RAILWAY = "Transfer"
+TRANSFER_INDEX = 0
+
+# Station complex hubs join same-name platforms; they are never real stations
+HUB_PREFIX = "hub:"
+
+
+class NetworkGraph:
+    """
+    Railway network stored in compressed sparse row (CSR) form.
+
+    Stations and railways are interned to integer indices. The outgoing
+    edges of node ``i`` occupy the slice ``offsets[i]:offsets[i + 1]`` of
+    the ``targets``, ``weights`` and ``railways`` arrays.
+
+    Nodes ``0 .. num_stations - 1`` are stations. Any nodes after them are
+    station complex hubs that only exist to route transfers.
+    """
+
+    def __init__(
+        self,
+        station_ids: List[str],
+        railway_ids: List[str],
+        offsets: array,
+        targets: array,
+        weights: array,
+        railways: array,
+        num_stations: Optional[int] = None
+    ):
+        """
+        Initialize the graph from prebuilt arrays.
+
+        Args:
+            station_ids: Station ID (or hub ID) for each node index
+            railway_ids: Railway ID for each railway index
+            offsets: Edge offset per node (length is node count + 1)
+            targets: Target node index per edge
+            weights: Travel time in minutes per edge
+            railways: Railway index per edge
+            num_stations: Number of leading nodes that are real stations
+                (defaults to all nodes)
+        """
+        self.num_stations = len(station_ids) if num_stations is None else num_stations
+        self.station_ids = station_ids
+        self.railway_ids = railway_ids
+        self.station_index = {sid: i for i, sid in enumerate(station_ids)}
+        self.railway_index = {rid: i for i, rid in enumerate(railway_ids)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.railways = railways
+        self._weight_steps: Dict[float, Optional[array]] = {}
+
+    def __len__(self) -> int:
+        """Number of nodes in the graph."""
+        return len(self.station_ids)
+
+    @property
+    def num_nodes(self) -> int:
+        """Number of nodes in the graph."""
+        return len(self.station_ids)
+
+    @property
+    def num_edges(self) -> int:
+        """Number of directed edges in the graph."""
+        return len(self.targets)
+
+    def is_hub(self, node: int) -> bool:
+        """Check whether a node is a station complex hub."""
+        return node >= self.num_stations
+
+    def index_of(self, station_id: str) -> Optional[int]:
+        """Get the node index for a station ID, or None if unknown."""
+        return self.station_index.get(station_id)
+
+    def station_id(self, index: int) -> str:
+        """Get the station ID for a node index."""
+        return self.station_ids[index]
+
+    def railway_id(self, index: int) -> str:
+        """Get the railway ID for a railway index."""
+        return self.railway_ids[index]
+
+    def edge_source(self, edge: int) -> int:
+        """Get the source node index of an edge."""
+        return bisect_right(self.offsets, edge) - 1
+
+    def edges(self, node: int) -> Iterator[Tuple[int, float, int]]:
+        """
+        Iterate over the outgoing edges of a node.
+
+        Yields:
+            Tuples of (target node, travel time, railway index)
+        """
+        for e in range(self.offsets[node], self.offsets[node + 1]):
+            yield self.targets[e], self.weights[e], self.railways[e]
+
+    def weight_steps(self, step: float) -> Optional[array]:
+        """
+        Express every edge weight as a whole number of steps.
+
+        Bucket-queue searches index their buckets by these counts. The
+        result is computed once per step size and cached.
+
+        Args:
+            step: Step size in minutes
+
+        Returns:
+            Number of steps per edge, or None if some weight is not a
+            positive whole multiple of the step
+        """
+        if step not in self._weight_steps:
+            steps = array("i")
+            for weight in self.weights:
+                # fmod is exact, so a zero remainder means an exact multiple
+                if weight <= 0 or math.fmod(weight, step) != 0:
+                    steps = None
+                    break
+                steps.append(round(weight / step))
+            self._weight_steps[step] = steps
+        return self._weight_steps[step]
+
+    def fingerprint(self) -> bytes:
+        """
+        SHA-256 digest of the graph's stations, railways and edges.
+
+        Derived data such as precomputed travel-time matrices store this
+        digest so they can detect that the graph they were built from changed.
+        """
+        digest = hashlib.sha256()
+        digest.update("\0".join(self.station_ids).encode("utf-8"))
+        digest.update(b"\1")
+        digest.update("\0".join(self.railway_ids).encode("utf-8"))
+        digest.update(self.num_stations.to_bytes(4, "little"))
+        for a in (self.offsets, self.targets, self.weights, self.railways):
+            digest.update(a.tobytes())
+        return digest.digest()
+
+    def replace_edges(
+        self,
+        adjacency: Dict[int, List[Tuple[int, float, int]]],
+        station_ids: Optional[List[str]] = None,
+        railway_ids: Optional[List[str]] = None
+    ) -> "NetworkGraph":
+        """
+        Copy the graph with the outgoing edges of some nodes replaced.
+
+        Runs of untouched nodes are copied as whole array slices, so the
+        Python-level work is proportional to the number of replaced nodes.
+
+        Args:
+            adjacency: New (target, travel time, railway index) edges per
+                replaced node; nodes not listed keep their edges
+            station_ids: Node IDs of the new graph; may append hub nodes
+                (defaults to the current IDs)
+            railway_ids: Railway IDs of the new graph; may append railways
+                (defaults to the current IDs)
+
+        Returns:
+            New NetworkGraph (this graph is left unchanged)
+        """
+        station_ids = list(self.station_ids if station_ids is None else station_ids)
+        railway_ids = list(self.railway_ids if railway_ids is None else railway_ids)
+        old_nodes = len(self.station_ids)
+        old_offsets = self.offsets
+
+        offsets = array("i", [0])
+        targets = array("i")
+        weights = array("f")
+        railways = array("H")
+        start = 0  # First node of the current run of untouched nodes
+        for node in sorted(adjacency) + [len(station_ids)]:
+            end = min(node, old_nodes)
+            if start < end:
+                first, last = old_offsets[start], old_offsets[end]
+                shift = len(targets) - first
+                offsets.extend(map(add, old_offsets[start + 1:end + 1], repeat(shift)))
+                targets.extend(self.targets[first:last])
+                weights.extend(self.weights[first:last])
+                railways.extend(self.railways[first:last])
+            # Appended nodes without replacement edges have none
+            offsets.extend(repeat(len(targets), node - max(start, end)))
+            if node == len(station_ids):
+                break
+            for target, weight, railway in adjacency[node]:
+                targets.append(target)
+                weights.append(weight)
+                railways.append(railway)
+            offsets.append(len(targets))
+            start = node + 1
+
+        return NetworkGraph(
+            station_ids, railway_ids, offsets, targets, weights, railways, self.num_stations
+        )
+
+    def memory_usage(self) -> int:
+        """Approximate size of the edge arrays in bytes."""
+        return sum(
+            a.itemsize * len(a)
+            for a in (self.offsets, self.targets, self.weights, self.railways)
+        )
+
+
+class NetworkGraphBuilder:
+    """Accumulates stations and edges, then packs them into a NetworkGraph."""
+
+    def __init__(self):
+        """Initialize an empty builder."""
+        self.station_ids: List[str] = []
+        self.station_index: Dict[str, int] = {}
+        self.railway_ids: List[str] = [TRANSFER_RAILWAY]
+        self.railway_index: Dict[str, int] = {TRANSFER_RAILWAY: TRANSFER_INDEX}
+        self._sources = array("i")
+        self._targets = array("i")
+        self._weights = array("f")
+        self._railways = array("H")
+        self._has_edges = bytearray()
+        self._num_stations: Optional[int] = None
+
+    def add_station(self, station_id: str) -> int:
+        """
+        Intern a station ID and return its node index.
+
+        Raises:
+            ValueError: If a new station is added after the first hub
+        """
+        index = self.station_index.get(station_id)
+        if index is None:
+            if self._num_stations is not None:
+                raise ValueError(f"Cannot add station {station_id} after hubs")
+            index = len(self.station_ids)
+            self.station_index[station_id] = index
+            self.station_ids.append(station_id)
+            self._has_edges.append(0)
+        return index
+
+    def add_hub(self, name: str) -> int:
+        """
+        Add a station complex hub node and return its node index.
+
+        Hubs are placed after every station, so all stations must be
+        added before the first hub.
+        """
+        if self._num_stations is None:
+            self._num_stations = len(self.station_ids)
+        hub_id = HUB_PREFIX + name
+        index = self.station_index.get(hub_id)
+        if index is None:
+            index = len(self.station_ids)
+            self.station_index[hub_id] = index
+            self.station_ids.append(hub_id)
+            self._has_edges.append(0)
+        return index
+
+    def add_railway(self, railway_id: str) -> int:
+        """Intern a railway ID and return its railway index."""
+        index = self.railway_index.get(railway_id)
+        if index is None:
+            index = len(self.railway_ids)
+            self.railway_index[railway_id] = index
+            self.railway_ids.append(railway_id)
+        return index
+
+    def add_edge(self, source: int, target: int, weight: float, railway: int) -> None:
+        """Add a directed edge between two node indices."""
+        self._sources.append(source)
+        self._targets.append(target)
+        self._weights.append(weight)
+        self._railways.append(railway)
+        self._has_edges[source] = 1
+
+    def has_edges(self, node: int) -> bool:
+        """Check whether any edge has been added from a node."""
+        return bool(self._has_edges[node])
+
+    @property
+    def num_connected(self) -> int:
+        """Number of stations with at least one outgoing edge."""
+        return sum(self._has_edges[:self._num_stations])
+
+    def build(self) -> NetworkGraph:
+        """
+        Pack the accumulated edges into CSR arrays.
+
+        Edges keep their insertion order within each source node.
+        """
+        num_nodes = len(self.station_ids)
+        num_edges = len(self._sources)
+
+        offsets = array("i", bytes(4 * (num_nodes + 1)))
+        for source in self._sources:
+            offsets[source + 1] += 1
+        for i in range(num_nodes):
+            offsets[i + 1] += offsets[i]
+
+        cursor = array("i", offsets[:num_nodes])
+        targets = array("i", bytes(4 * num_edges))
+        weights = array("f", bytes(4 * num_edges))
+        railways = array("H", bytes(2 * num_edges))
+        for e in range(num_edges):
+            source = self._sources[e]
+            slot = cursor[source]
+            cursor[source] = slot + 1
+            targets[slot] = self._targets[e]
+            weights[slot] = self._weights[e]
+            railways[slot] = self._railways[e]
+
+        return NetworkGraph(
+            list(self.station_ids),
+            list(self.railway_ids),
+            offsets,
+            targets,
+            weights,
+            railways,
+            self._num_stations
+        )
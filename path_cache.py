@@ -0,0 +1,164 @@
+"""Bounded LRU cache of per-origin shortest-path trees."""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Generic, Optional, Tuple, TypeVar
+
+from path_search import ParetoTree, ShortestPathTree
+
+# Per-origin search results the cache holds; both expose origin and memory_usage()
+Tree = TypeVar("Tree", ShortestPathTree, ParetoTree)
+
+
+class ShortestPathTreeCache(Generic[Tree]):
+    """
+    LRU cache mapping (graph version, origin node index) to an unbounded
+    per-origin search result (a ShortestPathTree or a ParetoTree).
+
+    Trees are stored without a max_time bound so one entry serves every
+    query radius; callers filter by distance. Entries are evicted when
+    either the entry count or the approximate memory budget is exceeded.
+    Every lookup carries the graph version it was computed against, so
+    requests pinned to different snapshots during a reload each find their
+    own trees; trees of superseded versions stop being used and age out.
+    Recent misses are remembered so callers can tell a repeated origin,
+    worth a full tree, from a one-off that a bounded search serves better.
+    The cache is shared by concurrent requests, so access is locked.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Maximum number of trees to keep (0 disables caching)
+            max_bytes: Approximate memory budget for all cached trees
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version: Optional[int] = None  # Newest graph version seen
+        self._trees: "OrderedDict[Tuple[int, int], Tree]" = OrderedDict()
+        self._bytes = 0
+        self._misses: "OrderedDict[Tuple[int, int], int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.version_changes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of cached trees."""
+        return len(self._trees)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything at all."""
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, origin: int, version: int) -> Optional[Tree]:
+        """
+        Look up the tree for an origin, counting a hit or a miss.
+
+        Args:
+            origin: Origin node index
+            version: Version of the graph the caller is searching
+
+        Returns:
+            Cached tree, or None on a miss
+        """
+        key = (version, origin)
+        with self._lock:
+            self._check_version(version)
+            tree = self._trees.get(key)
+            if tree is None:
+                self.misses += 1
+                self._misses[key] = self._misses.pop(key, 0) + 1
+                while len(self._misses) > self.max_entries:
+                    self._misses.popitem(last=False)
+                return None
+
+            self._trees.move_to_end(key)
+            self.hits += 1
+            return tree
+
+    def missed_repeatedly(self, origin: int, version: int) -> bool:
+        """
+        Whether an origin has missed more than once since it was last stored.
+
+        Args:
+            origin: Origin node index
+            version: Version of the graph the caller is searching
+        """
+        with self._lock:
+            return self._misses.get((version, origin), 0) > 1
+
+    def put(self, tree: Tree, version: int) -> None:
+        """
+        Store a tree, evicting least recently used entries to fit the budget.
+
+        Args:
+            tree: Unbounded tree to store
+            version: Version of the graph the tree was computed on
+        """
+        if not self.enabled:
+            return
+
+        size = tree.memory_usage()
+        if size > self.max_bytes:
+            return
+
+        key = (version, tree.origin)
+        with self._lock:
+            self._check_version(version)
+            self._misses.pop(key, None)
+            previous = self._trees.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.memory_usage()
+
+            while self._trees and (
+                len(self._trees) >= self.max_entries or self._bytes + size > self.max_bytes
+            ):
+                _, evicted = self._trees.popitem(last=False)
+                self._bytes -= evicted.memory_usage()
+                self.evictions += 1
+
+            self._trees[key] = tree
+            self._bytes += size
+
+    def clear(self) -> None:
+        """Drop all cached trees (counters are kept)."""
+        with self._lock:
+            self._trees.clear()
+            self._misses.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters and current occupancy."""
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> Dict[str, int]:
+        """Counters and occupancy; the caller holds the lock."""
+        return {
+            "entries": len(self._trees),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "version_changes": self.version_changes,
+        }
+
+    def _check_version(self, version: int) -> None:
+        """
+        Note a newer graph version; the caller holds the lock.
+
+        Trees of older versions are not dropped, since requests pinned to
+        the previous snapshot may still be using them; they are evicted by
+        LRU once those requests are done with them.
+        """
+        if self.version is None or version > self.version:
+            if self._trees:
+                self.version_changes += 1
+            self.version = version
@@ -0,0 +1,748 @@
+"""Shortest-path searches over the compact network graph."""
+
+import os
+import sys
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress, repeat
+from operator import add, eq, le, mul
+from heapq import heappush, heappop, heapreplace, nsmallest
+from typing import Collection, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import config
+from network_graph import NetworkGraph
+
+INFINITY = float("inf")
+_FLOAT_SIZE = sys.getsizeof(0.0)
+
+
+class ShortestPathTree:
+    """
+    Result of a single-origin search: distances and predecessor pointers.
+
+    Routes are not materialized during the search. ``pred_edge[v]`` records
+    the edge ``v`` was reached by, so the path to any settled node can be
+    rebuilt by walking back to the origin.
+    """
+
+    def __init__(self, origin: int, num_nodes: int):
+        """
+        Initialize an empty tree.
+
+        Args:
+            origin: Node index the search starts from
+            num_nodes: Number of nodes in the graph
+        """
+        self.origin = origin
+        self.dist: List[float] = [INFINITY] * num_nodes
+        self.pred_edge = array("i", [-1]) * num_nodes
+        self.order: List[int] = []  # Settled nodes in non-decreasing distance
+
+    def __len__(self) -> int:
+        """Number of settled (reachable) nodes."""
+        return len(self.order)
+
+    def reached(self, node: int) -> bool:
+        """Check whether a node was reached by the search."""
+        return self.dist[node] < INFINITY
+
+    def memory_usage(self) -> int:
+        """Approximate size of the tree in bytes."""
+        return (
+            sys.getsizeof(self.dist)
+            + _FLOAT_SIZE * len(self.order)
+            + self.pred_edge.itemsize * len(self.pred_edge)
+            + sys.getsizeof(self.order)
+        )
+
+    def path_edges(self, graph: NetworkGraph, node: int) -> List[int]:
+        """
+        Get the edge indices on the path from the origin to a node.
+
+        Returns:
+            Edge indices in travel order (empty for the origin itself)
+        """
+        return trace_path(graph, self.origin, self.pred_edge, node)
+
+
+def trace_path(
+    graph: NetworkGraph,
+    origin: int,
+    pred_edge: Sequence[int],
+    node: int
+) -> List[int]:
+    """
+    Walk predecessor edges back from a node to the origin.
+
+    Args:
+        graph: Graph the predecessor edges index into
+        origin: Node index the search started from
+        pred_edge: Predecessor edge index per node
+        node: Node index to trace back from
+
+    Returns:
+        Edge indices in travel order (empty for the origin itself)
+    """
+    edges = []
+    while node != origin:
+        e = pred_edge[node]
+        edges.append(e)
+        node = graph.edge_source(e)
+    edges.reverse()
+    return edges
+
+
+def dijkstra(graph: NetworkGraph, origin: int, max_time: float) -> ShortestPathTree:
+    """
+    Run Dijkstra's algorithm keeping only distances and predecessors.
+
+    With config.SEARCH_QUEUE set to "bucket" and every edge weight a whole
+    multiple of config.SEARCH_BUCKET_STEP, the search uses a bucket queue
+    (see _bucket_dijkstra); otherwise it uses a binary heap. Both return
+    identical trees.
+
+    Args:
+        graph: Network graph to search
+        origin: Starting node index
+        max_time: Maximum travel time to consider (in minutes)
+
+    Returns:
+        ShortestPathTree with every node reachable within max_time settled
+    """
+    if config.SEARCH_QUEUE == "bucket":
+        steps = graph.weight_steps(config.SEARCH_BUCKET_STEP)
+        if steps is not None:
+            return _bucket_dijkstra(graph, origin, max_time, steps)
+    return _heap_dijkstra(graph, origin, max_time)
+
+
+def _heap_dijkstra(graph: NetworkGraph, origin: int, max_time: float) -> ShortestPathTree:
+    """Dijkstra's algorithm over a binary heap of (time, node) entries."""
+    tree = ShortestPathTree(origin, len(graph))
+    dist = tree.dist
+    pred_edge = tree.pred_edge
+    order = tree.order
+
+    offsets = graph.offsets
+    targets = graph.targets
+    weights = graph.weights
+
+    visited = bytearray(len(graph))
+    dist[origin] = 0.0
+    pq = [(0.0, origin)]
+
+    while pq:
+        current_time, current = heappop(pq)
+
+        if visited[current]:
+            continue
+
+        visited[current] = 1
+        order.append(current)
+
+        for e in range(offsets[current], offsets[current + 1]):
+            new_time = current_time + weights[e]
+
+            if new_time <= max_time:
+                next_node = targets[e]
+                if new_time < dist[next_node]:
+                    dist[next_node] = new_time
+                    pred_edge[next_node] = e
+                    heappush(pq, (new_time, next_node))
+
+    return tree
+
+
+def _bucket_dijkstra(
+    graph: NetworkGraph,
+    origin: int,
+    max_time: float,
+    steps: Sequence[int]
+) -> ShortestPathTree:
+    """
+    Dijkstra's algorithm over a bucket queue (Dial's algorithm).
+
+    Every weight is a whole number of steps, so every node in a bucket has
+    the same distance and the queue only holds node indices: no tuples and
+    no heap sifting. Edges are at least one step long, so a node never
+    lands in the bucket being settled, and a ring of max(steps) + 1
+    buckets is enough. Buckets are settled in node order, which is the
+    heap's tie-break, so the tree matches _heap_dijkstra exactly.
+
+    Args:
+        graph: Network graph to search
+        origin: Starting node index
+        max_time: Maximum travel time to consider (in minutes)
+        steps: graph.weight_steps() of the bucket step size
+
+    Returns:
+        ShortestPathTree with every node reachable within max_time settled
+    """
+    tree = ShortestPathTree(origin, len(graph))
+    dist = tree.dist
+    pred_edge = tree.pred_edge
+    order = tree.order
+
+    offsets = graph.offsets
+    targets = graph.targets
+    weights = graph.weights
+
+    visited = bytearray(len(graph))
+    dist[origin] = 0.0
+    ring = max(steps, default=0) + 1
+    buckets: List[List[int]] = [[] for _ in range(ring)]
+    buckets[0].append(origin)
+    pending = 1  # Entries left in the buckets, including stale ones
+    position = 0
+
+    while pending:
+        bucket = buckets[position % ring]
+        pending -= len(bucket)
+        bucket.sort()
+
+        for current in bucket:
+            if visited[current]:
+                continue
+
+            visited[current] = 1
+            order.append(current)
+            current_time = dist[current]
+
+            for e in range(offsets[current], offsets[current + 1]):
+                new_time = current_time + weights[e]
+
+                if new_time <= max_time:
+                    next_node = targets[e]
+                    if new_time < dist[next_node]:
+                        dist[next_node] = new_time
+                        pred_edge[next_node] = e
+                        buckets[(position + steps[e]) % ring].append(next_node)
+                        pending += 1
+
+        bucket.clear()
+        position += 1
+
+    return tree
+
+
+class ParetoTree:
+    """
+    Non-dominated (travel time, transfers) labels of a single-origin search.
+
+    Labels are grouped into rounds by transfer count: ``dist[k][v]`` is the
+    fastest time to reach ``v`` with exactly ``k`` transfers, kept only if it
+    beats every label of ``v`` with fewer transfers (``inf`` otherwise), and
+    ``pred_edge[k][v]`` the edge that label was reached by. Boarding a
+    station complex hub counts as one transfer.
+    """
+
+    def __init__(self, origin: int, num_nodes: int):
+        """
+        Initialize an empty tree.
+
+        Args:
+            origin: Node index the search starts from
+            num_nodes: Number of nodes in the graph
+        """
+        self.origin = origin
+        self.num_nodes = num_nodes
+        self.dist: List[List[float]] = []
+        self.pred_edge: List[array] = []
+        self.order: List[List[int]] = []  # Labelled nodes per round, by time
+
+    def __len__(self) -> int:
+        """Number of labels over all rounds."""
+        return sum(map(len, self.order))
+
+    def memory_usage(self) -> int:
+        """Approximate size of the tree in bytes."""
+        return sum(
+            sys.getsizeof(dist) + _FLOAT_SIZE * len(order)
+            + pred.itemsize * len(pred) + sys.getsizeof(order)
+            for dist, pred, order in zip(self.dist, self.pred_edge, self.order)
+        )
+
+    def penalized_times(
+        self,
+        transfer_penalty: float,
+        max_time: float,
+        num_nodes: int
+    ) -> Tuple[List[float], array]:
+        """
+        Pick the best label per node for a given cost per transfer.
+
+        Args:
+            transfer_penalty: Minutes added per transfer when comparing labels
+            max_time: Labels slower than this are ignored
+            num_nodes: Number of leading nodes to score
+
+        Returns:
+            Tuple of (cost, transfers) per node, where cost is the smallest
+            time + transfers * transfer_penalty (inf if unreached) and
+            transfers identifies the chosen label (-1 if unreached)
+        """
+        costs = [INFINITY] * num_nodes
+        chosen = array("b", [-1]) * num_nodes
+        for k, (dist, order) in enumerate(zip(self.dist, self.order)):
+            penalty = transfer_penalty * k
+            for node in order:
+                if node < num_nodes and dist[node] <= max_time:
+                    cost = dist[node] + penalty
+                    if cost < costs[node]:
+                        costs[node] = cost
+                        chosen[node] = k
+        return costs, chosen
+
+    def path_edges(self, graph: NetworkGraph, node: int, transfers: int) -> List[int]:
+        """
+        Get the edge indices of one label's path from the origin.
+
+        Args:
+            graph: Graph the predecessor edges index into
+            node: Node index of the label
+            transfers: Round (transfer count) of the label
+
+        Returns:
+            Edge indices in travel order (empty for the origin itself)
+        """
+        edges = []
+        k = transfers
+        while k > 0 or node != self.origin:
+            e = self.pred_edge[k][node]
+            edges.append(e)
+            source = graph.edge_source(e)
+            if graph.is_hub(node) and not graph.is_hub(source):
+                k -= 1
+            node = source
+        edges.reverse()
+        return edges
+
+
+def pareto_search(
+    graph: NetworkGraph,
+    origin: int,
+    max_time: float,
+    max_transfers: int
+) -> ParetoTree:
+    """
+    Label-setting search for every non-dominated (time, transfers) label.
+
+    Labels are processed in rounds of equal transfer count, each round a
+    Dijkstra over a single heap; boarding a hub queues the label for the
+    next round instead. A label is kept only if it is strictly faster than
+    every label of its node from earlier rounds, so each round only touches
+    the nodes it improves and the total work stays a small multiple of one
+    plain search.
+
+    Args:
+        graph: Network graph to search
+        origin: Starting node index
+        max_time: Maximum travel time to consider (in minutes)
+        max_transfers: Highest transfer count to label
+
+    Returns:
+        ParetoTree with one round per transfer count that produced labels
+    """
+    num_nodes = len(graph)
+    tree = ParetoTree(origin, num_nodes)
+    offsets = graph.offsets
+    targets = graph.targets
+    weights = graph.weights
+    num_stations = graph.num_stations
+
+    best = [INFINITY] * num_nodes  # Fastest label from earlier rounds
+    dist = [INFINITY] * num_nodes
+    pred_edge = array("i", [-1]) * num_nodes
+    dist[origin] = 0.0
+    pq = [(0.0, origin)]
+
+    for k in range(max_transfers + 1):
+        order: List[int] = []
+        next_dist = [INFINITY] * num_nodes
+        next_pred_edge = array("i", [-1]) * num_nodes
+        next_pq: List[Tuple[float, int]] = []
+        can_transfer = k < max_transfers
+
+        while pq:
+            current_time, current = heappop(pq)
+            if current_time > dist[current]:
+                continue
+            if current_time >= best[current]:
+                # Queued from the previous round, then beaten within it
+                dist[current] = INFINITY
+                pred_edge[current] = -1
+                continue
+            order.append(current)
+            boards = current < num_stations
+
+            for e in range(offsets[current], offsets[current + 1]):
+                new_time = current_time + weights[e]
+                if new_time > max_time:
+                    continue
+                next_node = targets[e]
+                if boards and next_node >= num_stations:
+                    if (can_transfer and new_time < next_dist[next_node]
+                            and new_time < dist[next_node] and new_time < best[next_node]):
+                        next_dist[next_node] = new_time
+                        next_pred_edge[next_node] = e
+                        heappush(next_pq, (new_time, next_node))
+                elif new_time < dist[next_node] and new_time < best[next_node]:
+                    dist[next_node] = new_time
+                    pred_edge[next_node] = e
+                    heappush(pq, (new_time, next_node))
+
+        if not order:
+            break
+        for node in order:
+            best[node] = dist[node]
+        tree.dist.append(dist)
+        tree.pred_edge.append(pred_edge)
+        tree.order.append(order)
+        dist, pred_edge, pq = next_dist, next_pred_edge, next_pq
+
+    return tree
+
+
+# Graph shared by the worker processes of shortest_path_trees
+_worker_graph: Optional[NetworkGraph] = None
+
+
+def _init_worker(graph: NetworkGraph) -> None:
+    """Store the graph once per worker process."""
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _worker_tree(origin: int) -> ShortestPathTree:
+    """Compute one unbounded tree in a worker process."""
+    return dijkstra(_worker_graph, origin, INFINITY)
+
+
+def _map_trees(
+    executor: ProcessPoolExecutor,
+    origins: List[int],
+    workers: int
+) -> Dict[int, ShortestPathTree]:
+    """Compute the trees of distinct origins on a pool of initialized workers."""
+    chunksize = max(1, len(origins) // (4 * workers))
+    trees = executor.map(_worker_tree, origins, chunksize=chunksize)
+    return dict(zip(origins, trees))
+
+
+class ShortestPathPool:
+    """
+    Long-lived worker processes for shortest_path_trees.
+
+    Starting a pool forks the process and sends it the graph, so servers
+    keep one pool across requests instead of starting one per call. The
+    workers hold one graph at a time; a call with a different graph (after
+    a rebuild) replaces them. Calls are serialized, since each one already
+    uses every worker.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Create the pool; worker processes start on first use.
+
+        Args:
+            max_workers: Worker processes (None uses the CPU count)
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._graph: Optional[NetworkGraph] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def trees(self, graph: NetworkGraph, origins: List[int]) -> Dict[int, ShortestPathTree]:
+        """
+        Compute the unbounded trees of distinct origins in the worker processes.
+
+        Args:
+            graph: Network graph to search
+            origins: Distinct origin node indices
+
+        Returns:
+            Dictionary mapping each origin to its tree
+        """
+        with self._lock:
+            if self._executor is None or self._graph is not graph:
+                self._shutdown()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=_init_worker, initargs=(graph,)
+                )
+                self._graph = graph
+            return _map_trees(self._executor, origins, self.max_workers)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (a later call starts new ones)."""
+        with self._lock:
+            self._shutdown()
+
+    def _shutdown(self) -> None:
+        """Stop the workers; the caller holds the lock."""
+        if self._executor is not None:
+            self._executor.shutdown()
+        self._executor = None
+        self._graph = None
+
+
+def shortest_path_trees(
+    graph: NetworkGraph,
+    origins: Iterable[int],
+    max_workers: Optional[int] = None,
+    min_pool_size: int = 1,
+    pool: Optional[ShortestPathPool] = None
+) -> Dict[int, ShortestPathTree]:
+    """
+    Compute unbounded shortest-path trees for many origins.
+
+    Duplicate origins are searched once. When there are at least
+    min_pool_size distinct origins and more than one worker, the searches
+    run in a process pool; the graph is sent to each worker once.
+
+    Args:
+        graph: Network graph to search
+        origins: Origin node indices (duplicates allowed)
+        max_workers: Worker processes (None uses the CPU count); ignored
+            when a pool is given
+        min_pool_size: Fewest origins worth using worker processes for
+        pool: Long-lived pool to run on, instead of starting one for this call
+
+    Returns:
+        Dictionary mapping each distinct origin to its tree
+    """
+    unique = list(dict.fromkeys(origins))
+    if pool is not None:
+        max_workers = pool.max_workers
+    workers = min(max_workers or os.cpu_count() or 1, len(unique))
+    if workers <= 1 or len(unique) < min_pool_size:
+        return {origin: dijkstra(graph, origin, INFINITY) for origin in unique}
+
+    if pool is not None:
+        return pool.trees(graph, unique)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(graph,)
+    ) as executor:
+        return _map_trees(executor, unique, workers)
+
+
+def meeting_point_search(
+    graph: NetworkGraph,
+    origin_a: int,
+    origin_b: int,
+    max_time: float,
+    top_n: int,
+    exclude: Collection[int] = ()
+) -> Tuple[ShortestPathTree, ShortestPathTree, List[Tuple[float, float, int]]]:
+    """
+    Find the top_n meeting nodes by expanding from both origins in lockstep.
+
+    A node becomes a candidate once it is settled from both sides, at which
+    point its total time is exact. Every other node's total is bounded below
+    by the two search frontiers, so the search stops as soon as that bound
+    exceeds the k-th best total found so far.
+
+    Args:
+        graph: Network graph to search
+        origin_a: First origin node index
+        origin_b: Second origin node index
+        max_time: Maximum travel time per origin (in minutes)
+        top_n: Number of meeting nodes to return
+        exclude: Node indices that may not be returned as candidates
+            (station complex hubs are never returned)
+
+    Returns:
+        Tuple of (tree_a, tree_b, ranked) where ranked holds
+        (total_time, time_difference, node) sorted ascending. The trees are
+        partial but valid for every ranked node.
+    """
+    num_nodes = len(graph)
+    trees = (ShortestPathTree(origin_a, num_nodes), ShortestPathTree(origin_b, num_nodes))
+    visited = (bytearray(num_nodes), bytearray(num_nodes))
+    queues = ([(0.0, origin_a)], [(0.0, origin_b)])
+    trees[0].dist[origin_a] = 0.0
+    trees[1].dist[origin_b] = 0.0
+
+    offsets = graph.offsets
+    targets = graph.targets
+    weights = graph.weights
+    num_stations = graph.num_stations
+
+    # Max-heap (via negated keys) of the best top_n candidates so far
+    best: List[Tuple[float, float, int]] = []
+    # Position of the first node settled on one side only, per side
+    one_sided = [0, 0]
+
+    while top_n > 0:
+        radius = [INFINITY, INFINITY]
+        for side in (0, 1):
+            pq = queues[side]
+            while pq and visited[side][pq[0][1]]:
+                heappop(pq)
+            if pq:
+                radius[side] = pq[0][0]
+
+        if radius[0] == INFINITY and radius[1] == INFINITY:
+            break
+
+        # Lower bound on the total time of any node not yet settled on both sides
+        bound = radius[0] + radius[1]
+        for side in (0, 1):
+            order = trees[side].order
+            other_visited = visited[1 - side]
+            i = one_sided[side]
+            while i < len(order) and other_visited[order[i]]:
+                i += 1
+            one_sided[side] = i
+            if i < len(order):
+                bound = min(bound, trees[side].dist[order[i]] + radius[1 - side])
+
+        if len(best) == top_n and bound > -best[0][0]:
+            break
+
+        side = 0 if radius[0] <= radius[1] else 1
+        tree = trees[side]
+        dist = tree.dist
+        current_time, current = heappop(queues[side])
+        visited[side][current] = 1
+        tree.order.append(current)
+
+        if visited[1 - side][current] and current < num_stations and current not in exclude:
+            other_time = trees[1 - side].dist[current]
+            key = (
+                -(current_time + other_time),
+                -abs(current_time - other_time),
+                -current
+            )
+            if len(best) < top_n:
+                heappush(best, key)
+            elif key > best[0]:
+                heapreplace(best, key)
+
+        pq = queues[side]
+        pred_edge = tree.pred_edge
+        for e in range(offsets[current], offsets[current + 1]):
+            new_time = current_time + weights[e]
+
+            if new_time <= max_time:
+                next_node = targets[e]
+                if new_time < dist[next_node]:
+                    dist[next_node] = new_time
+                    pred_edge[next_node] = e
+                    heappush(pq, (new_time, next_node))
+
+    ranked = sorted((-total, -diff, -node) for total, diff, node in best)
+    return trees[0], trees[1], ranked
+
+
+def rank_meeting_points(
+    times_a: Sequence,
+    times_b: Sequence,
+    limit: float,
+    top_n: int,
+    exclude: Collection[int] = ()
+) -> List[Tuple[float, float, int]]:
+    """
+    Rank meeting nodes from two complete per-node travel time vectors.
+
+    Totals and the per-origin limit filter are computed in C-level passes
+    over the vectors, and the best nodes are picked with a top-k heap
+    selection instead of sorting every node, so only the top_n (plus ties)
+    are looked at individually.
+
+    Args:
+        times_a: Travel time from the first origin per node
+        times_b: Travel time from the second origin per node
+        limit: Maximum travel time per origin (same unit as the vectors)
+        top_n: Number of meeting nodes to return
+        exclude: Node indices that may not be returned
+
+    Returns:
+        List of (total_time, time_difference, node) sorted ascending
+    """
+    if top_n <= 0:
+        return []
+
+    totals = list(map(add, times_a, times_b))
+    within_a = list(compress(range(len(totals)), map(le, times_a, repeat(limit))))
+    candidates = list(compress(within_a, map(le, map(times_b.__getitem__, within_a), repeat(limit))))
+
+    ranked = [
+        (totals[node], abs(times_a[node] - times_b[node]), node)
+        for node in _smallest_nodes(totals, candidates, top_n + len(exclude))
+        if node not in exclude
+    ]
+    ranked.sort()
+    return ranked[:top_n]
+
+
+def _smallest_nodes(keys: List[float], nodes: List[int], count: int) -> List[int]:
+    """
+    Select the count nodes with the smallest keys, plus every node tied with the last.
+
+    Ties are kept so callers can break them on a secondary key. Runs in
+    O(N log count) with the key lookups and tie scan at C speed.
+    """
+    chosen = nsmallest(count, nodes, key=keys.__getitem__)
+    if len(chosen) < count or not chosen:
+        return chosen
+    last = keys[chosen[-1]]
+    tied = compress(nodes, map(eq, map(keys.__getitem__, nodes), repeat(last)))
+    return list(dict.fromkeys([*chosen, *tied]))
+
+
+def rank_group_meeting_points(
+    time_vectors: Sequence[Sequence],
+    weights: Sequence[float],
+    limit: float,
+    top_n: int,
+    objective: str = "sum",
+    exclude: Collection[int] = ()
+) -> List[Tuple[float, float, float, int]]:
+    """
+    Rank meeting nodes for any number of origins from per-node time vectors.
+
+    The weighted sum, maximum and minimum over origins are each built in
+    one C-level pass over the aligned vectors, so no Python code runs per
+    node and origin. The best nodes by the objective are then picked with a
+    top-k heap selection, so only the top_n (plus ties) are looked at
+    individually.
+
+    Args:
+        time_vectors: Travel time from each origin per node (aligned by node)
+        weights: Positive weight of each origin in the weighted sum
+        limit: Maximum travel time per origin (same unit as the vectors)
+        top_n: Number of meeting nodes to return
+        objective: "sum" ranks by weighted total, "max" by the longest commute
+        exclude: Node indices that may not be returned
+
+    Returns:
+        List of (weighted_total, longest, spread, node) sorted by the
+        objective, then spread (longest minus shortest commute), then node
+    """
+    if top_n <= 0 or not time_vectors:
+        return []
+
+    weighted = [
+        vector if weight == 1 else list(map(mul, vector, repeat(weight)))
+        for vector, weight in zip(time_vectors, weights)
+    ]
+    totals = list(map(sum, zip(*weighted)))
+    if len(time_vectors) == 1:
+        longest = shortest = list(time_vectors[0])
+    else:
+        longest = list(map(max, *time_vectors))
+        shortest = list(map(min, *time_vectors))
+    primary = totals if objective == "sum" else longest
+
+    candidates = list(compress(range(len(primary)), map(le, longest, repeat(limit))))
+    ranked = [
+        (primary[node], longest[node] - shortest[node], node)
+        for node in _smallest_nodes(primary, candidates, top_n + len(exclude))
+        if node not in exclude
+    ]
+    ranked.sort()
+    return [
+        (totals[node], longest[node], spread, node)
+        for _, spread, node in ranked[:top_n]
+    ]
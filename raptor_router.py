@@ -0,0 +1,416 @@
+"""Range RAPTOR profile queries over a window of departure times."""
+
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from network_graph import NetworkGraph, TRANSFER_INDEX
+from path_search import INFINITY
+from timetable_router import load_trips, station_complex_footpaths, trip_hops
+
+# Leg markers stored in a profile entry's route field
+WALK = -1
+AT_TARGET = -2
+
+# (departure, arrival, trips, route, trip, board, alight) — for a WALK leg
+# ``trip`` is the stop walked to; AT_TARGET entries have no leg
+ProfileEntry = Tuple[int, int, int, int, int, int, int]
+
+
+class DepartureProfiles:
+    """
+    Pareto profiles towards one target stop, for every stop at once.
+
+    ``entries[u]`` lists the journeys from stop ``u`` that are Pareto-optimal
+    in (later departure, earlier arrival, fewer trips). Each entry also
+    records its first leg, so the full journey can be rebuilt by following
+    the entries of the stops it reaches.
+    """
+
+    def __init__(self, target: int, earliest: int, latest: int, max_trips: int):
+        """
+        Initialize empty profiles.
+
+        Args:
+            target: Target stop (graph node index), e.g. a workplace
+            earliest: Start of the departure window (minutes since midnight)
+            latest: End of the departure window (minutes since midnight)
+            max_trips: Maximum number of trips per journey
+        """
+        self.target = target
+        self.earliest = earliest
+        self.latest = latest
+        self.max_trips = max_trips
+        self.entries: Dict[int, List[ProfileEntry]] = {}
+
+    def best_entry(
+        self,
+        stop: int,
+        depart_after: int,
+        max_trips: int,
+        legs_only: bool = False
+    ) -> Optional[ProfileEntry]:
+        """
+        Get the earliest-arriving journey from a stop leaving at or after a time.
+
+        Ties are broken by fewer trips, then by the later departure.
+
+        Args:
+            stop: Stop to leave from
+            depart_after: Earliest departure from the stop
+            max_trips: Maximum number of trips
+            legs_only: Skip entries whose first leg is a walk
+
+        Returns:
+            Profile entry, or None if no journey qualifies
+        """
+        best = None
+        for entry in self.entries.get(stop, ()):
+            if entry[0] < depart_after or entry[2] > max_trips:
+                continue
+            if legs_only and entry[3] == WALK:
+                continue
+            if best is None or (entry[1], entry[2], -entry[0]) < (best[1], best[2], -best[0]):
+                best = entry
+        return best
+
+    def window_times(self, stop: int) -> Tuple[float, float]:
+        """
+        Door-to-door commute time over every departure minute in the window.
+
+        Leaving at minute ``t`` means taking the earliest-arriving journey
+        that departs at or after ``t``, so waiting for the train counts.
+
+        Returns:
+            (average, worst case) in minutes, or (inf, inf) if some minute
+            of the window has no journey
+        """
+        return self._window_times(self.entries.get(stop))
+
+    def window_scores(self, num_stops: int) -> Tuple[List[float], List[float]]:
+        """
+        window_times() of every stop in one pass over the profiles.
+
+        Only stops with journeys are visited; the rest stay at infinity.
+
+        Args:
+            num_stops: Length of the returned lists (stops from 0 up)
+
+        Returns:
+            Tuple of (average, worst case) lists indexed by stop
+        """
+        averages = [INFINITY] * num_stops
+        worsts = [INFINITY] * num_stops
+        for stop, entries in self.entries.items():
+            if stop < num_stops:
+                averages[stop], worsts[stop] = self._window_times(entries)
+        return averages, worsts
+
+    def _window_times(self, entries: Optional[List[ProfileEntry]]) -> Tuple[float, float]:
+        """Average and worst-case window time over one stop's journeys."""
+        if not entries:
+            return INFINITY, INFINITY
+
+        # Earliest arrival over journeys departing at or after each departure
+        by_departure = sorted(entries)
+        if by_departure[-1][0] < self.latest:
+            return INFINITY, INFINITY
+        steps = []
+        best_arrival = INFINITY
+        for entry in reversed(by_departure):
+            best_arrival = min(best_arrival, entry[1])
+            steps.append((entry[0], best_arrival))
+        steps.reverse()
+
+        total = 0
+        worst = 0
+        start = self.earliest
+        for departure, arrival in steps:
+            # Walking can make departures fractional; minute t can use it if t <= departure
+            end = min(int(departure), self.latest)
+            if end < start:
+                continue
+            count = end - start + 1
+            total += arrival * count - (start + end) * count / 2
+            worst = max(worst, arrival - start)
+            start = end + 1
+            if start > self.latest:
+                break
+
+        return total / (self.latest - self.earliest + 1), float(worst)
+
+
+class RaptorRouter:
+    """
+    Round-based (RAPTOR) router over trips from ``train_timetables``.
+
+    Trips with the same stop sequence that never overtake each other are
+    grouped into routes, whose stop times are kept column-wise (one sorted
+    array per stop position), so finding the trip to ride is a bisect.
+    Round ``k`` finds the journeys that use ``k`` trips; transfers between
+    same-name platforms reuse the graph's station complex hubs as footpaths.
+    """
+
+    def __init__(self, graph: NetworkGraph, calendar: str, max_trips: int):
+        """
+        Initialize an empty router (use from_timetables or load).
+
+        Args:
+            graph: Network graph whose node indices are used as stop IDs
+            calendar: ODPT calendar the trips run on
+            max_trips: Maximum number of trips per journey (rounds)
+        """
+        self.graph = graph
+        self.calendar = calendar
+        self.max_trips = max_trips
+        self.route_stops: List[array] = []
+        self.route_arrivals: List[List[array]] = []    # [route][position][trip]
+        self.route_departures: List[List[array]] = []  # [route][position][trip]
+        self.route_railways: List[str] = []
+        self.stop_routes: Dict[int, List[Tuple[int, int]]] = {}
+        self.num_trips = 0
+        self.footpaths = station_complex_footpaths(graph)
+
+    def __len__(self) -> int:
+        """Number of routes."""
+        return len(self.route_stops)
+
+    @classmethod
+    def from_timetables(
+        cls,
+        graph: NetworkGraph,
+        calendar: str,
+        timetables: Iterable[Tuple[str, str, List[Dict]]],
+        max_trips: int
+    ) -> "RaptorRouter":
+        """
+        Group train timetables into routes.
+
+        Args:
+            graph: Network graph whose node indices are used as stop IDs
+            calendar: ODPT calendar the trips run on
+            timetables: (trip_id, railway, odpt:trainTimetableObject) tuples
+            max_trips: Maximum number of trips per journey (rounds)
+
+        Returns:
+            RaptorRouter ready for queries
+        """
+        router = cls(graph, calendar, max_trips)
+        patterns: Dict[Tuple[str, Tuple[int, ...]], List[Tuple[List[int], List[int]]]] = {}
+
+        for _, railway, stop_events in timetables:
+            hops = list(trip_hops(graph, stop_events))
+            if not hops:
+                continue
+            stops = [hops[0][0]]
+            arrivals = [hops[0][1]]
+            departures = []
+            for dep_stop, dep_time, arr_stop, arr_time in hops:
+                departures.append(dep_time)
+                stops.append(arr_stop)
+                arrivals.append(arr_time)
+            departures.append(arrivals[-1])
+            patterns.setdefault((railway, tuple(stops)), []).append((arrivals, departures))
+
+        for (railway, stops), trips in patterns.items():
+            trips.sort(key=lambda trip: (trip[1], trip[0]))
+
+            # Split the pattern wherever a trip would overtake the one before it
+            routes: List[List[Tuple[List[int], List[int]]]] = []
+            for trip in trips:
+                for route in routes:
+                    last_arrivals, last_departures = route[-1]
+                    if all(a >= b for a, b in zip(trip[0], last_arrivals)) and all(
+                        a >= b for a, b in zip(trip[1], last_departures)
+                    ):
+                        route.append(trip)
+                        break
+                else:
+                    routes.append([trip])
+
+            for route in routes:
+                r = len(router.route_stops)
+                router.route_stops.append(array("i", stops))
+                router.route_arrivals.append([
+                    array("i", (trip[0][i] for trip in route)) for i in range(len(stops))
+                ])
+                router.route_departures.append([
+                    array("i", (trip[1][i] for trip in route)) for i in range(len(stops))
+                ])
+                router.route_railways.append(railway)
+                router.num_trips += len(route)
+                for position, stop in enumerate(stops):
+                    router.stop_routes.setdefault(stop, []).append((r, position))
+
+        return router
+
+    @classmethod
+    def load(cls, db, graph: NetworkGraph, calendar: str, max_trips: int) -> "RaptorRouter":
+        """
+        Build a router from the train_timetables table.
+
+        Args:
+            db: Connected TrainDatabaseManager
+            graph: Network graph whose node indices are used as stop IDs
+            calendar: ODPT calendar to load trips for
+            max_trips: Maximum number of trips per journey (rounds)
+
+        Returns:
+            RaptorRouter (empty if no trips run on the calendar)
+        """
+        return cls.from_timetables(graph, calendar, load_trips(db, calendar), max_trips)
+
+    def departure_profiles(
+        self,
+        target: int,
+        earliest: int,
+        latest: int,
+        max_time: float
+    ) -> DepartureProfiles:
+        """
+        Compute Pareto profiles towards a target for a whole departure window.
+
+        This is a backwards range query: every arrival time at the target
+        is a deadline, processed earliest first. Labels are kept between
+        deadlines because a departure that makes an earlier deadline also
+        makes a later one, so each run only explores what got better.
+
+        Args:
+            target: Target stop (graph node index), e.g. a workplace
+            earliest: Start of the departure window (minutes since midnight)
+            latest: End of the departure window (minutes since midnight)
+            max_time: Maximum journey time from a departure in the window
+
+        Returns:
+            DepartureProfiles with Pareto entries per stop
+        """
+        max_trips = self.max_trips
+        profiles = DepartureProfiles(target, earliest, latest, max_trips)
+        entries = profiles.entries
+        footpaths = self.footpaths
+        stop_routes = self.stop_routes
+        route_stops = self.route_stops
+        route_arrivals = self.route_arrivals
+        route_departures = self.route_departures
+
+        # labels[k][u]: latest departure from u reaching the target within k trips
+        num_stops = len(self.graph)
+        labels = [[-INFINITY] * num_stops for _ in range(max_trips + 1)]
+
+        def improve(k: int, stop: int, departure: int, deadline: int, leg: Tuple[int, int, int, int]):
+            for j in range(k, max_trips + 1):
+                if labels[j][stop] >= departure:
+                    break
+                labels[j][stop] = departure
+            entries.setdefault(stop, []).append((departure, deadline, k) + leg)
+
+        for deadline in self._arrival_times(target, earliest, latest + max_time):
+            improve(0, target, deadline, deadline, (AT_TARGET, -1, -1, -1))
+            marked = [target]
+            for stop, walk_time in footpaths.get(target, ()):
+                departure = deadline - walk_time
+                if departure >= earliest and departure > labels[0][stop]:
+                    improve(0, stop, departure, deadline, (WALK, target, -1, -1))
+                    marked.append(stop)
+
+            for k in range(1, max_trips + 1):
+                # Scan each route from the last position where a stop improved
+                queue: Dict[int, int] = {}
+                for stop in marked:
+                    for r, position in stop_routes.get(stop, ()):
+                        if queue.get(r, -1) < position:
+                            queue[r] = position
+
+                previous = labels[k - 1]
+                current = labels[k]
+                improved = []
+                for r, start in queue.items():
+                    stops = route_stops[r]
+                    arrivals = route_arrivals[r]
+                    departures = route_departures[r]
+                    trip = -1
+                    alight = -1
+                    for i in range(start, -1, -1):
+                        stop = stops[i]
+                        if trip >= 0:
+                            departure = departures[i][trip]
+                            if departure >= earliest and departure > current[stop]:
+                                improve(k, stop, departure, deadline, (r, trip, i, alight))
+                                improved.append(stop)
+                        # Switch to a later trip only if the next one still gets here in time
+                        column = arrivals[i]
+                        if trip + 1 < len(column) and column[trip + 1] <= previous[stop]:
+                            trip = bisect_right(column, previous[stop]) - 1
+                            alight = i
+
+                marked = list(improved)
+                for stop in improved:
+                    departure = current[stop]
+                    for other, walk_time in footpaths.get(stop, ()):
+                        walk_departure = departure - walk_time
+                        if walk_departure >= earliest and walk_departure > current[other]:
+                            improve(k, other, walk_departure, deadline, (WALK, stop, -1, -1))
+                            marked.append(other)
+                if not marked:
+                    break
+
+        return profiles
+
+    def journey(
+        self,
+        profiles: DepartureProfiles,
+        origin: int,
+        depart_after: int
+    ) -> Tuple[Optional[ProfileEntry], List[Tuple[int, int, str, float, int]]]:
+        """
+        Rebuild the earliest-arriving journey leaving an origin at or after a time.
+
+        Returns:
+            Tuple of (profile entry of the journey or None, hops) where hops
+            are (from_stop, to_stop, railway, minutes, num_stops) in travel order
+        """
+        first = profiles.best_entry(origin, depart_after, self.max_trips)
+        hops = []
+        entry = first
+        stop = origin
+        while entry is not None and stop != profiles.target:
+            departure, arrival, trips, r, trip, board, alight = entry
+            if r == AT_TARGET:
+                break
+
+            if r == WALK:
+                walk_time = dict(self.footpaths[stop])[trip]
+                hops.append((
+                    stop, trip, self.graph.railway_ids[TRANSFER_INDEX], walk_time, 0
+                ))
+                stop = trip
+                entry = profiles.best_entry(stop, departure + walk_time, trips, legs_only=True)
+                continue
+
+            stops = self.route_stops[r]
+            arrivals = self.route_arrivals[r]
+            departures = self.route_departures[r]
+            railway = self.route_railways[r]
+            for i in range(board, alight):
+                hops.append((
+                    stops[i], stops[i + 1], railway,
+                    float(arrivals[i + 1][trip] - departures[i][trip]), 1
+                ))
+            stop = stops[alight]
+            entry = profiles.best_entry(stop, arrivals[alight][trip], trips - 1)
+
+        return first, hops
+
+    def _arrival_times(self, target: int, earliest: int, latest: int) -> List[int]:
+        """Get the distinct times a trip reaches the target (walking included)."""
+        times = set()
+        reaches = [(target, 0.0)] + list(self.footpaths.get(target, ()))
+        for stop, walk_time in reaches:
+            for r, position in self.stop_routes.get(stop, ()):
+                if position == 0:
+                    continue
+                for arrival in self.route_arrivals[r][position]:
+                    arrival += walk_time
+                    if earliest <= arrival <= latest:
+                        times.add(arrival)
+        return sorted(times)
@@ -0,0 +1,90 @@
+"""Batch derivation of per-segment running times from train timetables."""
+
+import json
+from array import array
+from statistics import median
+from typing import Dict, Iterator, List, Set, Tuple
+
+from timetable_router import MINUTES_PER_DAY, parse_time
+
+# (railway, direction, from_station, to_station)
+SegmentKey = Tuple[str, str, str, str]
+
+
+def derive_segment_times(db) -> int:
+    """
+    Recompute the segment_times table from train_timetables.
+
+    For every train, the time from departing one station to departing the
+    next stop (arriving, at the terminus) is one sample for that segment,
+    so a station's dwell time is counted like the per-stop constant was.
+    Only hops between stations adjacent in the railway's station order are
+    used; express trains that pass stations contribute nothing. Medians are
+    rounded to half a minute so precomputed travel-time matrices stay exact.
+
+    Args:
+        db: Connected TrainDatabaseManager
+
+    Returns:
+        Number of segments written
+    """
+    adjacent = _adjacent_station_pairs(db)
+
+    db.cursor.execute("""
+        SELECT railway, rail_direction, timetable_objects
+        FROM train_timetables
+        WHERE timetable_objects IS NOT NULL
+    """)
+
+    samples: Dict[SegmentKey, array] = {}
+    for railway, direction, objects_json in db.cursor:
+        pairs = adjacent.get(railway)
+        if not pairs:
+            continue
+        try:
+            stop_events = json.loads(objects_json)
+        except json.JSONDecodeError:
+            continue
+        for from_station, to_station, minutes in _running_times(stop_events):
+            if (from_station, to_station) in pairs:
+                key = (railway, direction or "", from_station, to_station)
+                samples.setdefault(key, array("H")).append(minutes)
+
+    rows = [
+        key + (max(0.5, round(median(times) * 2) / 2), len(times))
+        for key, times in samples.items()
+    ]
+    db.replace_segment_times(rows)
+    return len(rows)
+
+
+def _adjacent_station_pairs(db) -> Dict[str, Set[Tuple[str, str]]]:
+    """Get the consecutive station pairs (both ways) of every railway."""
+    adjacent: Dict[str, Set[Tuple[str, str]]] = {}
+    for railway, stations in db.get_station_orders().items():
+        pairs = adjacent.setdefault(railway, set())
+        for a, b in zip(stations, stations[1:]):
+            if a and b:
+                pairs.add((a, b))
+                pairs.add((b, a))
+    return adjacent
+
+
+def _running_times(stop_events: List[Dict]) -> Iterator[Tuple[str, str, int]]:
+    """Yield (from_station, to_station, minutes) between consecutive stops of a train."""
+    previous = None
+    for event in stop_events:
+        station = event.get("odpt:departureStation") or event.get("odpt:arrivalStation")
+        time = event.get("odpt:departureTime") or event.get("odpt:arrivalTime")
+        if not station or not time:
+            previous = None
+            continue
+        try:
+            minutes = parse_time(time)
+        except ValueError:
+            previous = None
+            continue
+
+        if previous is not None and previous[0] != station:
+            yield previous[0], station, (minutes - previous[1]) % MINUTES_PER_DAY
+        previous = (station, minutes)
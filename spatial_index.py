@@ -0,0 +1,161 @@
+"""Uniform grid index over station coordinates for nearby and bounding-box queries."""
+
+import heapq
+import math
+from array import array
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import config
+
+EARTH_RADIUS_METERS = 6_371_000.0
+_METERS_PER_DEGREE = math.pi * EARTH_RADIUS_METERS / 180
+
+
+def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points given in degrees, in meters."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(lon2 - lon1) / 2
+    a = math.sin(half_dphi) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+class StationSpatialIndex:
+    """
+    Station coordinates bucketed into a uniform latitude/longitude grid.
+
+    A query only visits the cells overlapping its circle or box, so its cost
+    depends on how many stations are near the query rather than on the size
+    of the network. Stations without coordinates are not indexed.
+    """
+
+    def __init__(
+        self,
+        station_info: Mapping[str, Dict],
+        cell_degrees: float = config.SPATIAL_GRID_CELL_DEGREES
+    ):
+        """
+        Build the grid.
+
+        Args:
+            station_info: Station ID -> latitude, longitude (may be None)
+            cell_degrees: Cell edge length in degrees of latitude and longitude
+        """
+        self.cell_degrees = cell_degrees
+        self.station_ids: List[str] = []
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.cells: Dict[Tuple[int, int], array] = {}
+
+        for station_id, info in station_info.items():
+            lat = info.get("latitude")
+            lon = info.get("longitude")
+            if lat is None or lon is None:
+                continue
+            position = len(self.station_ids)
+            self.station_ids.append(station_id)
+            self.latitudes.append(lat)
+            self.longitudes.append(lon)
+            self.cells.setdefault(self._cell(lat, lon), array("i")).append(position)
+
+    def __len__(self) -> int:
+        """Number of indexed stations."""
+        return len(self.station_ids)
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the stations within a radius of a point, nearest first.
+
+        Args:
+            latitude: Latitude of the point in degrees
+            longitude: Longitude of the point in degrees
+            radius: Search radius in meters
+            limit: Maximum number of stations (None for all)
+
+        Returns:
+            List of (station_id, distance in meters) sorted by distance
+        """
+        dlat = radius / _METERS_PER_DEGREE
+        # Longitude degrees shrink towards the poles; clamp to keep the box finite
+        dlon = dlat / max(math.cos(math.radians(latitude)), 1e-6)
+
+        lats = self.latitudes
+        lons = self.longitudes
+        hits = []
+        for position in self._candidates(latitude - dlat, longitude - dlon,
+                                         latitude + dlat, longitude + dlon):
+            distance = haversine_meters(latitude, longitude, lats[position], lons[position])
+            if distance <= radius:
+                hits.append((distance, position))
+
+        if limit is None:
+            hits.sort()
+        else:
+            hits = heapq.nsmallest(limit, hits)
+        return [(self.station_ids[position], distance) for distance, position in hits]
+
+    def within(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Find the stations inside a bounding box.
+
+        Args:
+            min_lat: Southern edge in degrees
+            min_lon: Western edge in degrees
+            max_lat: Northern edge in degrees
+            max_lon: Eastern edge in degrees
+            limit: Maximum number of stations (None for all)
+
+        Returns:
+            Station IDs inside the box (edges included), grouped by grid cell
+        """
+        lats = self.latitudes
+        lons = self.longitudes
+        found = []
+        for position in self._candidates(min_lat, min_lon, max_lat, max_lon):
+            if min_lat <= lats[position] <= max_lat and min_lon <= lons[position] <= max_lon:
+                found.append(self.station_ids[position])
+                if limit is not None and len(found) >= limit:
+                    break
+        return found
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Grid cell (row, column) of a coordinate."""
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def _candidates(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float
+    ) -> Iterator[int]:
+        """Stations in every cell overlapping a box (a superset of the box)."""
+        row_lo, col_lo = self._cell(min_lat, min_lon)
+        row_hi, col_hi = self._cell(max_lat, max_lon)
+
+        # A box wider than the network visits the occupied cells instead
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > len(self.cells):
+            for (row, col), positions in sorted(self.cells.items()):
+                if row_lo <= row <= row_hi and col_lo <= col <= col_hi:
+                    yield from positions
+            return
+
+        for row in range(row_lo, row_hi + 1):
+            for col in range(col_lo, col_hi + 1):
+                positions = self.cells.get((row, col))
+                if positions is not None:
+                    yield from positions
@@ -0,0 +1,201 @@
+"""Normalized n-gram index for ranked station name search."""
+
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Ranking tiers: the whole name matches, the name starts with the query,
+# the query appears anywhere in the name
+_EXACT, _PREFIX, _SUBSTRING = 0, 1, 2
+
+# Names are indexed under every substring of up to this many characters
+_GRAM = 3
+
+# Sorts after any character, so key + _LAST_CHAR bounds all keys starting with key
+_LAST_CHAR = chr(0x10FFFF)
+
+# Hiragana and the small ヶ/ヵ fold onto their katakana forms
+_KANA_FOLD = {code: code + 0x60 for code in range(0x3041, 0x3097)}
+_KANA_FOLD.update({ord("ヶ"): ord("ケ"), ord("ヵ"): ord("カ")})
+
+# Latin combining diacritics (macrons, accents) after NFKD decomposition
+_LATIN_MARKS = re.compile("[\u0300-\u036f]+")
+
+# Everything except letters and digits (spaces, hyphens, dots, "・")
+_NOT_ALNUM = re.compile(r"[\W_]+")
+
+# Romaji spelling variants: Hepburn "m" for syllabic n before b/m/p
+# ("Shimbashi"), and long vowels written without macrons ("Oosaki", "Toukyou")
+_ROMAJI_FOLDS = [
+    (re.compile(r"m(?=[bmp])"), "n"),
+    (re.compile(r"o[ou]"), "o"),
+    (re.compile(r"uu"), "u"),
+]
+
+
+def normalize_name(text: str) -> str:
+    """
+    Fold a station name or query into the form the index compares.
+
+    Full-width and half-width forms are unified, Latin diacritics such as
+    macrons are dropped, hiragana becomes katakana, everything except letters
+    and digits is removed and romaji spelling variants are folded, so
+    "Kaihimmakuhari", "kaihin makuhari" and "Kaihin-Makuhari" all match.
+
+    Args:
+        text: Station name or search query
+
+    Returns:
+        Normalized key (empty if the text has no letters or digits)
+    """
+    # Only Latin combining marks are dropped; kana voicing marks recompose
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = _LATIN_MARKS.sub("", decomposed)
+    folded = unicodedata.normalize("NFKC", stripped).casefold().translate(_KANA_FOLD)
+    key = _NOT_ALNUM.sub("", folded)
+    for pattern, replacement in _ROMAJI_FOLDS:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+class StationSearchIndex:
+    """
+    Station names indexed by normalized n-grams.
+
+    Every station's Japanese and English titles are normalized into keys,
+    and each key is listed under all its substrings of up to three
+    characters. A query of up to three characters is then one posting-list
+    lookup, and a longer one intersects its trigrams' postings and confirms
+    the candidates. Keys are also kept sorted, so exact and prefix matches,
+    which rank first, come from a single binary search.
+
+    Keys are numbered in ranking order (shorter names first, then by
+    title), so posting lists are already ranked and a search with a limit
+    stops reading them once it has enough stations.
+    """
+
+    def __init__(self, station_info: Mapping[str, Dict]):
+        """
+        Build the index.
+
+        Args:
+            station_info: Station ID -> title, title_en, railway
+        """
+        # One result tuple per station; keys are entries pointing back to it
+        self.results: List[Tuple[str, str, str, str]] = []
+        named: List[Tuple[int, str, int, str]] = []
+        for station_id, info in station_info.items():
+            station = len(self.results)
+            result = (
+                station_id, info.get("title") or "", info.get("title_en") or "",
+                info.get("railway") or ""
+            )
+            self.results.append(result)
+            for key in dict.fromkeys(map(normalize_name, result[1:3])):
+                if key:
+                    named.append((len(key), result[1], station, key))
+        named.sort()
+
+        self.keys = [key for _, _, _, key in named]
+        self.owners = array("i", [station for _, _, station, _ in named])
+        postings: Dict[str, array] = {}
+        for entry, key in enumerate(self.keys):
+            for gram in _grams(key):
+                if gram in postings:
+                    postings[gram].append(entry)
+                else:
+                    postings[gram] = array("i", (entry,))
+        self.postings = postings
+
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[entry] for entry in order]
+        self.sorted_entries = array("i", order)
+
+    def __len__(self) -> int:
+        """Number of indexed stations."""
+        return len(self.results)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, str, str, str]]:
+        """
+        Find stations whose name contains the query.
+
+        Stations are ranked by exact match, then prefix match, then
+        substring match, then shorter names, then title. With a limit, only
+        the best-ranked prefix matches are considered and substring postings
+        are read only until the limit is filled.
+
+        Args:
+            query: Search text in any supported script or spelling
+            limit: Maximum number of results (None for all)
+
+        Returns:
+            List of tuples: (station_id, title, title_en, railway)
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+
+        # "Shim" may be the start of "Shimbashi", indexed as "shinbashi"
+        variants = [key]
+        if key.endswith("m"):
+            variants.append(key[:-1] + "n")
+
+        best: Dict[int, Tuple[int, int]] = {}  # Station -> (tier, entry)
+
+        def offer(entries: Iterable[int], tier: int) -> None:
+            for entry in entries:
+                station = self.owners[entry]
+                if station not in best or (tier, entry) < best[station]:
+                    best[station] = (tier, entry)
+
+        for variant in variants:
+            start = bisect_left(self.sorted_keys, variant)
+            exact_end = bisect_right(self.sorted_keys, variant, start)
+            end = bisect_left(self.sorted_keys, variant + _LAST_CHAR, exact_end)
+            offer(self.sorted_entries[start:exact_end], _EXACT)
+            prefix = self.sorted_entries[exact_end:end]
+            # A station has at most two keys, so 2 * limit entries cover limit stations
+            offer(prefix if limit is None else heapq.nsmallest(2 * limit, prefix), _PREFIX)
+
+        substring = heapq.merge(*(self._substring_matches(variant) for variant in variants))
+        if limit is None:
+            offer(substring, _SUBSTRING)
+        else:
+            for entry in substring:
+                if len(best) >= limit:
+                    break
+                offer((entry,), _SUBSTRING)
+
+        ranked = sorted(best.items(), key=itemgetter(1))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.results[station] for station, _ in ranked]
+
+    def _substring_matches(self, key: str) -> Iterable[int]:
+        """Entries whose key contains the given key, in ranking order."""
+        if len(key) <= _GRAM:
+            return self.postings.get(key, ())
+
+        grams = sorted(
+            {key[i:i + _GRAM] for i in range(len(key) - _GRAM + 1)},
+            key=lambda gram: len(self.postings.get(gram, ()))
+        )
+        candidates = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(self.postings.get(gram, ()))
+        return sorted(entry for entry in candidates if key in self.keys[entry])
+
+
+def _grams(key: str) -> set:
+    """Every distinct substring of key with up to _GRAM characters."""
+    return {
+        key[start:start + size]
+        for size in range(1, _GRAM + 1)
+        for start in range(len(key) - size + 1)
+    }
@@ -0,0 +1,245 @@
+"""Column-oriented station and railway tables with interned strings."""
+
+import copy
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional
+
+from network_graph import NetworkGraph
+
+_NO_RAILWAY = -1
+_NAN = float("nan")
+
+
+class StationRecord(NamedTuple):
+    """Details of one station."""
+    title: Optional[str]
+    title_en: Optional[str]
+    railway: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+class RailwayRecord(NamedTuple):
+    """Details of one railway line."""
+    title: Optional[str]
+    title_en: Optional[str]
+
+
+class StationTable(Mapping[str, Dict]):
+    """
+    Station details stored as parallel columns indexed by graph node.
+
+    Titles and railway IDs are interned, so stations sharing a name or a
+    line share one string; the railway column holds an index into
+    ``railway_ids`` and coordinates are doubles (NaN when unknown). Station
+    IDs are not stored at all: the graph's intern table maps them to nodes.
+
+    The table still reads as a mapping of station ID -> details dict for
+    code that iterates it, but the dicts are built on access; lookups on
+    request paths should use record() or title() instead.
+    """
+
+    def __init__(self, graph: Optional[NetworkGraph] = None):
+        """
+        Create an empty table sized for the stations of a graph.
+
+        Args:
+            graph: Graph whose station nodes index the columns (None for a
+                table with no stations)
+        """
+        size = graph.num_stations if graph is not None else 0
+        self.graph = graph
+        self.present = bytearray(size)
+        self.titles: List[Optional[str]] = [None] * size
+        self.titles_en: List[Optional[str]] = [None] * size
+        self.railways = array("i", [_NO_RAILWAY]) * size
+        self.railway_ids: List[str] = []
+        self.latitudes = array("d", [_NAN]) * size
+        self.longitudes = array("d", [_NAN]) * size
+        self._count = 0
+
+    @classmethod
+    def from_rows(cls, graph: NetworkGraph, station_rows: Iterable[tuple]) -> "StationTable":
+        """
+        Build the table from station rows.
+
+        Args:
+            graph: Graph containing a node for every station in the rows
+            station_rows: (station_id, title, title_en, railway, latitude,
+                longitude) tuples, as returned by STATION_QUERY
+
+        Returns:
+            New table; a station listed twice keeps its last row
+
+        Raises:
+            ValueError: If a station is not a node of the graph
+        """
+        table = cls(graph)
+        strings: Dict[str, str] = {}
+        railway_index: Dict[str, int] = {}
+        for station_id, title, title_en, railway, lat, lon in station_rows:
+            node = graph.index_of(station_id)
+            if node is None or node >= graph.num_stations:
+                raise ValueError(f"Station {station_id} is not in the graph")
+            if not table.present[node]:
+                table.present[node] = 1
+                table._count += 1
+            table.titles[node] = None if title is None else strings.setdefault(title, title)
+            table.titles_en[node] = None if title_en is None else strings.setdefault(title_en, title_en)
+            if railway is None:
+                table.railways[node] = _NO_RAILWAY
+            else:
+                index = railway_index.get(railway)
+                if index is None:
+                    index = railway_index[railway] = len(table.railway_ids)
+                    table.railway_ids.append(railway)
+                table.railways[node] = index
+            table.latitudes[node] = _NAN if lat is None else lat
+            table.longitudes[node] = _NAN if lon is None else lon
+        return table
+
+    def rebind(self, graph: NetworkGraph) -> "StationTable":
+        """
+        Get a table with the same columns for a graph with the same stations.
+
+        Used when a rebuild changes edges but no station details, so the
+        columns are shared rather than copied.
+        """
+        table = copy.copy(self)
+        table.graph = graph
+        return table
+
+    def node_of(self, station_id: str) -> Optional[int]:
+        """Node index of a station in the table, or None if it has no row."""
+        graph = self.graph
+        node = graph.index_of(station_id) if graph is not None else None
+        if node is None or node >= len(self.present) or not self.present[node]:
+            return None
+        return node
+
+    def record(self, station_id: str) -> Optional[StationRecord]:
+        """Get the details of a station, or None if it is unknown."""
+        node = self.node_of(station_id)
+        return self._record(node) if node is not None else None
+
+    def title(self, station_id: str, default: Optional[str] = None) -> Optional[str]:
+        """Get the title of a station, or the default if it is unknown."""
+        node = self.node_of(station_id)
+        return self.titles[node] if node is not None else default
+
+    def _record(self, node: int) -> StationRecord:
+        """Assemble the details stored at a node."""
+        railway = self.railways[node]
+        lat = self.latitudes[node]
+        lon = self.longitudes[node]
+        return StationRecord(
+            self.titles[node],
+            self.titles_en[node],
+            self.railway_ids[railway] if railway != _NO_RAILWAY else None,
+            None if math.isnan(lat) else lat,
+            None if math.isnan(lon) else lon
+        )
+
+    def __getitem__(self, station_id: str) -> Dict:
+        node = self.node_of(station_id)
+        if node is None:
+            raise KeyError(station_id)
+        return self._record(node)._asdict()
+
+    def __contains__(self, station_id: object) -> bool:
+        return isinstance(station_id, str) and self.node_of(station_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        station_ids = self.graph.station_ids if self.graph is not None else ()
+        present = self.present
+        return (station_ids[node] for node in range(len(present)) if present[node])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, StationTable):
+            return Mapping.__eq__(self, other)
+        size = len(self.present)
+        if size != len(other.present) or self.present != other.present:
+            return False
+        if size and self.graph.station_ids[:size] != other.graph.station_ids[:size]:
+            return False
+        return (
+            self.titles == other.titles
+            and self.titles_en == other.titles_en
+            and [self.railway_ids[i] if i != _NO_RAILWAY else None for i in self.railways]
+            == [other.railway_ids[i] if i != _NO_RAILWAY else None for i in other.railways]
+            and _same_coordinates(self.latitudes, other.latitudes)
+            and _same_coordinates(self.longitudes, other.longitudes)
+        )
+
+
+class RailwayTable(Mapping[str, Dict]):
+    """
+    Railway line details stored as parallel columns.
+
+    Reads as a mapping of railway ID -> details dict like StationTable;
+    lookups on request paths should use record() or title().
+    """
+
+    def __init__(self, railway_rows: Iterable[tuple] = ()):
+        """
+        Build the table from railway rows.
+
+        Args:
+            railway_rows: Tuples starting with (railway_id, title, title_en),
+                as returned by RAILWAY_QUERY; a railway listed twice keeps
+                its last row
+        """
+        self.railway_ids: List[str] = []
+        self.titles: List[Optional[str]] = []
+        self.titles_en: List[Optional[str]] = []
+        self.index: Dict[str, int] = {}
+        for railway_id, title, title_en, *_ in railway_rows:
+            position = self.index.get(railway_id)
+            if position is None:
+                self.index[railway_id] = len(self.railway_ids)
+                self.railway_ids.append(railway_id)
+                self.titles.append(title)
+                self.titles_en.append(title_en)
+            else:
+                self.titles[position] = title
+                self.titles_en[position] = title_en
+
+    def record(self, railway_id: str) -> Optional[RailwayRecord]:
+        """Get the details of a railway line, or None if it is unknown."""
+        position = self.index.get(railway_id)
+        if position is None:
+            return None
+        return RailwayRecord(self.titles[position], self.titles_en[position])
+
+    def title(self, railway_id: str, default: Optional[str] = None) -> Optional[str]:
+        """Get the title of a railway line, or the default if it is unknown."""
+        position = self.index.get(railway_id)
+        return self.titles[position] if position is not None else default
+
+    def __getitem__(self, railway_id: str) -> Dict:
+        record = self.record(railway_id)
+        if record is None:
+            raise KeyError(railway_id)
+        return record._asdict()
+
+    def __contains__(self, railway_id: object) -> bool:
+        return railway_id in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.railway_ids)
+
+    def __len__(self) -> int:
+        return len(self.railway_ids)
+
+
+def _same_coordinates(a: array, b: array) -> bool:
+    """Compare coordinate columns, treating NaN (unknown) as equal to NaN."""
+    return a.tobytes() == b.tobytes() or all(
+        x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(a, b)
+    )
@@ -0,0 +1,35 @@
+"""Bulk loads must leave the connection as they found it."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_manager import TrainDatabaseManager  # noqa: E402
+
+PRAGMAS = ("synchronous", "temp_store", "cache_size")
+
+
+def _pragmas(db):
+    return [db.cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in PRAGMAS]
+
+
+def _indexes(db):
+    db.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name")
+    return db.cursor.fetchall()
+
+
+def test_bulk_load_restores_settings_and_indexes(tmp_path):
+    with TrainDatabaseManager(str(tmp_path / "train_data.db")) as db:
+        db.create_schema()
+        before = _pragmas(db)
+        indexes = _indexes(db)
+
+        with db.bulk_load():
+            assert _pragmas(db) != before
+            db.insert_stations([{"@id": "urn:s", "owl:sameAs": "odpt.Station:Test.S", "dc:title": "駅"}])
+
+        assert _pragmas(db) == before
+        assert _indexes(db) == indexes
+        db.cursor.execute("SELECT COUNT(*) FROM stations")
+        assert db.cursor.fetchone()[0] == 1
@@ -0,0 +1,93 @@
+"""A graph updated as a delta must be the graph a full build gives."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commute_optimizer import CommuteOptimizer  # noqa: E402
+from database_manager import TrainDatabaseManager  # noqa: E402
+from graph_snapshot import snapshot_path_for  # noqa: E402
+
+# Two lines crossing at X, with platforms sharing the names "Central" and "Park"
+LINES = {
+    "odpt.Railway:Test.A": ["A0", "A1", "X", "A2", "A3"],
+    "odpt.Railway:Test.B": ["B0", "X", "B1", "B2"],
+}
+TITLES = {
+    "A0": "A0", "A1": "Central", "X": "X", "A2": "Park", "A3": "A3",
+    "B0": "B0", "B1": "Central", "B2": "Park",
+}
+
+
+def _station(name: str, title: str) -> dict:
+    return {"@id": f"urn:{name}", "owl:sameAs": f"odpt.Station:Test.{name}", "dc:title": title}
+
+
+def _railway(railway: str, names) -> dict:
+    return {
+        "@id": f"urn:{railway}", "owl:sameAs": railway, "dc:title": railway,
+        "odpt:stationOrder": [
+            {"odpt:station": f"odpt.Station:Test.{name}", "odpt:index": i} for i, name in enumerate(names)
+        ],
+    }
+
+
+def _make_db(path: str) -> None:
+    with TrainDatabaseManager(path) as db:
+        db.create_schema()
+        db.insert_stations([_station(name, title) for name, title in TITLES.items()])
+        db.insert_railways([_railway(railway, names) for railway, names in LINES.items()])
+
+
+def _shorten_line_a(db):
+    db.insert_railways([_railway("odpt.Railway:Test.A", ["A0", "A1", "X", "A2"])])
+
+
+def _reverse_line_a(db):
+    db.insert_railways([_railway("odpt.Railway:Test.A", LINES["odpt.Railway:Test.A"][::-1])])
+
+
+def _join_central(db):
+    db.insert_stations([_station("A3", "Central")])
+
+
+def _dissolve_park(db):
+    db.insert_stations([_station("B2", "Riverside")])
+
+
+def _form_complex(db):
+    db.insert_stations([_station("A0", "Harbor"), _station("B0", "Harbor")])
+
+
+def _add_line(db):
+    db.insert_railways([_railway("odpt.Railway:Test.0", ["A3", "B0"])])
+
+
+@pytest.mark.parametrize("change, in_place", [
+    (_shorten_line_a, True),
+    (_reverse_line_a, True),
+    (_join_central, True),
+    (_dissolve_park, False),
+    (_form_complex, False),
+    (_add_line, False),
+])
+def test_delta_matches_full_build(tmp_path, capsys, change, in_place):
+    db_path = str(tmp_path / "train_data.db")
+    _make_db(db_path)
+    optimizer = CommuteOptimizer(db_path)
+    optimizer.build_network()
+
+    with TrainDatabaseManager(db_path) as db:
+        change(db)
+    capsys.readouterr()
+    optimizer.build_network()
+    assert ("in place" in capsys.readouterr().out) == in_place
+
+    os.remove(snapshot_path_for(db_path))
+    rebuilt = CommuteOptimizer(db_path)
+    rebuilt.build_network()
+    assert optimizer.network_graph.station_ids == rebuilt.network_graph.station_ids
+    assert optimizer.network.fingerprint == rebuilt.network.fingerprint
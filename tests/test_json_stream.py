@@ -0,0 +1,87 @@
+"""Streaming JSON array parsing must match json.loads on any chunking."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import chunked, iter_json_array  # noqa: E402
+
+ITEMS = [
+    {"owl:sameAs": "odpt.Station:TokyoMetro.Ginza.Shibuya", "dc:title": "渋谷", "geo:lat": 35.6590},
+    -1500.0,
+    "a \\\"quoted\\\" ] , [ string",
+    [],
+    {"nested": [1, [2, {"x": None}], True, False]},
+    12345678901234567890,
+    "東京🚃",
+]
+
+
+def _split(data: bytes, *cuts: int):
+    bounds = [0, *cuts, len(data)]
+    return [data[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_every_single_and_double_chunk_boundary():
+    # Indented so whitespace sits at boundaries too; multibyte characters
+    # get cut inside their UTF-8 sequences
+    data = json.dumps(ITEMS, ensure_ascii=False, indent=1).encode("utf-8")
+    for cut in range(len(data) + 1):
+        assert list(iter_json_array(_split(data, cut))) == ITEMS, cut
+    for cut in range(0, len(data), 7):
+        for second in range(cut, len(data), 5):
+            assert list(iter_json_array(_split(data, cut, second))) == ITEMS, (cut, second)
+
+
+def test_one_byte_chunks():
+    data = json.dumps(ITEMS, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(data[i:i + 1] for i in range(len(data)))) == ITEMS
+
+
+@pytest.mark.parametrize("body, items", [
+    (b"[]", []),
+    (b"  [ ]  ", []),
+    (b"[1]", [1]),
+    (b"[1, 2 ,3]", [1, 2, 3]),
+])
+def test_valid_arrays(body, items):
+    assert list(iter_json_array([body])) == items
+
+
+@pytest.mark.parametrize("body", [
+    b"",
+    b"{}",
+    b"[",
+    b"[1",
+    b"[1,",
+    b"[,1]",
+    b"[1,,2]",
+    b"[1,]",
+    b"[,]",
+    b"[1 2]",
+    b"[1, nope]",
+    b'["unterminated]',
+])
+def test_malformed_arrays(body):
+    for cut in range(len(body) + 1):
+        with pytest.raises(ValueError):
+            list(iter_json_array(_split(body, cut)))
+
+
+def test_items_before_an_error_are_yielded():
+    items = iter_json_array([b"[1, 2,", b", 3]"])
+    assert next(items) == 1
+    assert next(items) == 2
+    with pytest.raises(ValueError):
+        next(items)
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 3)) == []
+    with pytest.raises(ValueError):
+        list(chunked([1], 0))
@@ -0,0 +1,102 @@
+"""Rebuilding a loaded network must not keep state derived from replaced data."""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commute_optimizer import CommuteOptimizer  # noqa: E402
+from database_manager import TrainDatabaseManager  # noqa: E402
+from timetable_router import TimetableRouter  # noqa: E402
+
+CALENDAR = "odpt.Calendar:Weekday"
+RAILWAY = "odpt.Railway:Test.Line"
+STATIONS = [f"odpt.Station:Test.Line.S{i}" for i in range(3)]
+
+
+def _timetable(number: int, first_departure: int):
+    """One train over the whole line, two minutes between stations."""
+    objects = []
+    for i, station in enumerate(STATIONS):
+        hh, mm = divmod(first_departure + 2 * i, 60)
+        if i == len(STATIONS) - 1:
+            objects.append({"odpt:arrivalTime": f"{hh:02d}:{mm:02d}", "odpt:arrivalStation": station})
+        else:
+            objects.append({"odpt:departureTime": f"{hh:02d}:{mm:02d}", "odpt:departureStation": station})
+    return {
+        "@id": f"urn:test:{number}",
+        "owl:sameAs": f"odpt.TrainTimetable:Test.{number}",
+        "odpt:railway": RAILWAY,
+        "odpt:calendar": CALENDAR,
+        "odpt:railDirection": "odpt.RailDirection:Up",
+        "odpt:trainNumber": str(number),
+        "odpt:trainTimetableObject": objects,
+    }
+
+
+def _make_db(path: str) -> None:
+    with TrainDatabaseManager(path) as db:
+        db.create_schema()
+        db.insert_stations([
+            {"@id": f"urn:{station}", "owl:sameAs": station, "dc:title": f"駅{i}",
+             "odpt:railway": RAILWAY, "geo:lat": 35.0 + i / 100, "geo:long": 139.0}
+            for i, station in enumerate(STATIONS)
+        ])
+        db.insert_railways([{
+            "@id": f"urn:{RAILWAY}", "owl:sameAs": RAILWAY, "dc:title": "テスト線",
+            "odpt:stationOrder": [
+                {"odpt:station": station, "odpt:index": i + 1} for i, station in enumerate(STATIONS)
+            ],
+        }])
+        db.insert_train_timetables([_timetable(1, 8 * 60)])
+
+
+def test_rebuild_after_timetable_change_reloads_routers(tmp_path):
+    db_path = str(tmp_path / "train_data.db")
+    _make_db(db_path)
+
+    optimizer = CommuteOptimizer(db_path)
+    optimizer.build_network()
+    old_network = optimizer.network
+    assert len(optimizer.get_timetable_router(CALENDAR).trip_ids) == 1
+    assert len(optimizer.get_raptor_router(CALENDAR)) == 1
+
+    with TrainDatabaseManager(db_path) as db:
+        db.cursor.execute("DELETE FROM train_timetables")
+        db.insert_train_timetables([_timetable(2, 8 * 60), _timetable(3, 9 * 60)])
+
+    optimizer.build_network()
+    # Stations and railways are unchanged, so the graph is kept ...
+    assert optimizer.network.graph is old_network.graph
+    # ... but routers are built again from the new timetables
+    assert optimizer.timetable_routers is not old_network.timetable_routers
+    assert optimizer.raptor_routers is not old_network.raptor_routers
+    assert len(optimizer.get_timetable_router(CALENDAR).trip_ids) == 2
+    assert optimizer.get_raptor_router(CALENDAR).num_trips == 2
+    # The previous snapshot keeps answering from the old timetables
+    assert len(old_network.timetable_routers[CALENDAR].trip_ids) == 1
+
+
+def test_concurrent_requests_load_each_router_once(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "train_data.db")
+    _make_db(db_path)
+    optimizer = CommuteOptimizer(db_path)
+    optimizer.build_network()
+
+    loads = []
+    load = TimetableRouter.load
+
+    def slow_load(*args, **kwargs):
+        loads.append(args[2])
+        time.sleep(0.05)  # Let the other threads reach the cache while loading
+        return load(*args, **kwargs)
+
+    monkeypatch.setattr(TimetableRouter, "load", slow_load)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        routers = list(executor.map(lambda _: optimizer.get_timetable_router(CALENDAR), range(8)))
+
+    assert loads == [CALENDAR]
+    assert all(router is routers[0] for router in routers)
+    assert optimizer.timetable_routers[CALENDAR] is routers[0]
@@ -0,0 +1,129 @@
+"""Searches in path_search must agree with the plain algorithms they replace."""
+
+import os
+import random
+import sys
+from heapq import heappop, heappush
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from network_graph import NetworkGraph, NetworkGraphBuilder, TRANSFER_INDEX  # noqa: E402
+from path_search import (  # noqa: E402
+    INFINITY,
+    dijkstra,
+    meeting_point_search,
+    pareto_search,
+    rank_meeting_points,
+)
+
+
+def _random_graph(seed: int, num_stations: int = 40, num_hubs: int = 3) -> NetworkGraph:
+    """Random railways between stations plus a few hubs joining nearby platforms."""
+    rng = random.Random(seed)
+    builder = NetworkGraphBuilder()
+    for i in range(num_stations):
+        builder.add_station(f"S{i}")
+
+    for line in range(num_stations // 5):
+        railway = builder.add_railway(f"R{line}")
+        stops = rng.sample(range(num_stations), rng.randint(2, 8))
+        for a, b in zip(stops, stops[1:]):
+            # Half-minute multiples give plenty of equal totals to break ties on
+            weight = rng.randint(1, 12) / 2
+            builder.add_edge(a, b, weight, railway)
+            builder.add_edge(b, a, weight, railway)
+
+    for h in range(num_hubs):
+        hub = builder.add_hub(f"H{h}")
+        for station in rng.sample(range(num_stations), 3):
+            builder.add_edge(station, hub, 2.5, TRANSFER_INDEX)
+            builder.add_edge(hub, station, 2.5, TRANSFER_INDEX)
+    return builder.build()
+
+
+def test_meeting_point_search_matches_ranking_of_full_trees():
+    for seed in range(30):
+        graph = _random_graph(seed)
+        rng = random.Random(seed)
+        for _ in range(5):
+            origin_a, origin_b = rng.sample(range(graph.num_stations), 2)
+            max_time = rng.choice([5.0, 10.0, 20.0, 300.0])
+            top_n = rng.randint(1, 12)
+            exclude = (origin_a, origin_b)
+
+            _, _, lockstep = meeting_point_search(graph, origin_a, origin_b, max_time, top_n, exclude)
+            tree_a = dijkstra(graph, origin_a, INFINITY)
+            tree_b = dijkstra(graph, origin_b, INFINITY)
+            cached = rank_meeting_points(
+                tree_a.dist[:graph.num_stations], tree_b.dist[:graph.num_stations],
+                max_time, top_n, exclude
+            )
+            assert lockstep == cached, (seed, origin_a, origin_b, max_time, top_n)
+
+
+def _brute_force_labels(graph: NetworkGraph, origin: int, max_time: float, max_transfers: int):
+    """Dijkstra over (node, transfers) states: fastest time per exact transfer count."""
+    best = [[INFINITY] * len(graph) for _ in range(max_transfers + 1)]
+    best[0][origin] = 0.0
+    pq = [(0.0, 0, origin)]
+    while pq:
+        time, k, node = heappop(pq)
+        if time > best[k][node]:
+            continue
+        for target, weight, _ in graph.edges(node):
+            # Boarding a hub from a platform is a transfer
+            next_k = k + (not graph.is_hub(node) and graph.is_hub(target))
+            next_time = time + weight
+            if next_k <= max_transfers and next_time <= max_time and next_time < best[next_k][target]:
+                best[next_k][target] = next_time
+                heappush(pq, (next_time, next_k, target))
+    return best
+
+
+def test_pareto_search_matches_brute_force_labels():
+    for seed in range(30):
+        graph = _random_graph(seed, num_stations=30, num_hubs=5)
+        rng = random.Random(seed)
+        origin = rng.randrange(graph.num_stations)
+        max_time = rng.choice([8.0, 15.0, 60.0])
+        max_transfers = rng.randint(0, 4)
+
+        tree = pareto_search(graph, origin, max_time, max_transfers)
+        exact = _brute_force_labels(graph, origin, max_time, max_transfers)
+        for node in range(len(graph)):
+            fastest = INFINITY
+            for k in range(max_transfers + 1):
+                # A label is non-dominated if faster than all with fewer transfers
+                expected = exact[k][node] if exact[k][node] < fastest else INFINITY
+                fastest = min(fastest, exact[k][node])
+                found = tree.dist[k][node] if k < len(tree.dist) else INFINITY
+                assert found == expected, (seed, node, k)
+
+                if found < INFINITY:
+                    edges = tree.path_edges(graph, node, k)
+                    assert sum(graph.weights[e] for e in edges) == found
+                    sources = [graph.edge_source(e) for e in edges]
+                    boardings = sum(
+                        not graph.is_hub(source) and graph.is_hub(graph.targets[e])
+                        for source, e in zip(sources, edges)
+                    )
+                    assert boardings == k
+
+
+def test_bucket_queue_matches_heap(monkeypatch):
+    for seed in range(30):
+        graph = _random_graph(seed)
+        assert graph.weight_steps(config.SEARCH_BUCKET_STEP) is not None
+        rng = random.Random(seed)
+        for origin in rng.sample(range(graph.num_stations), 5):
+            max_time = rng.choice([5.0, 12.5, INFINITY])
+            monkeypatch.setattr(config, "SEARCH_QUEUE", "heap")
+            heap = dijkstra(graph, origin, max_time)
+            monkeypatch.setattr(config, "SEARCH_QUEUE", "bucket")
+            bucket = dijkstra(graph, origin, max_time)
+            assert bucket.dist == heap.dist, (seed, origin, max_time)
+            assert sorted(bucket.order) == sorted(heap.order)
+            for node in bucket.order:
+                edges = bucket.path_edges(graph, node)
+                assert sum(graph.weights[e] for e in edges) == bucket.dist[node]
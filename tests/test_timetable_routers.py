@@ -0,0 +1,119 @@
+"""Connection scan and RAPTOR queries on a small fixture timetable."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from network_graph import (  # noqa: E402
+    NetworkGraph,
+    NetworkGraphBuilder,
+    TRANSFER_INDEX,
+    TRANSFER_RAILWAY,
+)
+from path_search import INFINITY  # noqa: E402
+from raptor_router import RaptorRouter  # noqa: E402
+from timetable_router import TimetableRouter, parse_time  # noqa: E402
+
+LINE_A = "odpt.Railway:Test.A"
+LINE_B = "odpt.Railway:Test.B"
+CALENDAR = "odpt.Calendar:Weekday"
+
+
+def _graph() -> NetworkGraph:
+    """Line A (A0-A1) and line B (B1-B2); A1 and B1 are one complex, 5 minutes apart."""
+    builder = NetworkGraphBuilder()
+    a0, a1, b1, b2 = (builder.add_station(name) for name in ("A0", "A1", "B1", "B2"))
+    line_a = builder.add_railway(LINE_A)
+    line_b = builder.add_railway(LINE_B)
+    for u, v, railway in ((a0, a1, line_a), (b1, b2, line_b)):
+        builder.add_edge(u, v, 10.0, railway)
+        builder.add_edge(v, u, 10.0, railway)
+    hub = builder.add_hub("Central")
+    for platform in (a1, b1):
+        builder.add_edge(platform, hub, 2.5, TRANSFER_INDEX)
+        builder.add_edge(hub, platform, 2.5, TRANSFER_INDEX)
+    return builder.build()
+
+
+def _trip(trip_id: str, railway: str, *stops):
+    """A trip from (station, "HH:MM") stops: departures, then the final arrival."""
+    events = [
+        {"odpt:departureStation": station, "odpt:departureTime": time} for station, time in stops[:-1]
+    ]
+    station, time = stops[-1]
+    events.append({"odpt:arrivalStation": station, "odpt:arrivalTime": time})
+    return trip_id, railway, events
+
+
+TIMETABLE = [
+    _trip("A-0800", LINE_A, ("A0", "08:00"), ("A1", "08:10")),
+    # Leaves before the 5-minute walk from A1 is done
+    _trip("B-0812", LINE_B, ("B1", "08:12"), ("B2", "08:20")),
+    _trip("B-0816", LINE_B, ("B1", "08:16"), ("B2", "08:25")),
+    # Runs past midnight
+    _trip("A-2350", LINE_A, ("A0", "23:50"), ("A1", "00:05")),
+]
+
+
+def _routers():
+    graph = _graph()
+    csa = TimetableRouter.from_timetables(graph, CALENDAR, TIMETABLE)
+    raptor = RaptorRouter.from_timetables(graph, CALENDAR, TIMETABLE, max_trips=3)
+    return graph, csa, raptor
+
+
+def test_transfer_through_station_complex():
+    graph, csa, raptor = _routers()
+    a0, b2 = graph.index_of("A0"), graph.index_of("B2")
+    expected_hops = [
+        (a0, graph.index_of("A1"), LINE_A, 10.0, 1),
+        (graph.index_of("A1"), graph.index_of("B1"), TRANSFER_RAILWAY, 5.0, 0),
+        (graph.index_of("B1"), b2, LINE_B, 9.0, 1),
+    ]
+
+    profile = csa.latest_departures(b2, parse_time("08:30"), parse_time("07:00"))
+    assert profile.departure[a0] == parse_time("08:00")
+    assert profile.arrival[a0] == parse_time("08:25")
+    assert profile.duration(a0) == 25.0
+    assert csa.journey(profile, a0) == expected_hops
+
+    profiles = raptor.departure_profiles(b2, parse_time("07:55"), parse_time("08:00"), 60)
+    entry, hops = raptor.journey(profiles, a0, parse_time("08:00"))
+    assert (entry[0], entry[1], entry[2]) == (parse_time("08:00"), parse_time("08:25"), 2)
+    assert hops == expected_hops
+    # Waiting from 07:55 for the 08:00 train counts towards the window
+    assert profiles.window_times(a0) == (27.5, 30.0)
+
+
+def test_trip_crossing_midnight():
+    graph, csa, raptor = _routers()
+    a0, a1 = graph.index_of("A0"), graph.index_of("A1")
+    midnight = 24 * 60
+
+    profile = csa.latest_departures(a1, midnight + parse_time("00:10"), parse_time("23:30"))
+    assert profile.departure[a0] == parse_time("23:50")
+    assert profile.arrival[a0] == midnight + parse_time("00:05")
+    assert profile.durations(graph.num_stations)[a0] == 15.0
+    assert csa.journey(profile, a0) == [(a0, a1, LINE_A, 15.0, 1)]
+
+    profiles = raptor.departure_profiles(a1, parse_time("23:40"), parse_time("23:50"), 30)
+    # Leaving from 23:40 to 23:50 means 25 down to 15 minutes to 00:05
+    assert profiles.window_times(a0) == (20.0, 25.0)
+
+
+def test_window_minute_without_departure_scores_infinity():
+    graph, csa, raptor = _routers()
+    a0, b2 = graph.index_of("A0"), graph.index_of("B2")
+
+    # After 08:00 nothing leaves A0 until the late train, past max_time
+    profiles = raptor.departure_profiles(b2, parse_time("08:00"), parse_time("08:05"), 60)
+    assert profiles.best_entry(a0, parse_time("08:00"), raptor.max_trips) is not None
+    assert profiles.window_times(a0) == (INFINITY, INFINITY)
+    averages, worsts = profiles.window_scores(graph.num_stations)
+    assert (averages[a0], worsts[a0]) == (INFINITY, INFINITY)
+
+    profile = csa.latest_departures(b2, parse_time("08:30"), parse_time("08:01"))
+    assert profile.duration(a0) == INFINITY
+    assert profile.durations(graph.num_stations)[a0] == INFINITY
+    assert csa.journey(profile, a0) == []
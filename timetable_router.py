@@ -0,0 +1,374 @@
+"""Timetable-based routing with the Connection Scan Algorithm (CSA)."""
+
+import json
+from array import array
+from bisect import bisect_right
+from operator import sub
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from network_graph import NetworkGraph, TRANSFER_INDEX
+from path_search import INFINITY
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_time(value: str) -> int:
+    """
+    Convert an ODPT "HH:MM" time to minutes since midnight.
+
+    Raises:
+        ValueError: If the value is not a valid HH:MM time
+    """
+    hours, _, minutes = value.partition(":")
+    if not hours.isdigit() or not minutes.isdigit():
+        raise ValueError(f"Invalid time: {value!r}")
+    return int(hours) * 60 + int(minutes)
+
+
+class ReverseProfile:
+    """
+    Latest departures towards one target stop, for every stop at once.
+
+    ``departure[u]`` is the latest time one can leave stop ``u`` and still
+    reach the target by the deadline, and ``arrival[u]`` the time that
+    journey reaches the target. ``exit_connection[u]`` / ``exit_walk[u]``
+    record how the journey leaves ``u``, and ``trip_alight[t]`` the
+    connection after which trip ``t`` is left, so journeys can be rebuilt.
+    """
+
+    def __init__(
+        self,
+        target: int,
+        deadline: int,
+        earliest: int,
+        num_stops: int,
+        num_trips: int
+    ):
+        """
+        Initialize an empty profile.
+
+        Args:
+            target: Target stop (graph node index)
+            deadline: Latest allowed arrival at the target
+            earliest: Earliest allowed departure from any stop
+            num_stops: Number of stops (graph nodes)
+            num_trips: Number of trips in the router
+        """
+        self.target = target
+        self.deadline = deadline
+        self.earliest = earliest
+        self.departure: List[float] = [-INFINITY] * num_stops
+        self.arrival: List[float] = [INFINITY] * num_stops
+        self.exit_connection = array("i", [-1]) * num_stops
+        self.exit_walk = array("i", [-1]) * num_stops
+        self.trip_alight = array("i", [-1]) * num_trips
+
+    def duration(self, stop: int) -> float:
+        """Door-to-door time of the latest feasible journey, or inf."""
+        if self.departure[stop] < self.earliest:
+            return INFINITY
+        return float(self.arrival[stop] - self.departure[stop])
+
+    def durations(self, num_stops: int) -> List[float]:
+        """
+        Door-to-door times of the first num_stops stops, aligned by stop index.
+
+        Unreached stops have departure -inf and arrival inf, so a single
+        C-level subtraction over the two label arrays yields inf for them.
+        """
+        return list(map(float, map(sub, self.arrival[:num_stops], self.departure[:num_stops])))
+
+
+class TimetableRouter:
+    """
+    Connection Scan Algorithm over trips from ``train_timetables``.
+
+    Every pair of consecutive stops of a trip is one elementary connection.
+    Connections are kept as parallel typed arrays sorted by departure time,
+    so a query is a single linear scan. Stops are graph node indices, and
+    transfers between same-name platforms reuse the graph's station complex
+    hubs as footpaths.
+    """
+
+    def __init__(self, graph: NetworkGraph, calendar: str):
+        """
+        Initialize an empty router (use from_timetables or load).
+
+        Args:
+            graph: Network graph whose node indices are used as stop IDs
+            calendar: ODPT calendar the trips run on
+        """
+        self.graph = graph
+        self.calendar = calendar
+        self.dep_stop = array("i")
+        self.arr_stop = array("i")
+        self.dep_time = array("i")
+        self.arr_time = array("i")
+        self.trip = array("i")
+        self.next_in_trip = array("i")
+        self.trip_ids: List[str] = []
+        self.trip_railways: List[str] = []
+        self.footpaths = station_complex_footpaths(graph)
+
+    def __len__(self) -> int:
+        """Number of elementary connections."""
+        return len(self.dep_stop)
+
+    @classmethod
+    def from_timetables(
+        cls,
+        graph: NetworkGraph,
+        calendar: str,
+        timetables: Iterable[Tuple[str, str, List[Dict]]]
+    ) -> "TimetableRouter":
+        """
+        Build the sorted connection arrays from train timetables.
+
+        Args:
+            graph: Network graph whose node indices are used as stop IDs
+            calendar: ODPT calendar the trips run on
+            timetables: (trip_id, railway, odpt:trainTimetableObject) tuples
+
+        Returns:
+            TimetableRouter ready for queries
+        """
+        router = cls(graph, calendar)
+        connections = []  # (dep_time, arr_time, dep_stop, arr_stop, trip, position)
+
+        for trip_id, railway, stop_events in timetables:
+            trip = len(router.trip_ids)
+            hops = list(trip_hops(graph, stop_events))
+            if not hops:
+                continue
+            router.trip_ids.append(trip_id)
+            router.trip_railways.append(railway)
+            for position, (dep_stop, dep_time, arr_stop, arr_time) in enumerate(hops):
+                connections.append((dep_time, arr_time, dep_stop, arr_stop, trip, position))
+
+        connections.sort()
+
+        # Link each connection to the next one of its trip, in sorted positions
+        last_of_trip: Dict[Tuple[int, int], int] = {}
+        for c, (dep_time, arr_time, dep_stop, arr_stop, trip, position) in enumerate(connections):
+            router.dep_time.append(dep_time)
+            router.arr_time.append(arr_time)
+            router.dep_stop.append(dep_stop)
+            router.arr_stop.append(arr_stop)
+            router.trip.append(trip)
+            router.next_in_trip.append(-1)
+            last_of_trip[(trip, position)] = c
+        for (trip, position), c in last_of_trip.items():
+            following = last_of_trip.get((trip, position + 1))
+            if following is not None:
+                router.next_in_trip[c] = following
+
+        return router
+
+    @classmethod
+    def load(cls, db, graph: NetworkGraph, calendar: str) -> "TimetableRouter":
+        """
+        Build a router from the train_timetables table.
+
+        Args:
+            db: Connected TrainDatabaseManager
+            graph: Network graph whose node indices are used as stop IDs
+            calendar: ODPT calendar to load trips for
+
+        Returns:
+            TimetableRouter (empty if no trips run on the calendar)
+        """
+        return cls.from_timetables(graph, calendar, load_trips(db, calendar))
+
+    def latest_departures(self, target: int, arrive_by: int, depart_after: int) -> ReverseProfile:
+        """
+        Compute, for every stop, the latest departure that reaches a target in time.
+
+        One backwards scan over the connections answers the query for all
+        origins at once, which is what ranking candidate homes needs.
+
+        Args:
+            target: Target stop (graph node index), e.g. a workplace
+            arrive_by: Latest arrival at the target (minutes since midnight)
+            depart_after: Earliest departure from the origin (minutes since midnight)
+
+        Returns:
+            ReverseProfile with latest departures and arrivals per stop
+        """
+        profile = ReverseProfile(
+            target, arrive_by, depart_after, len(self.graph), len(self.trip_ids)
+        )
+        departure = profile.departure
+        arrival = profile.arrival
+        exit_connection = profile.exit_connection
+        exit_walk = profile.exit_walk
+        footpaths = self.footpaths
+
+        departure[target] = arrive_by
+        for stop, walk_time in footpaths.get(target, ()):
+            if arrive_by - walk_time < depart_after:
+                continue
+            departure[stop] = arrive_by - walk_time
+            arrival[stop] = arrive_by
+            exit_walk[stop] = target
+
+        trip_ok = bytearray(len(self.trip_ids))
+        trip_arrival = [INFINITY] * len(self.trip_ids)
+        trip_alight = profile.trip_alight
+        dep_stop = self.dep_stop
+        arr_stop = self.arr_stop
+        dep_time = self.dep_time
+        arr_time = self.arr_time
+        trips = self.trip
+
+        # Connections leaving after the deadline can never be part of a journey
+        for c in range(bisect_right(dep_time, arrive_by) - 1, -1, -1):
+            td = dep_time[c]
+            if td < depart_after:
+                break
+
+            trip = trips[c]
+            if not trip_ok[trip]:
+                v = arr_stop[c]
+                ta = arr_time[c]
+                if ta > departure[v]:
+                    continue
+                trip_ok[trip] = 1
+                trip_alight[trip] = c
+                trip_arrival[trip] = ta if v == target else arrival[v]
+
+            u = dep_stop[c]
+            reach = trip_arrival[trip]
+            if td > departure[u] or (td == departure[u] and reach < arrival[u]):
+                departure[u] = td
+                arrival[u] = reach
+                exit_connection[u] = c
+                exit_walk[u] = -1
+                for stop, walk_time in footpaths.get(u, ()):
+                    walk_departure = td - walk_time
+                    if walk_departure < depart_after:
+                        continue
+                    if walk_departure > departure[stop] or (
+                        walk_departure == departure[stop] and reach < arrival[stop]
+                    ):
+                        departure[stop] = walk_departure
+                        arrival[stop] = reach
+                        exit_connection[stop] = -1
+                        exit_walk[stop] = u
+
+        return profile
+
+    def journey(self, profile: ReverseProfile, origin: int) -> List[Tuple[int, int, str, float, int]]:
+        """
+        Rebuild the journey of a profile from one origin stop.
+
+        Returns:
+            (from_stop, to_stop, railway, minutes, num_stops) hops in travel order
+        """
+        hops = []
+        stop = origin
+        for _ in range(len(self.dep_stop) + len(self.graph)):
+            if stop == profile.target or profile.departure[stop] < profile.earliest:
+                break
+
+            walk_to = profile.exit_walk[stop]
+            if walk_to >= 0:
+                walk_time = dict(self.footpaths[stop])[walk_to]
+                hops.append((stop, walk_to, self.graph.railway_ids[TRANSFER_INDEX], walk_time, 0))
+                stop = walk_to
+                continue
+
+            c = profile.exit_connection[stop]
+            trip = self.trip[c]
+            alight = profile.trip_alight[trip]
+            railway = self.trip_railways[trip]
+            while True:
+                hops.append((
+                    self.dep_stop[c], self.arr_stop[c], railway,
+                    float(self.arr_time[c] - self.dep_time[c]), 1
+                ))
+                if c == alight or self.next_in_trip[c] < 0:
+                    break
+                c = self.next_in_trip[c]
+            stop = self.arr_stop[c]
+
+        return hops
+
+
+def load_trips(db, calendar: str) -> Iterator[Tuple[str, str, List[Dict]]]:
+    """
+    Read the trips running on a calendar from the train_timetables table.
+
+    Args:
+        db: Connected TrainDatabaseManager
+        calendar: ODPT calendar to load trips for
+
+    Yields:
+        (trip_id, railway, odpt:trainTimetableObject) tuples
+    """
+    db.cursor.execute("""
+        SELECT id, railway, timetable_objects
+        FROM train_timetables
+        WHERE calendar = ? AND timetable_objects IS NOT NULL
+    """, (calendar,))
+
+    for trip_id, railway, objects_json in db.cursor.fetchall():
+        try:
+            yield trip_id, railway, json.loads(objects_json)
+        except json.JSONDecodeError:
+            continue
+
+
+def station_complex_footpaths(graph: NetworkGraph) -> Dict[int, List[Tuple[int, float]]]:
+    """Derive platform-to-platform footpaths from the graph's hub nodes."""
+    footpaths: Dict[int, List[Tuple[int, float]]] = {}
+    for hub in range(graph.num_stations, len(graph)):
+        platforms = list(graph.edges(hub))
+        for platform, half_a, _ in platforms:
+            for other, half_b, _ in platforms:
+                if other != platform:
+                    footpaths.setdefault(platform, []).append((other, half_a + half_b))
+    return footpaths
+
+
+def trip_hops(
+    graph: NetworkGraph,
+    stop_events: List[Dict]
+) -> Iterable[Tuple[int, int, int, int]]:
+    """
+    Turn a trip's stop events into (dep_stop, dep_time, arr_stop, arr_time) hops.
+
+    Times that go backwards within a trip are treated as past midnight.
+    Stops that are not part of the graph are passed through, so the hop
+    runs from the previous known stop to the next one.
+    """
+    previous: Optional[Tuple[int, int]] = None
+    last_time = None
+    for event in stop_events:
+        station = event.get("odpt:departureStation") or event.get("odpt:arrivalStation")
+        arrival = event.get("odpt:arrivalTime")
+        departure = event.get("odpt:departureTime")
+        try:
+            times = [parse_time(t) if t else None for t in (arrival, departure)]
+        except ValueError:
+            continue
+
+        # Unroll past-midnight times so they keep increasing along the trip
+        for i, t in enumerate(times):
+            if t is not None:
+                if last_time is not None:
+                    while t < last_time:
+                        t += MINUTES_PER_DAY
+                times[i] = last_time = t
+        arr, dep = times
+
+        stop = graph.index_of(station) if station else None
+        if stop is None or graph.is_hub(stop):
+            continue
+
+        arrive_at = arr if arr is not None else dep
+        if previous is not None and arrive_at is not None and previous[0] != stop:
+            yield previous[0], previous[1], stop, arrive_at
+
+        leave_at = dep if dep is not None else arr
+        if leave_at is not None:
+            previous = (stop, leave_at)
@@ -0,0 +1,233 @@
+"""Precomputed all-pairs travel-time matrix stored as a memory-mapped file."""
+
+import mmap
+import os
+import struct
+from array import array
+from typing import Collection, List, Optional, Sequence, Tuple
+
+import config
+from network_graph import NetworkGraph
+from path_search import dijkstra, rank_group_meeting_points, rank_meeting_points
+
+# Header: magic, format version, byte-order mark, node count, graph fingerprint
+_MAGIC = b"DSTM"
+_FORMAT_VERSION = 1
+_BYTE_ORDER_MARK = 0xFEFF
+_HEADER = struct.Struct("=4sHHI32s")
+
+# Travel times are stored as unsigned 16-bit half-minutes
+UNREACHABLE = 0xFFFF
+_MAX_ENCODABLE_MINUTES = (UNREACHABLE - 1) / 2
+
+
+def matrix_path_for(db_path: str) -> str:
+    """Get the matrix file path that sits next to a database file."""
+    return os.path.splitext(db_path)[0] + config.TRAVEL_TIME_MATRIX_SUFFIX
+
+
+class MatrixRow:
+    """Shortest-path tree for one origin, read straight from the matrix."""
+
+    def __init__(self, origin: int, half_minutes: memoryview, pred_edge: memoryview):
+        """
+        Initialize a row view.
+
+        Args:
+            origin: Origin node index
+            half_minutes: Travel time per node in half-minutes
+            pred_edge: Predecessor edge index per node (-1 if unreached)
+        """
+        self.origin = origin
+        self.half_minutes = half_minutes
+        self.pred_edge = pred_edge
+
+
+class TravelTimeMatrix:
+    """
+    Dense station × station travel times with a companion predecessor matrix.
+
+    Row ``i`` of the time matrix holds the shortest travel time from node
+    ``i`` to every node in half-minutes; row ``i`` of the predecessor matrix
+    holds the edge each node was reached by, so routes can be rebuilt for
+    the handful of stations that are actually returned.
+    """
+
+    def __init__(self, path: str, mapped: mmap.mmap, num_nodes: int):
+        """
+        Initialize from an open memory map (use TravelTimeMatrix.load).
+
+        Args:
+            path: Path to the matrix file
+            mapped: Read-only memory map of the file
+            num_nodes: Number of nodes per row
+        """
+        self.path = path
+        self.num_nodes = num_nodes
+        self._mapped = mapped
+
+        times_size = _padded(2 * num_nodes * num_nodes)
+        view = memoryview(mapped)
+        start = _HEADER.size
+        self._times = view[start:start + 2 * num_nodes * num_nodes].cast("H")
+        start += times_size
+        self._pred = view[start:start + 4 * num_nodes * num_nodes].cast("i")
+
+    @classmethod
+    def load(cls, path: str, fingerprint: bytes) -> Optional["TravelTimeMatrix"]:
+        """
+        Memory-map a matrix file if it matches the given graph.
+
+        Args:
+            path: Path to the matrix file
+            fingerprint: NetworkGraph.fingerprint() of the current graph
+
+        Returns:
+            TravelTimeMatrix, or None if the file is missing or stale
+        """
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+
+            magic, version, bom, num_nodes, stored = _HEADER.unpack(header)
+            if (magic != _MAGIC or version != _FORMAT_VERSION
+                    or bom != _BYTE_ORDER_MARK or stored != fingerprint):
+                return None
+
+            expected = _HEADER.size + _padded(2 * num_nodes * num_nodes) + 4 * num_nodes * num_nodes
+            if os.fstat(f.fileno()).st_size != expected:
+                return None
+
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls(path, mapped, num_nodes)
+
+    def close(self) -> None:
+        """Release the memory map (deferred to GC while row views are alive)."""
+        self._times.release()
+        self._pred.release()
+        try:
+            self._mapped.close()
+        except BufferError:
+            pass
+
+    def row(self, origin: int) -> MatrixRow:
+        """Get the shortest-path tree of one origin as zero-copy views."""
+        start = origin * self.num_nodes
+        end = start + self.num_nodes
+        return MatrixRow(origin, self._times[start:end], self._pred[start:end])
+
+    def top_meeting_points(
+        self,
+        origin_a: int,
+        origin_b: int,
+        max_time: float,
+        top_n: int,
+        num_candidates: int,
+        exclude: Collection[int] = ()
+    ) -> List[Tuple[float, float, int]]:
+        """
+        Rank meeting nodes from two matrix rows.
+
+        Args:
+            origin_a: First origin node index
+            origin_b: Second origin node index
+            max_time: Maximum travel time per origin (in minutes)
+            top_n: Number of meeting nodes to return
+            num_candidates: Only nodes below this index may be returned
+            exclude: Node indices that may not be returned
+
+        Returns:
+            List of (total_time, time_difference, node) sorted ascending
+        """
+        limit = min(int(max_time * 2), UNREACHABLE - 1)
+        times_a = self.row(origin_a).half_minutes[:num_candidates]
+        times_b = self.row(origin_b).half_minutes[:num_candidates]
+
+        # Half-minute integers keep the ordering identical to the float search
+        ranked = rank_meeting_points(times_a, times_b, limit, top_n, exclude)
+        return [(total / 2, diff / 2, node) for total, diff, node in ranked]
+
+    def top_group_meeting_points(
+        self,
+        origins: Sequence[int],
+        weights: Sequence[float],
+        max_time: float,
+        top_n: int,
+        objective: str,
+        num_candidates: int,
+        exclude: Collection[int] = ()
+    ) -> List[Tuple[float, float, float, int]]:
+        """
+        Rank meeting nodes for any number of origins from matrix rows.
+
+        Args:
+            origins: Origin node indices
+            weights: Positive weight of each origin
+            max_time: Maximum travel time per origin (in minutes)
+            top_n: Number of meeting nodes to return
+            objective: "sum" or "max" (see rank_group_meeting_points)
+            num_candidates: Only nodes below this index may be returned
+            exclude: Node indices that may not be returned
+
+        Returns:
+            List of (weighted_total, longest, spread, node) in ranking order
+        """
+        limit = min(int(max_time * 2), UNREACHABLE - 1)
+        rows = [self.row(origin).half_minutes[:num_candidates] for origin in origins]
+        ranked = rank_group_meeting_points(rows, weights, limit, top_n, objective, exclude)
+        return [
+            (total / 2, longest / 2, spread / 2, node)
+            for total, longest, spread, node in ranked
+        ]
+
+
+def write_travel_time_matrix(graph: NetworkGraph, path: str) -> int:
+    """
+    Compute all-pairs travel times and predecessors and write them to disk.
+
+    Edge weights must be multiples of half a minute so travel times can be
+    stored exactly. The file is written atomically.
+
+    Args:
+        graph: Network graph to compute travel times for
+        path: Destination file path
+
+    Returns:
+        Size of the written file in bytes
+    """
+    num_nodes = len(graph)
+    times = array("H")
+    pred = array("i")
+
+    for origin in range(num_nodes):
+        tree = dijkstra(graph, origin, _MAX_ENCODABLE_MINUTES)
+        row = array("H", [UNREACHABLE]) * num_nodes
+        for node in tree.order:
+            row[node] = round(tree.dist[node] * 2)
+        times.extend(row)
+        pred.extend(tree.pred_edge)
+
+    header = _HEADER.pack(
+        _MAGIC, _FORMAT_VERSION, _BYTE_ORDER_MARK, num_nodes, graph.fingerprint()
+    )
+    padding = bytes(_padded(2 * len(times)) - 2 * len(times))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        times.tofile(f)
+        f.write(padding)
+        pred.tofile(f)
+    os.replace(tmp_path, path)
+
+    return os.path.getsize(path)
+
+
+def _padded(size: int) -> int:
+    """Round a section size up to 4-byte alignment."""
+    return (size + 3) & ~3
@@ -24,12 +24,61 @@ class StationSearchResponse(BaseModel):
     count: int = Field(..., description="Number of stations returned")
 
 
+class NearbyStation(StationInfo):
+    """Station near a point, with its distance."""
+    distance: float = Field(..., description="Distance from the point in meters")
+
+
+class NearbyStationsResponse(BaseModel):
+    """Response model for nearby stations."""
+    stations: List[NearbyStation] = Field(..., description="Stations sorted by distance")
+    count: int = Field(..., description="Number of stations returned")
+
+
+class StationsInBoundsResponse(BaseModel):
+    """Response model for stations inside a bounding box."""
+    stations: List[StationInfo]
+    count: int = Field(..., description="Number of stations returned")
+    truncated: bool = Field(..., description="More stations are inside the box than returned")
+
+
 class AnalyzeRequest(BaseModel):
     """Request model for commute analysis."""
     station_a: str = Field(..., description="Work station A identifier")
     station_b: str = Field(..., description="Work station B identifier")
     top_n: int = Field(10, ge=1, le=50, description="Number of top results to return")
     max_time: float = Field(120.0, ge=10.0, le=300.0, description="Maximum commute time in minutes")
+    depart_at: Optional[str] = Field(
+        None, pattern=r"^\d{1,2}:\d{2}$",
+        description="Use timetables: earliest departure from home (HH:MM)"
+    )
+    arrive_by: Optional[str] = Field(
+        None, pattern=r"^\d{1,2}:\d{2}$",
+        description="Use timetables: latest arrival at work (HH:MM)"
+    )
+    window_start: Optional[str] = Field(
+        None, pattern=r"^\d{1,2}:\d{2}$",
+        description="Use timetables: start of the window of times to leave home (HH:MM)"
+    )
+    window_end: Optional[str] = Field(
+        None, pattern=r"^\d{1,2}:\d{2}$",
+        description="Use timetables: end of the window of times to leave home (HH:MM)"
+    )
+    window_score: str = Field(
+        "average", pattern=r"^(average|worst)$",
+        description="Score stations on the average or worst commute over the window"
+    )
+    calendar: str = Field(
+        "odpt.Calendar:Weekday", description="Timetable calendar for timetable-based analysis"
+    )
+    optimize: str = Field(
+        "time", pattern=r"^(time|pareto)$",
+        description="Rank by fastest routes, or by time plus transfer_penalty per transfer"
+    )
+    transfer_penalty: float = Field(
+        5.0, ge=0.0, le=60.0,
+        description="Extra minutes each transfer counts as when optimize is pareto"
+    )
 
 
 class RouteSegment(BaseModel):
@@ -83,6 +132,77 @@ class AnalyzeResponse(BaseModel):
     computation_time: float = Field(..., description="Time taken to compute results in seconds")
 
 
+class GroupAnalyzeRequest(BaseModel):
+    """Request model for commute analysis with any number of workplaces."""
+    stations: List[str] = Field(..., min_length=2, max_length=10, description="Work station identifiers")
+    weights: Optional[List[float]] = Field(None, description="Positive weight per work station (default all 1)")
+    top_n: int = Field(10, ge=1, le=50, description="Number of top results to return")
+    max_time: float = Field(120.0, ge=10.0, le=300.0, description="Maximum commute time per person in minutes")
+    objective: str = Field(
+        "sum", pattern=r"^(sum|max)$",
+        description="Rank by weighted total time (sum) or by the longest commute (max)"
+    )
+
+
+class GroupCandidateStation(BaseModel):
+    """A candidate living station with routes from every work location."""
+    station_id: str
+    station_name: str
+    total_time: float = Field(..., description="Weighted total commute time")
+    longest_time: float = Field(..., description="Longest single commute")
+    spread: float = Field(..., description="Longest minus shortest commute")
+    balance_score: float = Field(..., ge=0.0, le=1.0, description="Balance score (1.0 = equal commutes)")
+    latitude: float
+    longitude: float
+    commute_times: List[float] = Field(..., description="Commute time per work station, in request order")
+    routes: List[RouteInfo] = Field(..., description="Route per work station, in request order")
+
+
+class GroupAnalyzeResponse(BaseModel):
+    """Response model for group commute analysis."""
+    work_stations: List[WorkStationInfo]
+    candidates: List[GroupCandidateStation]
+    computation_time: float = Field(..., description="Time taken to compute results in seconds")
+
+
+class WorkplacePair(BaseModel):
+    """Workplaces of one couple."""
+    station_a: str = Field(..., description="Work station A identifier")
+    station_b: str = Field(..., description="Work station B identifier")
+
+
+class BatchAnalyzeRequest(BaseModel):
+    """Request model for analyzing many workplace pairs at once."""
+    pairs: List[WorkplacePair] = Field(..., min_length=1, max_length=1000)
+    top_n: int = Field(10, ge=1, le=50, description="Number of top results per pair")
+    max_time: float = Field(120.0, ge=10.0, le=300.0, description="Maximum commute time in minutes")
+
+
+class BatchAnalyzeResult(BaseModel):
+    """Candidates for one workplace pair of a batch."""
+    station_a: str
+    station_b: str
+    candidates: List[CandidateStation]
+    error: Optional[str] = Field(None, description="Why this pair could not be analyzed")
+
+
+class BatchAnalyzeResponse(BaseModel):
+    """Response model for batch commute analysis."""
+    results: List[BatchAnalyzeResult] = Field(..., description="One result per pair, in request order")
+    unique_workplaces: int = Field(..., description="Distinct work stations searched")
+    computation_time: float = Field(..., description="Time taken to compute results in seconds")
+
+
+class IsochroneResponse(BaseModel):
+    """Stations reachable from one origin, bucketed by travel-time band."""
+    origin: str = Field(..., description="Origin station ID")
+    bands: List[float] = Field(..., description="Ascending band limits in minutes")
+    stations: List[List[str]] = Field(
+        ...,
+        description="Station IDs per band; band i holds travel times in (bands[i-1], bands[i]]"
+    )
+
+
 class RailwayInfo(BaseModel):
     """Railway line information."""
     id: str
@@ -102,4 +222,25 @@ class HealthResponse(BaseModel):
     """Health check response."""
     status: str = Field(..., description="Service health status")
     database: str = Field(..., description="Database connection status")
-    version: str = Field(..., description="API version")
\ No newline at end of file
+    version: str = Field(..., description="API version")
+
+
+class PathCacheStats(BaseModel):
+    """Shortest-path tree cache counters."""
+    entries: int = Field(..., description="Number of cached trees")
+    max_entries: int = Field(..., description="Maximum number of cached trees")
+    bytes: int = Field(..., description="Approximate memory used by cached trees")
+    max_bytes: int = Field(..., description="Memory budget for cached trees")
+    hits: int = Field(..., description="Lookups served from the cache")
+    misses: int = Field(..., description="Lookups that required a new search")
+    evictions: int = Field(..., description="Trees evicted to stay within budget")
+    version_changes: int = Field(
+        ..., description="Newer graph versions seen while trees were cached (older trees age out by LRU)"
+    )
+
+
+class NetworkReloadResponse(BaseModel):
+    """Network rebuild request status."""
+    status: str = Field(..., description="\"scheduled\" or \"already running\"")
+    graph_version: int = Field(..., description="Version of the network currently served")
+    fingerprint: str = Field(..., description="Fingerprint of the graph currently served (hex)")